@@ -0,0 +1,40 @@
+"""
+A user's own comment history, newest first.
+
+Pages are keyset-paginated on (created_at, id) and served by the
+(user, -created_at, -id) index, so page 200 of someone with thousands of
+comments costs what page 1 does. Each page runs one comment query and one
+title lookup per content type on it; there are no per-row reply, reaction
+or title queries.
+"""
+from django.db.models import Q
+
+from .comment_feed import decode_cursor, encode_cursor
+from .content_registry import attach_titles
+from .models import Comment
+from .serializers import ActivityCommentSerializer
+
+MAX_ACTIVITY_LIMIT = 100
+
+ACTIVITY_COLUMNS = (
+    'id', 'content_type', 'content_slug', 'object_id', 'text', 'parent', 'is_approved',
+    'is_flagged', 'likes_count', 'dislikes_count', 'created_at', 'updated_at',
+)
+
+
+def activity_page(user, cursor=None, limit=20):
+    """Pass 'next_cursor' back as `cursor`; raises ValueError for a bad cursor"""
+    limit = max(1, min(limit, MAX_ACTIVITY_LIMIT))
+    comments = Comment.objects.filter(user=user)
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        comments = comments.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    page = list(comments.only(*ACTIVITY_COLUMNS).order_by('-created_at', '-id')[:limit + 1])
+    has_more = len(page) > limit
+    page = attach_titles(page[:limit])
+    return {
+        'results': ActivityCommentSerializer(page, many=True).data,
+        'next_cursor': encode_cursor(page[-1].created_at, page[-1].id) if has_more else None,
+        'has_more': has_more,
+    }
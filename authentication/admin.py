@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from . import models
+from .counting import EstimatedCountPaginator
 
 # Import SharXathon admin configuration
 from .sharxathon_admin import SharXathonAdmin
@@ -209,6 +210,8 @@ class EventAdmin(admin.ModelAdmin):
     search_fields = ('name', 'description', 'location', 'organizer_name')
     readonly_fields = ('views_count', 'created_at', 'updated_at', 'published_at')
     ordering = ('-event_date',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     fieldsets = (
         ('Basic Information', {
             'fields': ('name', 'slug', 'description', 'details', 'event_type', 'category')
@@ -310,3 +313,21 @@ class UserPreferenceAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(models.OutboundMessage)
+class OutboundMessageAdmin(admin.ModelAdmin):
+    list_display = ('phone_number', 'purpose', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status', 'purpose', 'created_at')
+    search_fields = ('phone_number',)
+    readonly_fields = ('attempts', 'last_error', 'created_at', 'sent_at')
+    ordering = ('-created_at',)
+
+
+@admin.register(models.ScreeningTerm)
+class ScreeningTermAdmin(admin.ModelAdmin):
+    list_display = ('term', 'action', 'is_active', 'updated_at')
+    list_filter = ('action', 'is_active')
+    list_editable = ('action', 'is_active')
+    search_fields = ('term',)
+    ordering = ('term',)
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class AuthenticationConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "authentication"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        from django.conf import settings
+        from django.core.signals import request_started
+        if getattr(settings, 'CACHE_SNAPSHOT_FILE', '') and getattr(settings, 'CACHE_SNAPSHOT_INTERVAL', 0) > 0:
+            from .cache_snapshot import start_timer_on_first_request as start_snapshot_timer
+            request_started.connect(start_snapshot_timer)
@@ -0,0 +1,87 @@
+"""
+DRF authentication classes
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .cache_bus import bus
+
+
+# cache_bus namespace whose generation is part of every cached token's key;
+# single users are revoked under it by id
+TOKEN_NAMESPACE = 'auth_tokens'
+
+# User fields authentication doesn't depend on; update_last_login saves one on every login
+IGNORED_USER_FIELDS = {'last_login'}
+
+
+def _timeout():
+    return getattr(settings, 'TOKEN_AUTH_CACHE_TIMEOUT', 60)
+
+
+def token_cache_key(key):
+    return f"auth_token:{bus.generation(TOKEN_NAMESPACE)}:{key}"
+
+
+def revoke_cached_tokens():
+    """Retire every cached token in every worker once the current transaction commits"""
+    bus.bump(TOKEN_NAMESPACE)
+
+
+def revoke_user_tokens(*user_ids):
+    """Retire these users' cached tokens in every worker once the current transaction commits"""
+    bus.revoke(TOKEN_NAMESPACE, user_ids, keep_for=_timeout())
+
+
+def invalidate_token(token):
+    """Drop a single token from the lookup cache, here now and everywhere after commit"""
+    cache.delete(token_cache_key(token.key))
+    revoke_user_tokens(token.user_id)
+
+
+def invalidate_user_tokens(user):
+    """Drop every cached token belonging to a user, here now and everywhere after commit"""
+    keys = Token.objects.filter(user_id=user.pk).values_list('key', flat=True)
+    cache.delete_many([token_cache_key(key) for key in keys])
+    revoke_user_tokens(user.pk)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that memoizes token -> user in the cache.
+
+    Saves the authtoken_token/CustomUser join on every authenticated request.
+    Entries live for TOKEN_AUTH_CACHE_TIMEOUT seconds. The cache is per
+    worker, so revocation goes through cache_bus. Deleting a token (logout,
+    also through queryset.delete()) or saving a user (password reset,
+    deactivation) revokes that user once the write commits, and every
+    worker drops entries for them cached before then; other users' entries
+    stay warm. CustomUser.objects.update() can touch any number of users,
+    so it moves the TOKEN_NAMESPACE generation that the keys carry and
+    every entry misses. Tokens are never updated in place (DRF replaces
+    them by deleting).
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        cached = cache.get(cache_key)
+        if cached is not None and bus.revoked_since(TOKEN_NAMESPACE, cached[0].pk, cached[1]):
+            cached = None
+
+        if cached is None:
+            # Taken before the read, so a revocation committed during it still counts
+            read_at = time.time()
+            user, token = super().authenticate_credentials(key)
+            cache.set(cache_key, (user, read_at), _timeout())
+            return (user, token)
+
+        user = cached[0]
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        return (user, Token(key=key, user=user))
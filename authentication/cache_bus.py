@@ -0,0 +1,167 @@
+"""
+Cache invalidation across the worker processes of one host.
+
+Each gunicorn worker keeps its own locmem cache, so an admin edit used to
+clear cached payloads only in the worker that handled it. Every content
+namespace ('tech_news', 'event', ...) now has a generation counter kept
+in one small JSON file (CACHE_GENERATION_FILE) that all workers share:
+
+- A write bumps its namespace's counter once the transaction commits. The
+  file is rewritten under an exclusive lock and swapped in with
+  os.replace(), so readers never see half of it.
+- Before using a cached value, a reader checks the generation: one
+  os.stat() of the file, and a re-read only when the file has changed.
+  Callbacks subscribed to a namespace run in each process that sees its
+  counter move; payload_cache uses them to drop its entries.
+- Single keys can be revoked without moving their namespace: revoke()
+  records when, and a reader treats anything it cached before that as
+  gone. Revocations are kept only as long as the entries they cover can
+  live, so the file stays small.
+
+This needs no server and no query. It covers the workers on one machine,
+which is what a per-process cache needs. Instances on separate machines
+need a shared cache backend anyway.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Top-level key of the file holding {'namespace:key': revoked at}, next to the counters
+REVOKED = '_revoked'
+
+
+def _path():
+    return getattr(settings, 'CACHE_GENERATION_FILE', '') or os.path.join(
+        tempfile.gettempdir(), 'neosharx-cache-generations.json'
+    )
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError):
+        logger.warning(f"Unreadable cache generation file {path}, treating every namespace as changed")
+        return None
+
+
+class GenerationBus:
+    """This process's view of the shared generation counters"""
+
+    def __init__(self):
+        self._generations = {}
+        self._revoked = {}
+        self._stamp = None
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(list)
+
+    def subscribe(self, namespace, callback):
+        """Call callback(namespace) whenever the namespace's generation changes"""
+        self._subscribers[namespace].append(callback)
+
+    def generation(self, namespace):
+        self.sync()
+        return self._generations.get(namespace, 0)
+
+    def revoked_since(self, namespace, key, timestamp):
+        """Whether `key` was revoked at or after `timestamp` (a time.time() value)"""
+        self.sync()
+        revoked_at = self._revoked.get(f'{namespace}:{key}')
+        return revoked_at is not None and revoked_at >= timestamp
+
+    def sync(self):
+        """Pick up other processes' bumps; cheap when nothing changed"""
+        path = _path()
+        try:
+            info = os.stat(path)
+            stamp = (path, info.st_ino, info.st_mtime_ns, info.st_size)
+        except FileNotFoundError:
+            stamp = (path, None)
+        if stamp == self._stamp:
+            return
+
+        with self._lock:
+            if stamp == self._stamp:
+                return
+            current = _read(path) if stamp[1] is not None else {}
+            if current is None:
+                # Can't tell what moved; drop everything and start again
+                current = {}
+                changed = set(self._subscribers)
+                self._revoked = {}
+            else:
+                self._revoked = current.pop(REVOKED, {})
+                changed = {
+                    namespace for namespace in set(current) | set(self._generations)
+                    if current.get(namespace, 0) != self._generations.get(namespace, 0)
+                }
+            self._generations = current
+            self._stamp = stamp
+
+        for namespace in changed:
+            for callback in self._subscribers.get(namespace, ()):
+                callback(namespace)
+
+    def bump(self, *namespaces):
+        """Move the namespaces to a new generation once the current transaction commits"""
+        namespaces = sorted(set(namespaces))
+        if namespaces:
+            transaction.on_commit(lambda: self._bump_now(namespaces))
+
+    def revoke(self, namespace, keys, keep_for):
+        """
+        Revoke single keys once the current transaction commits. `keep_for`
+        is how long, in seconds, an entry cached before now can still be around.
+        """
+        names = sorted({f'{namespace}:{key}' for key in keys})
+        if names:
+            transaction.on_commit(lambda: self._revoke_now(names, keep_for))
+
+    def _bump_now(self, namespaces):
+        def apply(current):
+            for namespace in namespaces:
+                current[namespace] = current.get(namespace, 0) + 1
+        self._rewrite(apply, ', '.join(namespaces))
+
+    def _revoke_now(self, names, keep_for):
+        def apply(current):
+            now = time.time()
+            revoked = {name: at for name, at in current.get(REVOKED, {}).items() if at > now - keep_for}
+            revoked.update((name, now) for name in names)
+            current[REVOKED] = revoked
+        self._rewrite(apply, ', '.join(names))
+
+    def _rewrite(self, apply, what):
+        path = _path()
+        try:
+            with open(f'{path}.lock', 'a') as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                current = _read(path) or {}
+                apply(current)
+                fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.generations-')
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(current, f)
+                os.replace(temporary, path)
+        except OSError:
+            logger.exception(f"Could not update cache generations for {what}")
+        self.sync()
+
+
+bus = GenerationBus()
@@ -0,0 +1,180 @@
+"""
+Homepage payloads saved to disk, so a restart comes up with them cached.
+
+Web processes save() every CACHE_SNAPSHOT_INTERVAL seconds on a timer
+started by their first request, and gunicorn.conf.py saves again when a
+worker exits cleanly (uvicorn workers stopped by SIGTERM die by the signal,
+so the timer is what counts there). The master load()s the file before
+the warmup, which then only builds what the snapshot didn't cover.
+
+The file (CACHE_SNAPSHOT_FILE) is zlib-compressed JSON holding:
+
+- the applied migrations, hashed. A snapshot taken under another schema
+  is ignored as a whole;
+- one watermark per namespace: the row count and latest updated_at of its
+  model, read before the payloads are collected. On load a namespace's
+  payloads are kept only if its watermark still matches the database, so
+  any edit, insert or delete made in between retires them. Bulk updates
+  must set updated_at for this to see them, as the admin actions do;
+- the payloads themselves, with the parameters they were built for.
+
+Restored payloads get the usual PAYLOAD_CACHE_SECONDS from the moment
+they are loaded, so counters that move without touching updated_at (views,
+likes) are at most that much staler than usual. Payloads with fields
+computed from the clock keep the expiry read off their data, and are not
+restored once it has passed (payload_cache). The file has to be on a
+disk that outlives the process to help across deploys.
+
+It is off unless CACHE_SNAPSHOT_FILE is set, and render.yaml doesn't set
+it. Render keeps only a persistent disk across deploys, and a disk would
+tie the web service to a single instance. The watermark check also scans
+every cached table, so restoring only beats rebuilding while the tables
+are small. `manage.py benchmark_cache_snapshot` compares the two; on
+SQLite with N rows in each of the 7 tables (12 payloads):
+
+    rows/table   rebuild (12 queries)   restore (9 queries)
+    500          17 ms                  9 ms
+    5,000        19 ms                  27 ms
+    50,000       107 ms                 239 ms
+
+Either way it is a one-off cost per boot, paid by the master before the
+workers fork (gunicorn.conf.py).
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import zlib
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import request_started
+from django.db import DatabaseError, close_old_connections, connection
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import Count, Max
+
+from . import payload_cache
+
+logger = logging.getLogger(__name__)
+
+FORMAT = 1
+
+
+def _path():
+    return getattr(settings, 'CACHE_SNAPSHOT_FILE', '')
+
+
+def migration_state():
+    """Hash of the applied migrations"""
+    applied = sorted(f'{app}.{name}' for app, name in MigrationRecorder(connection).applied_migrations())
+    return hashlib.sha256('\n'.join(applied).encode()).hexdigest()
+
+
+def watermarks():
+    """{namespace: [row count, latest updated_at]} for every cached model"""
+    marks = {}
+    for model, namespace in payload_cache.NAMESPACES.items():
+        summary = model.objects.aggregate(rows=Count('pk'), latest=Max('updated_at'))
+        latest = summary['latest'].isoformat() if summary['latest'] else None
+        marks[namespace] = [summary['rows'], latest]
+    return marks
+
+
+def save(path=None):
+    """Write the payloads this process has cached; returns how many were saved"""
+    path = path or _path()
+    if not path:
+        return 0
+    try:
+        snapshot = {
+            'format': FORMAT,
+            'migrations': migration_state(),
+            'saved_at': time.time(),
+            'watermarks': watermarks(),  # before the payloads, so they can only be newer
+            'entries': payload_cache.cached_entries(),
+        }
+    except DatabaseError:
+        logger.exception("Could not read the database for a cache snapshot")
+        return 0
+
+    body = zlib.compress(json.dumps(snapshot, cls=DjangoJSONEncoder, separators=(',', ':')).encode())
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(body)
+    os.replace(temporary, path)
+    return len(snapshot['entries'])
+
+
+def load(path=None):
+    """Restore the payloads that are still valid; returns how many were restored"""
+    path = path or _path()
+    if not path:
+        return 0
+    try:
+        with open(path, 'rb') as f:
+            snapshot = json.loads(zlib.decompress(f.read()))
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError, zlib.error):
+        logger.warning(f"Ignoring unreadable cache snapshot {path}")
+        return 0
+
+    if snapshot.get('format') != FORMAT or snapshot.get('migrations') != migration_state():
+        logger.info("Cache snapshot was taken under another schema, ignoring it")
+        return 0
+
+    current = watermarks()
+    valid = {namespace for namespace, mark in snapshot['watermarks'].items() if current.get(namespace) == mark}
+    restored = 0
+    for name, params, data in snapshot['entries']:
+        if name.split(':', 1)[0] in valid and payload_cache.put(name, params, data):
+            restored += 1
+    logger.info(f"Restored {restored} of {len(snapshot['entries'])} cached payloads from {path}")
+    return restored
+
+
+# Periodic saving -------------------------------------------------------------
+
+_timer_lock = threading.Lock()
+_timer_started = False
+
+
+def start_timer(interval=None):
+    """Save every `interval` seconds on a daemon thread; only the first call starts it"""
+    global _timer_started
+    interval = interval or getattr(settings, 'CACHE_SNAPSHOT_INTERVAL', 0)
+    if interval <= 0 or not _path():
+        return False
+    with _timer_lock:
+        if _timer_started:
+            return False
+        _timer_started = True
+    _schedule(interval)
+    return True
+
+
+def start_timer_on_first_request(**kwargs):
+    """request_started receiver: save from web processes only"""
+    request_started.disconnect(start_timer_on_first_request)
+    start_timer()
+
+
+def _schedule(interval):
+    timer = threading.Timer(interval, _tick, args=(interval,))
+    timer.daemon = True
+    timer.start()
+
+
+def _tick(interval):
+    try:
+        save()
+    except Exception:
+        logger.exception("Cache snapshot save failed")
+    finally:
+        close_old_connections()
+        _schedule(interval)
@@ -0,0 +1,129 @@
+"""
+comments_count upkeep for commentable content.
+
+Each registered content model (see content_registry) stores how many
+approved comments, replies included, it has. Comment.save() and the
+Comment post_delete handler apply +/-1 with an F() update in the same
+transaction as the comment write, so feed cards can show the number
+without a COUNT per card. reconcile_counts() (manage.py
+reconcile_content_comment_counts) repairs any drift.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from . import content_registry
+from .models import Comment
+
+# Most items one /comments/counts/ request may ask about
+MAX_COUNT_ITEMS = 100
+
+
+def counted_key(content_type, object_id, is_approved):
+    """(content_type, object_id) a comment with these values counts towards, or None"""
+    if is_approved and object_id is not None and content_registry.get(content_type):
+        return content_type, object_id
+    return None
+
+
+def _adjust(key, delta):
+    content_type, object_id = key
+    content_registry.get(content_type).model.objects.filter(pk=object_id).update(
+        comments_count=Greatest(F('comments_count') + delta, Value(0))
+    )
+
+
+def record_change(before, after):
+    """Move one comment's count from key `before` to key `after`; either may be None"""
+    if before == after:
+        return
+    if before is not None:
+        _adjust(before, -1)
+    if after is not None:
+        _adjust(after, 1)
+
+
+def apply_deltas(deltas):
+    """Apply {(content_type, object_id): delta} from a set-based comment change"""
+    for key, delta in deltas.items():
+        if delta and key is not None:
+            _adjust(key, delta)
+
+
+def parse_items(raw):
+    """
+    'type:slug,type:slug' -> [(type, slug)], skipping malformed entries,
+    unknown types and repeats. ValueError once more than MAX_COUNT_ITEMS
+    distinct items have been read.
+    """
+    items = {}
+    for item in raw.split(','):
+        content_type, sep, slug = item.strip().partition(':')
+        if sep and slug and content_registry.get(content_type):
+            items[(content_type, slug)] = None
+            if len(items) > MAX_COUNT_ITEMS:
+                raise ValueError(f'At most {MAX_COUNT_ITEMS} items per request')
+    return list(items)
+
+
+def counts_for(items):
+    """
+    {'type:slug': comments_count} for the given (type, slug) pairs, read
+    with a single UNION query across the content tables. Unknown items are
+    left out.
+    """
+    slugs_by_type = {}
+    for content_type, slug in items:
+        slugs_by_type.setdefault(content_type, []).append(slug)
+    if not slugs_by_type:
+        return {}
+
+    queries = [
+        content_registry.get(content_type).model.objects.filter(slug__in=slugs)
+        .order_by()
+        .values_list(Value(content_type), 'slug', 'comments_count')
+        for content_type, slugs in slugs_by_type.items()
+    ]
+    query = queries[0].union(*queries[1:], all=True) if len(queries) > 1 else queries[0]
+    return {f'{content_type}:{slug}': count for content_type, slug, count in query}
+
+
+def _approved_count(content_type):
+    counts = (
+        Comment.objects.filter(content_type=content_type, object_id=OuterRef('pk'), is_approved=True)
+        .order_by()
+        .values('object_id')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def reconcile_counts(batch_size=1000, dry_run=False):
+    """
+    Recompute comments_count wherever it disagrees with the approved
+    comments, one content type and primary-key batch at a time. Returns
+    {content_type: [ids fixed]}.
+    """
+    fixed = {}
+    for kind in content_registry.kinds():
+        manager = kind.model.objects
+        last_pk = 0
+        while True:
+            batch = list(
+                manager.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1]
+
+            drifted = list(
+                manager.filter(pk__in=batch)
+                .annotate(actual=_approved_count(kind.key))
+                .exclude(comments_count=F('actual'))
+                .values_list('pk', flat=True)
+            )
+            if drifted and not dry_run:
+                manager.filter(pk__in=drifted).update(comments_count=_approved_count(kind.key))
+            if drifted:
+                fixed.setdefault(kind.key, []).extend(drifted)
+    return fixed
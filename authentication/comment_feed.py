@@ -0,0 +1,355 @@
+"""
+Incremental comment feed for one thread, i.e. one (content_type, content_slug).
+
+Once a comment write commits, moderation included, the changed comments
+take the thread's next change number from its CommentThread row into
+Comment.seq; a deletion leaves a CommentTombstone numbered the same way.
+Reaction counters aren't numbered (see reactions.py). Numbering is a
+short transaction of its own (number_after_commit), so the thread row is
+locked for one UPDATE on each table, not for the whole write, and writers
+on one thread don't queue behind each other. Numbers are still committed in order on a
+thread. A reader first takes the thread's committed last_seq and only
+returns changes up to it, so a change still being numbered can't be
+stepped over: when it commits it has a higher number than anything
+already returned. A write whose process dies before numbering it shows up
+in pages but not in the feed until the comment changes again.
+
+A cursor is the (seq, id) of the last change a client has seen, so "what
+changed since" is one range scan on the (content_type, object_id, seq, id)
+index plus one on the tombstones, instead of re-reading the first page.
+Changed comments that are approved are returned in full; ones withdrawn
+from display and deleted ones are listed by id.
+
+Open pages can follow a thread over SSE (comment_events). Streams are woken
+immediately by writes in the same process (see signals.py) and otherwise
+re-check every COMMENT_STREAM_POLL_SECONDS, which covers the other workers.
+"""
+import asyncio
+import base64
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Count, F, Prefetch, Q
+from django.utils import timezone
+
+from . import content_registry
+from .models import Comment, CommentLike, CommentThread, CommentTombstone
+from .serializers import CommentDeltaSerializer
+from .sse import comment, format_event
+
+MAX_DELTA_LIMIT = 200
+REPLIES_SHOWN = 10
+
+
+def encode_cursor(timestamp, pk):
+    """Keyset cursor on (timestamp, id), for the pages of the moderation queue, activity and inbox"""
+    raw = f'{timestamp.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(timestamp, id) from a cursor; raises ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, pk = raw.rsplit('|', 1)
+        timestamp = datetime.fromisoformat(timestamp)
+        pk = int(pk)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+    if timezone.is_naive(timestamp):
+        raise ValueError('Invalid cursor')
+    return timestamp, pk
+
+
+def encode_position(seq, pk=None):
+    """Feed cursor; without `pk`, every change numbered `seq` has been seen"""
+    raw = str(seq) if pk is None else f'{seq}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_position(cursor):
+    """(seq, id or None) from a feed cursor; raises ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        seq, _, pk = raw.partition('|')
+        return int(seq), (int(pk) if pk else None)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def thread_key(object_id, content_slug):
+    return f'id:{object_id}' if object_id is not None else f'slug:{content_slug}'
+
+
+def next_seq(content_type, object_id, content_slug):
+    """
+    Take the thread's next change number. The thread row stays locked until
+    the calling transaction commits, so keep that transaction short.
+    """
+    threads = CommentThread.objects.filter(content_type=content_type, thread_key=thread_key(object_id, content_slug))
+    if not threads.update(last_seq=F('last_seq') + 1):
+        try:
+            with transaction.atomic():
+                CommentThread.objects.create(
+                    content_type=content_type, thread_key=thread_key(object_id, content_slug), last_seq=1
+                )
+            return 1
+        except IntegrityError:
+            # Another writer created it first; its lock is gone, so this one takes it
+            threads.update(last_seq=F('last_seq') + 1)
+    return threads.values_list('last_seq', flat=True).get()
+
+
+def number_after_commit(content_type, object_id, content_slug, comment_ids=(), deleted_ids=()):
+    """
+    Once the current transaction commits, give the changed comments and a
+    tombstone per deleted id the thread's next change number, in a
+    transaction of their own, then wake the thread's streams.
+    """
+    comment_ids, deleted_ids = list(comment_ids), list(deleted_ids)
+
+    def number():
+        with transaction.atomic():
+            seq = next_seq(content_type, object_id, content_slug)
+            if comment_ids:
+                Comment.objects.filter(pk__in=comment_ids).update(seq=seq)
+            CommentTombstone.objects.bulk_create([
+                CommentTombstone(content_type=content_type, thread_key=thread_key(object_id, content_slug),
+                                 comment_id=pk, seq=seq)
+                for pk in deleted_ids
+            ])
+        hub.publish((content_type, content_slug))
+
+    transaction.on_commit(number, robust=True)
+
+
+def record_deletion(comment):
+    """Leave a tombstone for a deleted comment once the delete commits"""
+    number_after_commit(comment.content_type, comment.object_id, comment.content_slug, deleted_ids=[comment.pk])
+
+
+def _thread(content_type, content_slug):
+    """(comments on one piece of content, the thread's key), or None if the content doesn't exist"""
+    kind = content_registry.get(content_type)
+    if kind is None:
+        return Comment.objects.filter(content_type=content_type, content_slug=content_slug), thread_key(None, content_slug)
+    object_id = kind.object_id(content_slug)
+    if object_id is None:
+        return None
+    return Comment.objects.filter(content_type=content_type, object_id=object_id), thread_key(object_id, None)
+
+
+def thread_comments(content_type, content_slug):
+    """
+    Comments on one piece of content. Registered types match on object_id,
+    resolved from the content's slug, so a thread survives slug renames.
+    The id is looked up first rather than joined as a subquery: with a
+    plain equality the planner can read the thread in index order instead
+    of sorting it.
+    """
+    thread = _thread(content_type, content_slug)
+    return thread[0] if thread else Comment.objects.none()
+
+
+def _committed_seq(content_type, key):
+    return (
+        CommentThread.objects.filter(content_type=content_type, thread_key=key)
+        .values_list('last_seq', flat=True)
+        .first()
+    ) or 0
+
+
+def listing_page(comments, offset, limit):
+    """
+    One page of comments ready for CommentSerializer: authors joined, the
+    first REPLIES_SHOWN approved replies prefetched, approved replies
+    counted and content titles attached, so a page costs the same few
+    queries however many comments it holds.
+    """
+    # Ordered by parent first so the rows come out of comment_replies_idx as they are
+    replies = Comment.objects.filter(is_approved=True).select_related('user').order_by('parent_id', 'created_at')
+    page = list(
+        comments.select_related('user')
+        .prefetch_related(Prefetch('replies', queryset=replies[:REPLIES_SHOWN], to_attr='shown_replies'))
+        [offset:offset + limit]
+    )
+    shown = page + [reply for c in page for reply in c.shown_replies]
+    counts = dict(
+        Comment.objects.filter(parent__in=[c.id for c in shown], is_approved=True)
+        .order_by()
+        .values('parent')
+        .annotate(n=Count('id'))
+        .values_list('parent', 'n')
+    )
+    for c in shown:
+        c.approved_reply_count = counts.get(c.id, 0)
+    return content_registry.attach_titles(page)
+
+
+def user_reactions(user, comments):
+    """{comment id: 'like'|'dislike'} for `user` on these comments and their shown replies"""
+    if user is None or not user.is_authenticated:
+        return {}
+    ids = [c.id for c in comments]
+    ids += [reply.id for c in comments for reply in getattr(c, 'shown_replies', ())]
+    if not ids:
+        return {}
+    return dict(CommentLike.objects.filter(user=user, comment_id__in=ids).values_list('comment_id', 'reaction'))
+
+
+def latest_cursor(content_type, content_slug):
+    """Cursor for the most recent committed change in the thread"""
+    thread = _thread(content_type, content_slug)
+    return encode_position(_committed_seq(content_type, thread[1]) if thread else 0)
+
+
+def _after(seq, pk, id_field):
+    if pk is None:
+        return Q(seq__gt=seq)
+    return Q(seq__gt=seq) | Q(seq=seq, **{f'{id_field}__gt': pk})
+
+
+def fetch_changes(content_type, content_slug, cursor, limit=100, user=None, context=None):
+    """
+    Changes in the thread after `cursor`, in change order. Approved
+    comments are serialised in 'comments'; ones no longer shown and deleted
+    ones are listed by id in 'removed'. Pass the returned 'cursor' back
+    next time.
+    """
+    seq, pk = decode_position(cursor)
+    limit = max(1, min(limit, MAX_DELTA_LIMIT))
+    thread = _thread(content_type, content_slug)
+    if thread is None:
+        return {'comments': [], 'removed': [], 'cursor': cursor, 'has_more': False}
+    comments, key = thread
+
+    # Everything numbered up to here has committed; later numbers may still be in flight
+    horizon = _committed_seq(content_type, key)
+    changed = list(
+        comments.filter(_after(seq, pk, 'id'), seq__lte=horizon)
+        .select_related('user')
+        .order_by('seq', 'id')[:limit + 1]
+    )
+    deleted = list(
+        CommentTombstone.objects.filter(_after(seq, pk, 'comment_id'), content_type=content_type,
+                                        thread_key=key, seq__lte=horizon)
+        .order_by('seq', 'comment_id')
+        .values_list('seq', 'comment_id')[:limit + 1]
+    )
+    changes = sorted([(c.seq, c.id, c) for c in changed] + [(s, i, None) for s, i in deleted], key=lambda c: c[:2])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    visible = [c for _, _, c in changes if c is not None and c.is_approved]
+    reactions = {}
+    if user is not None and user.is_authenticated and visible:
+        reactions = dict(
+            CommentLike.objects.filter(user=user, comment__in=visible).values_list('comment_id', 'reaction')
+        )
+
+    if has_more:
+        cursor = encode_position(*changes[-1][:2])
+    elif changes or seq < horizon:
+        cursor = encode_position(horizon)
+    return {
+        'comments': CommentDeltaSerializer(
+            visible, many=True, context={**(context or {}), 'user_reactions': reactions}
+        ).data,
+        'removed': [i for _, i, c in changes if c is None or not c.is_approved],
+        'cursor': cursor,
+        'has_more': has_more,
+    }
+
+
+class ThreadHub:
+    """Wakes comment streams in this process when their thread changes"""
+
+    def __init__(self):
+        self._waiters = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, key):
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters[key].add(waiter)
+        return waiter
+
+    def unsubscribe(self, key, waiter):
+        with self._lock:
+            waiters = self._waiters.get(key)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del self._waiters[key]
+
+    def publish(self, key):
+        """Callable from any thread"""
+        with self._lock:
+            waiters = list(self._waiters.get(key, ()))
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # loop already closed
+                pass
+
+
+hub = ThreadHub()
+
+
+def _between_polls(query):
+    """
+    Run a feed query on the request's own sync thread, then hand back its
+    database connection (to the pool, or closed, as CONN_MAX_AGE says)
+    rather than hold it while the stream idles until the next poll.
+    """
+    def run(*args, **kwargs):
+        try:
+            return query(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(run)
+
+
+async def comment_events(content_type, content_slug, cursor=None, user=None, once=False):
+    """
+    SSE messages for one thread: a 'comments' event (id = new cursor) per
+    batch of changes, keep-alive comments while idle. Ends after
+    COMMENT_STREAM_MAX_SECONDS, or after one batch when `once` is set.
+    """
+    poll_seconds = getattr(settings, 'COMMENT_STREAM_POLL_SECONDS', 2)
+    ends_at = time.monotonic() + getattr(settings, 'COMMENT_STREAM_MAX_SECONDS', 300)
+    key = (content_type, content_slug)
+    fetch = _between_polls(fetch_changes)
+
+    if cursor is None:
+        cursor = await _between_polls(latest_cursor)(content_type, content_slug)
+
+    loop, wakeup = hub.subscribe(key)
+    try:
+        last_sent = time.monotonic()
+        while True:
+            wakeup.clear()
+            changes = await fetch(content_type, content_slug, cursor, user=user)
+            if changes['comments'] or changes['removed'] or once:
+                cursor = changes['cursor']
+                yield format_event(changes, event='comments', event_id=cursor, retry=poll_seconds * 1000)
+                last_sent = time.monotonic()
+                if changes['has_more'] and not once:
+                    continue
+            elif time.monotonic() - last_sent >= 15:
+                yield comment('keep-alive')
+                last_sent = time.monotonic()
+
+            if once or time.monotonic() >= ends_at:
+                return
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        hub.unsubscribe(key, (loop, wakeup))
@@ -0,0 +1,98 @@
+"""
+Registry of commentable content types.
+
+Maps each Comment.content_type key to its model and title field, so code
+that needs "the thing a comment is about" looks it up here instead of
+branching on the key. Comments hold the content's primary key in
+Comment.object_id; content_slug is kept as the public handle and follows
+slug renames (see signals.py).
+"""
+from collections import defaultdict
+
+from .models import (
+    NeoProject,
+    NeoStory,
+    RoboticsNews,
+    SharXathon,
+    StartupStory,
+    TalkEpisode,
+    TechNews,
+)
+
+UNKNOWN_TITLE = "Unknown Content"
+
+
+class ContentKind:
+    """One commentable model"""
+
+    def __init__(self, key, model, title_field):
+        self.key = key
+        self.model = model
+        self.title_field = title_field
+
+    def object_id(self, slug):
+        return self.model.objects.filter(slug=slug).values_list('pk', flat=True).first()
+
+    def titles(self, object_ids):
+        """{pk: title} for the given ids with a single in_bulk query"""
+        objects = self.model.objects.only(self.title_field).in_bulk(object_ids)
+        return {pk: getattr(obj, self.title_field) for pk, obj in objects.items()}
+
+
+_registry = {}
+
+
+def register(key, model, title_field):
+    _registry[key] = ContentKind(key, model, title_field)
+
+
+def get(key):
+    """ContentKind for a content_type key, or None if it isn't registered"""
+    return _registry.get(key)
+
+
+def kinds():
+    return list(_registry.values())
+
+
+def for_model(model):
+    for kind in _registry.values():
+        if kind.model is model:
+            return kind
+    return None
+
+
+def resolve_object_id(key, slug):
+    """Primary key of the content with this slug, or None"""
+    kind = get(key)
+    return kind.object_id(slug) if kind else None
+
+
+def attach_titles(comments):
+    """
+    Resolve content titles for a batch of comments with one in_bulk query
+    per content type. Comment.get_content_title() then reads the cached value.
+    """
+    ids_by_key = defaultdict(set)
+    for comment in comments:
+        if comment.object_id is not None:
+            ids_by_key[comment.content_type].add(comment.object_id)
+
+    titles = {}
+    for key, object_ids in ids_by_key.items():
+        kind = get(key)
+        if kind:
+            titles[key] = kind.titles(object_ids)
+
+    for comment in comments:
+        comment._content_title = titles.get(comment.content_type, {}).get(comment.object_id, UNKNOWN_TITLE)
+    return comments
+
+
+register('startup_story', StartupStory, 'heading')
+register('neo_story', NeoStory, 'header')
+register('neo_project', NeoProject, 'title')
+register('tech_news', TechNews, 'title')
+register('robotics_news', RoboticsNews, 'title')
+register('talk_episode', TalkEpisode, 'title')
+register('sharxathon', SharXathon, 'name')
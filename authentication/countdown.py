@@ -0,0 +1,150 @@
+"""
+In-memory hackathon schedule for countdowns.
+
+Countdowns only need each hackathon's deadline, start and end instants, so
+the published ones are held in memory per process and refreshed every
+COUNTDOWN_SCHEDULE_REFRESH seconds, or straight away when a SharXathon is
+saved or deleted: in this process at once, in the other workers once the
+'sharxathon' cache_bus generation moves (see signals.py). Ticks are computed
+from the clock alone, including status changes between scheduler runs.
+"""
+import asyncio
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .cache_bus import bus
+from .models import SharXathon
+from .scheduler import sharxathon_status
+from .sse import format_event
+
+# Hackathons one stream connection may follow
+MAX_STREAM_SLUGS = 20
+
+# cache_bus namespace bumped when a SharXathon changes
+NAMESPACE = 'sharxathon'
+
+SCHEDULE_FIELDS = ('slug', 'name', 'registration_deadline', 'start_datetime', 'end_datetime', 'status')
+
+
+class HackathonSchedule:
+    """Published hackathons' key instants, keyed by slug"""
+
+    def __init__(self):
+        self._entries = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def refresh_interval(self):
+        return getattr(settings, 'COUNTDOWN_SCHEDULE_REFRESH', 60)
+
+    def is_stale(self):
+        bus.sync()
+        loaded_at = self._loaded_at
+        return loaded_at is None or time.monotonic() - loaded_at > self.refresh_interval
+
+    def refresh(self):
+        rows = SharXathon.objects.filter(is_published=True).values(*SCHEDULE_FIELDS)
+        entries = {row['slug']: row for row in rows}
+        with self._lock:
+            self._entries = entries
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def get(self, slug):
+        """Entry for slug, reloading first if stale; unknown slugs are looked up singly"""
+        if self.is_stale():
+            self.refresh()
+        entry = self._entries.get(slug)
+        if entry is None:
+            entry = SharXathon.objects.filter(slug=slug, is_published=True).values(*SCHEDULE_FIELDS).first()
+            if entry is not None:
+                with self._lock:
+                    self._entries = {**self._entries, slug: entry}
+        return entry
+
+    def lookup(self, slugs):
+        """Entries for the given slugs from memory only"""
+        entries = self._entries
+        return {slug: entries[slug] for slug in slugs if slug in entries}
+
+
+schedule = HackathonSchedule()
+bus.subscribe(NAMESPACE, lambda namespace: schedule.invalidate())
+
+
+def _remaining(delta):
+    return {
+        'days': delta.days,
+        'hours': delta.seconds // 3600,
+        'minutes': (delta.seconds % 3600) // 60,
+        'seconds': delta.seconds % 60,
+        'total_seconds': delta.total_seconds()
+    }
+
+
+def countdown_data(entry, now):
+    """Countdown payload for one schedule entry at `now`"""
+    status = sharxathon_status(
+        entry['registration_deadline'], entry['start_datetime'], entry['end_datetime'],
+        entry['status'], now=now
+    )
+    data = {
+        'name': entry['name'],
+        'status': status,
+        'current_time': now.isoformat(),
+        'registration_deadline': entry['registration_deadline'].isoformat(),
+        'start_datetime': entry['start_datetime'].isoformat(),
+        'end_datetime': entry['end_datetime'].isoformat(),
+        'is_registration_open': status == 'registration_open',
+        'is_active': status == 'ongoing',
+    }
+    if now < entry['start_datetime']:
+        data['time_until_start'] = _remaining(entry['start_datetime'] - now)
+    if now < entry['end_datetime']:
+        data['time_until_end'] = _remaining(entry['end_datetime'] - now)
+    return data
+
+
+async def countdown_events(slugs, once=False):
+    """
+    SSE messages for the given slugs: a 'countdown' event every second with
+    every hackathon's payload, preceded by a 'status' event whenever one of
+    them changes state. Ends after COUNTDOWN_STREAM_MAX_SECONDS (the client
+    reconnects), or after the first tick when `once` is set.
+    """
+    retry_ms = getattr(settings, 'COUNTDOWN_STREAM_RETRY_MS', 1000)
+    ends_at = time.monotonic() + getattr(settings, 'COUNTDOWN_STREAM_MAX_SECONDS', 300)
+    statuses = {}
+
+    while True:
+        if schedule.is_stale():
+            await sync_to_async(schedule.refresh)()
+
+        now = timezone.now()
+        entries = schedule.lookup(slugs)
+        hackathons = {slug: countdown_data(entry, now) for slug, entry in entries.items()}
+
+        for slug, data in hackathons.items():
+            previous = statuses.get(slug)
+            if previous is not None and previous != data['status']:
+                yield format_event({'slug': slug, 'status': data['status'], 'previous_status': previous}, event='status')
+            statuses[slug] = data['status']
+
+        yield format_event({
+            'current_time': now.isoformat(),
+            'hackathons': hackathons,
+            'missing': [slug for slug in slugs if slug not in entries],
+        }, event='countdown', retry=retry_ms)
+
+        if once or time.monotonic() >= ends_at:
+            return
+        # Tick on whole seconds so every client's countdown changes together
+        await asyncio.sleep(1 - time.time() % 1)
@@ -0,0 +1,141 @@
+"""
+Row counts for paginated lists.
+
+On PostgreSQL an exact COUNT(*) has to visit every matching row, so the
+total shown under the first page of a big list costs more than the page.
+count_rows() returns (count, approximate) and only counts exactly when it
+is cheap or the number matters:
+
+- Filtered sets (search, category, flags...) are always exact. They are
+  usually small, and someone narrowing a list notices a wrong total. A set
+  is filtered when its WHERE clause differs from the `base` queryset it
+  was narrowed from (a list's is_published=True queryset), so no caller
+  keeps a list of which parameters filter.
+- Unfiltered sets below COUNT_EXACT_THRESHOLD rows are exact.
+- Larger unfiltered sets follow COUNT_STRATEGY:
+  'estimate' - the planner's row estimate for the query. pg_class.reltuples
+               tells whether the table is big enough to bother; PostgreSQL only.
+  'cached'   - an exact count, reused for COUNT_CACHE_SECONDS or until the
+               model's rows change in any worker (retire_counts(), bumped
+               by the save/delete signals and the admin bulk actions).
+  'exact'    - always COUNT(*).
+  'auto'     - 'estimate' on PostgreSQL, 'cached' elsewhere (default).
+
+The admin changelists use the same rules through EstimatedCountPaginator.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from .cache_bus import bus
+
+
+def _strategy(using):
+    strategy = getattr(settings, 'COUNT_STRATEGY', 'auto')
+    if strategy == 'auto':
+        return 'estimate' if connections[using].vendor == 'postgresql' else 'cached'
+    if strategy == 'estimate' and connections[using].vendor != 'postgresql':
+        return 'exact'
+    return strategy
+
+
+def _threshold():
+    return getattr(settings, 'COUNT_EXACT_THRESHOLD', 10000)
+
+
+def table_estimate(model, using='default'):
+    """Rows in the model's table according to pg_class, or None if unknown"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    # -1 until the table is first vacuumed or analyzed
+    return int(row[0]) if row and row[0] >= 0 else None
+
+
+def planner_estimate(queryset):
+    """The planner's row estimate for the queryset (PostgreSQL)"""
+    connection = connections[queryset.db]
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def count_namespace(model):
+    """cache_bus namespace versioning the cached counts of a model's rows"""
+    return f'rows:{model._meta.label_lower}'
+
+
+def retire_counts(*models):
+    """Drop the cached counts of these models in every worker, after commit"""
+    bus.bump(*(count_namespace(model) for model in models))
+
+
+def count_cache_key(queryset):
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(f'{sql}|{params!r}'.encode()).hexdigest()
+    return f"row_count:{queryset.model._meta.label_lower}:{digest}"
+
+
+def is_filtered(queryset, base):
+    """True if `queryset` has filters beyond those of `base`"""
+    return queryset.query.where != base.query.where
+
+
+def count_rows(queryset, base=None):
+    """
+    (count, approximate) for the queryset; see the module docstring. Pass
+    the unfiltered list as `base`; without it the queryset counts as
+    unfiltered.
+    """
+    filtered = base is not None and is_filtered(queryset, base)
+    strategy = _strategy(queryset.db)
+    if filtered or strategy == 'exact':
+        return queryset.count(), False
+
+    threshold = _threshold()
+    if strategy == 'estimate':
+        rows = table_estimate(queryset.model, queryset.db)
+        if rows is None or rows < threshold:
+            return queryset.count(), False
+        estimate = planner_estimate(queryset)
+        if estimate < threshold:
+            return queryset.count(), False
+        return estimate, True
+
+    key = count_cache_key(queryset)
+    version = bus.generation(count_namespace(queryset.model))
+    cached = cache.get(key, version=version)
+    if cached is not None:
+        return cached, True
+    count = queryset.count()
+    if count >= threshold:
+        cache.set(key, count, getattr(settings, 'COUNT_CACHE_SECONDS', 60), version=version)
+    return count, False
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for admin changelists over big tables. The unfiltered
+    changelist uses count_rows(); searches and list_filter selections are
+    counted exactly.
+    """
+    approximate = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+        count, self.approximate = count_rows(queryset, base=queryset.model._default_manager.all())
+        return count
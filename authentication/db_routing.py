@@ -0,0 +1,228 @@
+"""
+Read-replica routing.
+
+When DATABASE_REPLICA_URL is set, the 'replica' alias serves the reads of
+safe (GET/HEAD/OPTIONS) requests; everything else uses 'default'.
+Reads stay on the primary when:
+
+- the request isn't safe, or runs outside a request (commands, threads);
+- the request already wrote something, or is inside a transaction;
+- the same client wrote within the last REPLICA_STICKY_SECONDS, so people
+  see their own comment or reaction straight after posting it. The pin
+  travels with the client as a signed cookie that expires with the window,
+  so every worker and instance honours it without shared state. Writes
+  made inside counter_writes() (page view counters bumped by GET detail
+  views) don't pin anyone;
+- the replica is more than REPLICA_MAX_LAG_SECONDS behind, or unreachable.
+  Lag is checked at most every REPLICA_LAG_CHECK_SECONDS per process.
+
+To try it locally, point DATABASE_REPLICA_URL at a copy of the SQLite file
+(sqlite:///replica.sqlite3); SQLite reports no lag.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+REPLICA_ALIAS = 'replica'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_COOKIE = 'db_pin'
+PIN_SALT = 'authentication.db_routing.pin'
+
+
+class RequestRouting:
+    """Routing state for one request"""
+
+    def __init__(self, safe, pinned=False):
+        self.safe = safe
+        self.pinned = pinned
+        self.wrote = False
+        self.counting = False
+
+
+_routing = ContextVar('db_routing', default=None)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in connections.databases
+
+
+def replica_lag(alias=REPLICA_ALIAS):
+    """Seconds the replica is behind its primary; None if it can't say"""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        # An idle primary sends nothing to replay, which isn't lag
+        cursor.execute(
+            "SELECT CASE WHEN NOT pg_is_in_recovery() "
+            "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+        )
+        lag = cursor.fetchone()[0]
+    return None if lag is None else float(lag)
+
+
+class ReplicaHealth:
+    """Whether the replica is close enough behind to read from, rechecked periodically"""
+
+    def __init__(self):
+        self._healthy = False
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._checked_at = None
+
+    def healthy(self):
+        checked_at = self._checked_at
+        if checked_at is not None and time.monotonic() - checked_at <= _setting('REPLICA_LAG_CHECK_SECONDS', 5):
+            return self._healthy
+
+        with self._lock:
+            if self._checked_at is checked_at:
+                self._healthy = self._check()
+                self._checked_at = time.monotonic()
+            return self._healthy
+
+    def _check(self):
+        try:
+            lag = replica_lag()
+        except DatabaseError as e:
+            logger.warning(f"Replica unavailable, reading from primary: {e}")
+            return False
+        limit = _setting('REPLICA_MAX_LAG_SECONDS', 5)
+        if lag is None or lag > limit:
+            logger.warning(f"Replica lag {lag}s over {limit}s, reading from primary")
+            return False
+        return True
+
+
+health = ReplicaHealth()
+
+
+class ReplicaRouter:
+    """DATABASE_ROUTERS entry; a no-op until the replica alias exists"""
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if (
+            routing is None
+            or not routing.safe
+            or routing.pinned
+            or not replica_configured()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return REPLICA_ALIAS if health.healthy() else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None and not routing.counting:
+            routing.pinned = routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary for the rest of this request (or block, outside one)"""
+    routing = _routing.get()
+    if routing is not None:
+        routing.pinned = True
+        yield
+        return
+    token = _routing.set(RequestRouting(safe=False, pinned=True))
+    try:
+        yield
+    finally:
+        _routing.reset(token)
+
+
+@contextmanager
+def counter_writes():
+    """
+    Writes in this block don't pin the client to the primary. For counters
+    nobody needs to read back at once, like the views_count every detail
+    page bumps, which would otherwise pin every reader.
+    """
+    routing = _routing.get()
+    if routing is None:
+        yield
+        return
+    counting, routing.counting = routing.counting, True
+    try:
+        yield
+    finally:
+        routing.counting = counting
+
+
+class ReplicaRoutingMiddleware:
+    """Scopes routing state to each request and remembers recent writers"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _pinned(request):
+        """Whether this client wrote within the sticky window"""
+        if not replica_configured():
+            return False
+        pin = request.get_signed_cookie(
+            PIN_COOKIE, default=None, salt=PIN_SALT, max_age=_setting('REPLICA_STICKY_SECONDS', 15)
+        )
+        return pin is not None
+
+    @staticmethod
+    def _remember(routing, response):
+        """Pin a client that just wrote; the signature's timestamp bounds it even if the cookie is kept"""
+        if not routing.wrote or response is None or not replica_configured():
+            return response
+        response.set_signed_cookie(
+            PIN_COOKIE, '1', salt=PIN_SALT, max_age=_setting('REPLICA_STICKY_SECONDS', 15),
+            httponly=True, secure=settings.SESSION_COOKIE_SECURE, samesite=settings.SESSION_COOKIE_SAMESITE,
+        )
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        safe = request.method in SAFE_METHODS
+        routing = RequestRouting(safe, pinned=not safe or self._pinned(request))
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self._remember(routing, response)
+
+    async def __acall__(self, request):
+        safe = request.method in SAFE_METHODS
+        routing = RequestRouting(safe, pinned=not safe or self._pinned(request))
+        token = _routing.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self._remember(routing, response)
@@ -0,0 +1,171 @@
+"""
+Per-view time budgets for database work.
+
+A list view decorated with @request_deadline gets REQUEST_DEADLINE_SECONDS
+(or the budget passed to the decorator) for all the queries it runs:
+
+- On PostgreSQL a SET statement_timeout gives the first statement whatever
+  is left of the budget, so the server cancels a runaway query instead of
+  finishing it for nobody. Later statements keep that timeout until it
+  would let one run more than POSTGRESQL_TIMEOUT_SLACK past the budget;
+  only then is it lowered with another SET. A list view running a handful
+  of quick queries pays one extra round trip, not one per query.
+- On SQLite a progress handler interrupts the running statement once the
+  budget is spent, the closest local equivalent.
+- On both, no further query starts once the budget is gone.
+
+When that happens the view's own response is discarded and the client gets
+a 503 with Retry-After straight away, rather than a worker and a
+connection being held until the query finishes on its own.
+
+Only reads are budgeted: the decorator leaves POST and other unsafe
+methods alone, since cancelling a write halfway helps nobody.
+"""
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DatabaseError, OperationalError, connections
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+# SQLite VM instructions between deadline checks
+SQLITE_PROGRESS_STEPS = 1000
+
+# Seconds a PostgreSQL statement may outlive the budget before the timeout
+# set for earlier ones is lowered, at the cost of a SET round trip
+POSTGRESQL_TIMEOUT_SLACK = 0.25
+
+QUERY_CANCELED = '57014'
+
+BUDGETED_METHODS = ('GET', 'HEAD')
+
+
+class DeadlineExceeded(OperationalError):
+    pass
+
+
+class Deadline:
+    """One request's budget; also the execute_wrapper installed on every connection"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.expired = False
+        self._armed = {}
+        self._timeouts = {}  # alias -> (raw connection, seconds its statement_timeout was set to)
+
+    def remaining(self):
+        return self.expires_at - time.monotonic()
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.remaining() <= 0:
+            self.expired = True
+            raise DeadlineExceeded(f'Request deadline of {self.seconds}s exceeded')
+        connection = context['connection']
+        if connection.vendor == 'postgresql':
+            self._arm_postgresql(connection, context['cursor'])
+        elif connection.alias not in self._armed:
+            self._arm_sqlite(connection)
+        try:
+            return execute(sql, params, many, context)
+        except DatabaseError as e:
+            if self._cancelled(e):
+                self.expired = True
+            raise
+
+    def _arm_postgresql(self, connection, cursor):
+        """Keep the next statement to what is left of the budget, give or take the slack"""
+        remaining = self.remaining()
+        session, timeout = self._timeouts.get(connection.alias, (None, None))
+        # A reconnected session starts from the default timeout again
+        if session is connection.connection and timeout - remaining <= POSTGRESQL_TIMEOUT_SLACK:
+            return
+        # The raw cursor, so this SET doesn't pass back through the wrapper
+        cursor.cursor.execute('SET statement_timeout = %s', [max(1, int(remaining * 1000))])
+        self._armed[connection.alias] = connection
+        self._timeouts[connection.alias] = (connection.connection, remaining)
+
+    def _arm_sqlite(self, connection):
+        connection.connection.set_progress_handler(self._progress, SQLITE_PROGRESS_STEPS)
+        self._armed[connection.alias] = connection
+
+    def _progress(self):
+        # A non-zero return makes SQLite abort the statement with "interrupted"
+        return 1 if time.monotonic() >= self.expires_at else 0
+
+    def _cancelled(self, error):
+        cause = error.__cause__
+        if getattr(cause, 'sqlstate', None) == QUERY_CANCELED or getattr(cause, 'pgcode', None) == QUERY_CANCELED:
+            return True
+        return 'interrupted' in str(error)
+
+    def disarm(self):
+        for connection in self._armed.values():
+            if connection.connection is None:
+                continue
+            try:
+                if connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute('SET statement_timeout TO DEFAULT')
+                elif connection.vendor == 'sqlite':
+                    connection.connection.set_progress_handler(None, SQLITE_PROGRESS_STEPS)
+            except DatabaseError:
+                # Not reusable if this fails; make sure the next request gets a fresh one
+                connection.close()
+        self._armed = {}
+        self._timeouts = {}
+
+
+@contextmanager
+def deadline(seconds):
+    """Apply a time budget to every query run on this thread's connections inside the block"""
+    budget = Deadline(seconds)
+    try:
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(budget))
+            yield budget
+    finally:
+        # Outside the wrappers, so resetting the timeout isn't itself refused
+        budget.disarm()
+
+
+def over_budget_response():
+    return Response(
+        {'error': 'This request took too long and was cancelled. Please try again or narrow the search.'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': '1'},
+    )
+
+
+def request_deadline(seconds=None):
+    """
+    Decorator for function views; place it below @api_view/@permission_classes.
+    `seconds` defaults to REQUEST_DEADLINE_SECONDS; 0 disables the budget.
+    Applies to GET and HEAD only, so a view that also creates rows can use it.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            budget = seconds if seconds is not None else getattr(settings, 'REQUEST_DEADLINE_SECONDS', 3)
+            if not budget or request.method not in BUDGETED_METHODS:
+                return view(request, *args, **kwargs)
+
+            with deadline(budget) as current:
+                try:
+                    response = view(request, *args, **kwargs)
+                except DatabaseError:
+                    if not current.expired:
+                        raise
+            if current.expired:
+                # The view may have caught the cancellation and built an error response of its own
+                logger.warning(f"{request.method} {request.path} cancelled after {budget}s")
+                return over_budget_response()
+            return response
+        return wrapped
+    return decorator
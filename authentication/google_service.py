@@ -5,6 +5,9 @@ from urllib.parse import urlencode
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework.authtoken.models import Token
+from asgiref.sync import sync_to_async
+import aiohttp
+from .oauth_http import averify_id_token, get_async_session, session
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,6 +22,9 @@ class GoogleService:
     TOKEN_URL = "https://oauth2.googleapis.com/token"
     USERINFO_URL = "https://www.googleapis.com/oauth2/v2/userinfo"
     JWKS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+    DISCOVERY_URL = "https://accounts.google.com/.well-known/openid-configuration"
+    # Google issues ID tokens with either form of its issuer
+    ISSUERS = ['https://accounts.google.com', 'accounts.google.com']
     
     def __init__(self):
         self.client_id = settings.GOOGLE_CLIENT_ID
@@ -44,24 +50,29 @@ class GoogleService:
         logger.info(f"Generated Google auth URL: {auth_url}")
         return auth_url
     
+    def _token_request(self, code):
+        """
+        Form data and headers for the authorization code exchange
+        """
+        data = {
+            'grant_type': 'authorization_code',
+            'code': code,
+            'redirect_uri': self.redirect_uri,
+            'client_id': self.client_id,
+            'client_secret': self.client_secret
+        }
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded'
+        }
+        return data, headers
+    
     def exchange_code_for_tokens(self, code):
         """
         Exchange authorization code for access token and ID token
         """
         try:
-            data = {
-                'grant_type': 'authorization_code',
-                'code': code,
-                'redirect_uri': self.redirect_uri,
-                'client_id': self.client_id,
-                'client_secret': self.client_secret
-            }
-            
-            headers = {
-                'Content-Type': 'application/x-www-form-urlencoded'
-            }
-            
-            response = requests.post(self.TOKEN_URL, data=data, headers=headers)
+            data, headers = self._token_request(code)
+            response = session.post(self.TOKEN_URL, data=data, headers=headers)
             response.raise_for_status()
             
             token_data = response.json()
@@ -107,9 +118,63 @@ class GoogleService:
                 'error': f'Failed to decode ID token: {str(e)}'
             }
     
-    def get_user_info(self, access_token):
+    # Async variants used by the ASGI OAuth callbacks; they never block the
+    # event loop on network I/O. ID token verification and the userinfo
+    # lookup only exist in this form, since only the callbacks use them.
+    
+    async def aexchange_code_for_tokens(self, code):
         """
-        Get user information from Google userinfo endpoint
+        Exchange authorization code for access token and ID token (async)
+        """
+        try:
+            data, headers = self._token_request(code)
+            async with get_async_session().post(self.TOKEN_URL, data=data, headers=headers) as response:
+                response.raise_for_status()
+                token_data = await response.json(content_type=None)
+            
+            logger.info(f"Successfully obtained tokens from Google")
+            return {
+                'success': True,
+                'access_token': token_data.get('access_token'),
+                'id_token': token_data.get('id_token'),
+                'expires_in': token_data.get('expires_in')
+            }
+            
+        except (aiohttp.ClientError, TimeoutError) as e:
+            logger.error(f"Google token exchange failed: {str(e)}")
+            return {
+                'success': False,
+                'error': f'Token exchange failed: {str(e)}'
+            }
+        except Exception as e:
+            logger.error(f"Unexpected error during token exchange: {str(e)}")
+            return {
+                'success': False,
+                'error': 'An unexpected error occurred'
+            }
+    
+    async def averify_id_token(self, id_token):
+        """
+        Verify the Google ID token against the cached JWKS (async)
+        """
+        try:
+            claims = await averify_id_token(id_token, self.DISCOVERY_URL, self.client_id, self.ISSUERS)
+            claims.setdefault('id', claims.get('sub'))
+            logger.info(f"Verified Google ID token locally")
+            return {
+                'success': True,
+                'data': claims
+            }
+        except Exception as e:
+            logger.warning(f"Google ID token verification failed: {str(e)}")
+            return {
+                'success': False,
+                'error': f'ID token verification failed: {str(e)}'
+            }
+    
+    async def aget_user_info(self, access_token):
+        """
+        Get user information from Google userinfo endpoint (async)
         """
         try:
             headers = {
@@ -117,17 +182,17 @@ class GoogleService:
                 'Content-Type': 'application/json'
             }
             
-            response = requests.get(self.USERINFO_URL, headers=headers)
-            response.raise_for_status()
+            async with get_async_session().get(self.USERINFO_URL, headers=headers) as response:
+                response.raise_for_status()
+                user_data = await response.json(content_type=None)
             
-            user_data = response.json()
             logger.info(f"Successfully retrieved user info from Google")
             return {
                 'success': True,
                 'data': user_data
             }
             
-        except requests.exceptions.RequestException as e:
+        except (aiohttp.ClientError, TimeoutError) as e:
             logger.error(f"Failed to get Google user info: {str(e)}")
             return {
                 'success': False,
@@ -140,6 +205,12 @@ class GoogleService:
                 'error': 'An unexpected error occurred'
             }
     
+    async def acreate_or_get_user(self, google_data):
+        """
+        Create or get existing user based on Google data (async)
+        """
+        return await sync_to_async(self.create_or_get_user)(google_data)
+    
     def create_or_get_user(self, google_data):
         """
         Create or get existing user based on Google data
@@ -0,0 +1,34 @@
+"""
+Accessors for the SMS and OAuth provider clients.
+
+The Twilio SDK, aiohttp, requests and PyJWT add a large share of the import
+time of authentication.views, yet only the OTP and social login endpoints
+use them. Views and the OTP queue go through these functions, so the
+provider modules are imported on the first call rather than by every
+worker and management command at startup. `python manage.py
+measure_import_time` shows what startup costs, and the test suite keeps
+these modules out of it.
+"""
+import sys
+
+
+def twilio_service():
+    from .services import TwilioService
+    return TwilioService()
+
+
+def google_service():
+    from .google_service import GoogleService
+    return GoogleService()
+
+
+def linkedin_service():
+    from .linkedin_service import LinkedInService
+    return LinkedInService()
+
+
+async def close_oauth_session():
+    """Close the shared aiohttp session, without importing aiohttp if nothing opened one"""
+    oauth_http = sys.modules.get(f'{__package__}.oauth_http')
+    if oauth_http is not None:
+        await oauth_http.close_async_session()
@@ -0,0 +1,21 @@
+"""
+Move SharXathon.status and Event.event_type on as their deadlines pass
+(see authentication/scheduler.py). Run it from cron, e.g. every minute:
+
+    python manage.py advance_states
+
+render.yaml does; it is the only runner in production.
+"""
+from django.core.management.base import BaseCommand
+
+from authentication.scheduler import advance_states
+
+
+class Command(BaseCommand):
+    help = 'Apply due SharXathon status and Event type transitions in bulk'
+
+    def handle(self, *args, **options):
+        changed = advance_states()
+        for model, transitions in changed.items():
+            for value, count in transitions.items():
+                self.stdout.write(f'{model}: {count} row(s) -> {value}')
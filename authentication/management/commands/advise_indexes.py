@@ -0,0 +1,432 @@
+"""
+Find endpoint queries that scan whole tables or sort without an index.
+
+Seeds every model in the authentication app with synthetic rows, requests
+each GET route in authentication/urls.py as a staff user, captures the SQL
+it runs and EXPLAINs every distinct SELECT. Full table scans and explicit
+sorts are reported per endpoint, with a suggested composite index built
+from the equality filters and ORDER BY columns of the offending query.
+Everything happens inside a transaction that is rolled back, so it is safe
+against a development database:
+
+    python manage.py advise_indexes --rows 500
+    DATABASE_URL=postgresql://postgres@localhost:5432/neosharx python manage.py advise_indexes
+
+On PostgreSQL the plans are taken with enable_seqscan and enable_sort off,
+so a Seq Scan or Sort that remains means no index can serve the query at
+all, rather than that the planner preferred a scan on a small table.
+Suggestions are a starting point: check them against real traffic before
+adding them to a migration. Findings that were looked at and kept are
+listed in ACCEPTED with the reason, and reported as such instead of being
+flagged again.
+"""
+import json
+import re
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connection, models, transaction
+from django.db.models import OuterRef, Subquery
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, NoReverseMatch, reverse
+from django.utils import timezone
+
+from authentication import content_registry, urls as auth_urls
+from authentication.models import Comment, CustomUser
+
+# Routes that call out to third parties, send SMS or change the session
+SKIP_ROUTE_WORDS = ('google', 'linkedin', 'otp', 'callback', 'logout', 'login', 'register',
+                    'password', 'username', 'stream', 'verify')
+
+
+# Query strings for routes that need them; seeded comment 3 is on tech_news 'seed-3'
+ROUTE_QUERIES = {
+    'comments_list_create': '?content_type=tech_news&content_slug=seed-3',
+    'comment_counts': '?items=tech_news:seed-3,startup_story:seed-0,sharxathon:seed-6',
+}
+
+
+# Plans reviewed and kept, by (route name, 'scan'|'sort', table): why no index is added.
+# They are reported as accepted instead of being flagged and suggested again.
+_REPLY_WINDOW = (
+    "the window behind the sliced replies prefetch (comment_feed.listing_page) orders at most "
+    "one page's replies, read from comment_replies_idx"
+)
+ACCEPTED = {
+    ('get_upcoming_sharxathons', 'sort', 'authentication_sharxathon'): (
+        "status is matched by the clock (scheduler.sharxathon_status_q), an OR no status-led index "
+        "can serve; sharxathon_published_idx covers the ORDER BY ... LIMIT and is what PostgreSQL "
+        "uses, SQLite prefers the status indexes and sorts the few matches"
+    ),
+    ('events_by_type', 'sort', 'authentication_event'): (
+        "event_type is matched by the date (scheduler.event_type_q), an OR no event_type-led index "
+        "can serve; event_published_idx gives the order"
+    ),
+    ('events_categories', 'sort', 'authentication_event'): (
+        "orders the per-category counts after aggregation, which no index can"
+    ),
+    ('user_comments', 'sort', 'authentication_comment'): _REPLY_WINDOW,
+    ('admin_flagged_comments', 'sort', 'authentication_comment'): _REPLY_WINDOW,
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the queries behind every GET endpoint and suggest missing indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200,
+                            help='Rows seeded per model (default: %(default)s)')
+        parser.add_argument('--route', action='append', default=[],
+                            help='Only check routes whose name contains this (repeatable)')
+        parser.add_argument('--show-sql', action='store_true',
+                            help='Print each flagged query')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Database: {connection.vendor}")
+        try:
+            with transaction.atomic():
+                staff = self._seed(options['rows'])
+                findings = self._check_routes(staff, options['route'])
+                raise Rollback
+        except Rollback:
+            pass
+        self._report(findings, options['show_sql'])
+
+    # ----- seeding -----
+
+    def _seed(self, rows):
+        staff = CustomUser.objects.create_user(
+            username='index-advisor', password='unused', is_staff=True, is_superuser=True
+        )
+        for model in self._seedable_models():
+            objects = [model(**self._fake_row(model, i, staff)) for i in range(rows)]
+            model.objects.bulk_create(objects, batch_size=500)
+
+        # Point comments at the seeded content they name
+        for kind in content_registry.kinds():
+            Comment.objects.filter(content_type=kind.key).update(
+                object_id=Subquery(kind.model.objects.filter(slug=OuterRef('content_slug')).values('pk')[:1])
+            )
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        return staff
+
+    def _seedable_models(self):
+        """App models in foreign-key dependency order, minus users and one-to-one tables"""
+        candidates = [
+            model for model in apps.get_app_config('authentication').get_models()
+            if model is not CustomUser
+            and not any(isinstance(f, models.OneToOneField) for f in model._meta.concrete_fields)
+        ]
+        ordered = []
+        while candidates:
+            for model in candidates:
+                deps = {
+                    f.related_model for f in model._meta.concrete_fields
+                    if f.is_relation and f.related_model not in (model, CustomUser)
+                }
+                if deps <= set(ordered) | {None}:
+                    ordered.append(model)
+                    candidates.remove(model)
+                    break
+            else:
+                ordered.extend(candidates)
+                break
+        return ordered
+
+    def _fake_row(self, model, i, user):
+        row = {}
+        for field in model._meta.concrete_fields:
+            if field.primary_key:
+                continue
+            row[field.attname] = self._fake_value(model, field, i, user)
+        return row
+
+    def _fake_value(self, model, field, i, user):
+        now = timezone.now()
+        if field.is_relation:
+            if field.related_model is CustomUser:
+                return user.pk
+            if field.related_model is model or field.null:
+                return None
+            related = list(field.related_model.objects.order_by('pk').values_list('pk', flat=True)[:i + 1])
+            return related[i % len(related)] if related else None
+        if field.choices:
+            flat = [value for value, _ in field.flatchoices]
+            return flat[i % len(flat)]
+        if field.name == 'slug' or isinstance(field, models.SlugField):
+            return f'seed-{i}'
+        if isinstance(field, models.BooleanField):
+            # Mostly published/approved, with some of everything
+            return i % 4 != 3 if field.default is True or field.name.startswith('is_published') else i % 5 == 0
+        if isinstance(field, models.DateTimeField):
+            return now + timedelta(hours=(i % 720) - 360 + self._offset(field.name))
+        if isinstance(field, models.DateField):
+            return (now + timedelta(days=(i % 60) - 30)).date()
+        if isinstance(field, models.TimeField):
+            return now.time()
+        if isinstance(field, models.DurationField):
+            return timedelta(minutes=i)
+        if isinstance(field, models.DecimalField):
+            return Decimal(i % 100)
+        if isinstance(field, (models.IntegerField, models.FloatField)):
+            return i
+        if isinstance(field, models.JSONField):
+            return field.get_default() if field.has_default() else []
+        if isinstance(field, models.EmailField):
+            return f'seed{i}@example.com'
+        if isinstance(field, models.URLField):
+            return f'https://example.com/{i}'
+        if isinstance(field, models.UUIDField):
+            return None if field.null else field.get_default()
+        if isinstance(field, (models.CharField, models.TextField)):
+            if field.null and field.unique:
+                return None
+            value = f'seed {i}' if field.unique or not field.has_default() else field.get_default()
+            return value[:field.max_length] if field.max_length else value
+        if field.has_default():
+            return field.get_default()
+        return None
+
+    @staticmethod
+    def _offset(name):
+        """Keep start < end < ... for paired timestamps"""
+        return {'registration_deadline': -48, 'start_datetime': 0, 'end_datetime': 48}.get(name, 0)
+
+    # ----- requests -----
+
+    def _route_kwargs(self, pattern):
+        kwargs = {}
+        for name, converter in pattern.pattern.converters.items():
+            if converter.regex == '[0-9]+':
+                kwargs[name] = self._pk_for(name)
+            else:
+                kwargs[name] = self._choice_for(name) or 'seed-0'
+        return kwargs
+
+    def _pk_for(self, param):
+        prefix = param.rsplit('_id', 1)[0].replace('_', '')
+        for model in apps.get_app_config('authentication').get_models():
+            if model._meta.model_name.startswith(prefix):
+                pk = model.objects.order_by('pk').values_list('pk', flat=True).first()
+                if pk is not None:
+                    return pk
+        return 1
+
+    def _choice_for(self, param):
+        for model in apps.get_app_config('authentication').get_models():
+            try:
+                field = model._meta.get_field(param)
+            except Exception:
+                continue
+            if getattr(field, 'choices', None):
+                return field.flatchoices[0][0]
+        return None
+
+    def _check_routes(self, staff, only):
+        client = Client()
+        client.force_login(staff)
+        findings = []
+        explained = {}
+
+        with override_settings(ALLOWED_HOSTS=['*'], SECURE_SSL_REDIRECT=False):
+            for pattern in auth_urls.urlpatterns:
+                if not isinstance(pattern, URLPattern) or not pattern.name:
+                    continue
+                route = str(pattern.pattern)
+                if any(word in route.lower() or word in pattern.name for word in SKIP_ROUTE_WORDS):
+                    continue
+                if only and not any(word in pattern.name for word in only):
+                    continue
+                try:
+                    path = reverse(f'authentication:{pattern.name}', kwargs=self._route_kwargs(pattern))
+                except NoReverseMatch:
+                    continue
+
+                path += ROUTE_QUERIES.get(pattern.name, '')
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(path)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+
+                issues = []
+                for query in queries.captured_queries:
+                    sql = query['sql']
+                    if not sql.lstrip().upper().startswith('SELECT'):
+                        continue
+                    if sql not in explained:
+                        explained[sql] = self._explain(sql)
+                    issues.extend((kind, table, sql) for kind, table in explained[sql])
+                findings.append({
+                    'name': pattern.name,
+                    'path': path,
+                    'status': response.status_code,
+                    'queries': len(queries.captured_queries),
+                    'issues': issues,
+                })
+        return findings
+
+    # ----- plans -----
+
+    def _explain(self, sql):
+        """[(kind, table)] where kind is 'scan' or 'sort'"""
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                if connection.vendor == 'postgresql':
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+                    cursor.execute('SET LOCAL enable_sort = off')
+                    cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                    plan = cursor.fetchone()[0]
+                    plan = json.loads(plan) if isinstance(plan, str) else plan
+                    return self._pg_issues(plan[0]['Plan'], sql)
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                return self._sqlite_issues([row[-1] for row in cursor.fetchall()], sql)
+        except Exception as e:
+            self.stderr.write(f"Could not EXPLAIN: {e}\n  {sql[:200]}")
+            return []
+
+    def _sqlite_issues(self, details, sql):
+        issues = []
+        for detail in details:
+            match = re.match(r'SCAN (\w+)(?: AS \w+)?$', detail)
+            # Subqueries (the window behind a sliced prefetch) scan their own small result
+            if match and match.group(1) in connection.introspection.table_names():
+                issues.append(('scan', match.group(1)))
+            elif 'TEMP B-TREE FOR ORDER BY' in detail or 'TEMP B-TREE FOR RIGHT PART OF ORDER BY' in detail:
+                issues.append(('sort', _from_table(sql)))
+        return issues
+
+    def _pg_issues(self, node, sql):
+        issues = []
+        if node['Node Type'] == 'Seq Scan':
+            issues.append(('scan', node['Relation Name']))
+        elif node['Node Type'] in ('Sort', 'Incremental Sort'):
+            issues.append(('sort', _from_table(sql)))
+        for child in node.get('Plans', []):
+            issues.extend(self._pg_issues(child, sql))
+        return issues
+
+    # ----- suggestions -----
+
+    def _suggest(self, table, sql):
+        """Index fields for `table` from the query's equality filters and ORDER BY, or None"""
+        model = _model_for_table(table)
+        if model is None:
+            return None
+        columns = {f.column: f.name for f in model._meta.concrete_fields}
+        quoted = rf'"{table}"\."(\w+)"'
+
+        where = sql.split(' WHERE ', 1)[1] if ' WHERE ' in sql else ''
+        where = re.split(r' ORDER BY | LIMIT | GROUP BY ', where)[0]
+        # Booleans compile to a bare column: WHERE "t"."is_published" AND ...
+        equality = _unique(re.findall(quoted + r'(?: = | IN \(| IS |(?=\)| AND | OR |$))', where))
+        ordering = []
+        if ' ORDER BY ' in sql:
+            clause = re.split(r' LIMIT | OFFSET ', sql.rsplit(' ORDER BY ', 1)[1])[0]
+            for column, direction in re.findall(quoted + r' (ASC|DESC)', clause):
+                ordering.append(('-' if direction == 'DESC' else '') + column)
+
+        filtered = [columns[c] for c in equality if c in columns]
+        fields = filtered + [
+            ('-' if o.startswith('-') else '') + columns[o.lstrip('-')]
+            for o in ordering if o.lstrip('-') in columns and columns[o.lstrip('-')] not in filtered
+        ]
+        fields = _unique(fields)
+        if not fields or _covered(model, fields, len(filtered)):
+            return None
+        return model, tuple(fields)
+
+    def _report(self, findings, show_sql):
+        suggestions = defaultdict(set)
+        for finding in findings:
+            # An N+1 loop repeats the same problem once per row; report it once
+            flagged = defaultdict(list)
+            accepted = {}
+            for kind, table, sql in finding['issues']:
+                reason = ACCEPTED.get((finding['name'], kind, table))
+                if reason:
+                    accepted[(kind, table)] = reason
+                elif table:
+                    flagged[(kind, table)].append(sql)
+            marker = self.style.WARNING('!') if flagged else ' '
+            self.stdout.write(f"{marker} GET {finding['path']} [{finding['status']}] {finding['queries']} queries")
+            for (kind, table), reason in accepted.items():
+                self.stdout.write(f"    {'full scan' if kind == 'scan' else 'sort'} on {table}, accepted: {reason}")
+            for (kind, table), statements in flagged.items():
+                repeats = f" (x{len(statements)})" if len(statements) > 1 else ''
+                self.stdout.write(f"    {'full scan' if kind == 'scan' else 'sort'} on {table}{repeats}")
+                for sql in _unique(statements):
+                    if show_sql:
+                        self.stdout.write(f"      {sql[:300]}")
+                    suggestion = self._suggest(table, sql)
+                    if suggestion:
+                        suggestions[suggestion].add(finding['path'])
+
+        self.stdout.write('')
+        if not suggestions:
+            self.stdout.write(self.style.SUCCESS('No index suggestions'))
+            return
+        self.stdout.write(self.style.SUCCESS('Suggested indexes'))
+        for (model, fields), paths in sorted(suggestions.items(), key=lambda item: (item[0][0].__name__, item[0][1])):
+            self.stdout.write(f"  {model.__name__}: models.Index(fields={list(fields)!r})  # {len(paths)} endpoint(s)")
+
+
+def _unique(items):
+    return list(dict.fromkeys(items))
+
+
+def _from_table(sql):
+    match = re.search(r'\bFROM "(\w+)"', sql)
+    return match.group(1) if match else None
+
+
+def _model_for_table(table):
+    for model in apps.get_models():
+        if model._meta.db_table == table:
+            return model
+    return None
+
+
+def _covered(model, fields, leading=0):
+    """
+    True if an existing index (or unique/foreign key) starts with these
+    columns. The first `leading` are equality filters, so their order
+    among themselves doesn't matter, and a partial index already applies
+    the ones its condition fixes (is_published for the *_published_idx).
+    """
+    names = [f.lstrip('-') for f in fields]
+    existing = [
+        ([f.lstrip('-') for f in index.fields], _condition_fields(index.condition))
+        for index in model._meta.indexes
+    ]
+    existing += [(list(group), set()) for group in model._meta.unique_together]
+    existing += [([f.name], set()) for f in model._meta.concrete_fields if f.unique or f.db_index or f.is_relation]
+
+    for index, implied in existing:
+        equality = set(names[:leading]) - implied
+        if implied - set(names[:leading]):
+            continue  # partial index on rows the query doesn't restrict itself to
+        if set(index[:len(equality)]) == equality and index[len(equality):len(equality) + len(names) - leading] == names[leading:]:
+            return True
+    return False
+
+
+def _condition_fields(condition):
+    """Fields an index condition pins with plain equalities (all ANDed), else empty"""
+    if condition is None or condition.connector != 'AND' or condition.negated:
+        return set()
+    fields = set()
+    for child in condition.children:
+        if not isinstance(child, tuple) or child[0].endswith(('__in', '__gt', '__lt', '__gte', '__lte', '__isnull')):
+            return set()
+        fields.add(child[0].removesuffix('__exact'))
+    return fields
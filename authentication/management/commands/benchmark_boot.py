@@ -0,0 +1,121 @@
+"""
+Compare gunicorn boots with and without preload + warmup (gunicorn.conf.py).
+
+For each mode the command starts gunicorn on a free port, then polls an
+endpoint until a response comes back under --fast-ms. It records the
+time to the first response, the time to the first fast one, and each
+worker's RSS and PSS once booted, then stops the server:
+
+    python manage.py benchmark_boot
+    python manage.py benchmark_boot --path /api/auth/tech-news/categories/ --workers 3
+
+PSS splits shared pages among the processes sharing them, so the PSS sum
+is what the workers really cost. Reading it needs Linux /proc.
+"""
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from authentication.warmup import memory_usage
+
+MODES = [
+    ('no preload', {'GUNICORN_PRELOAD': '0', 'GUNICORN_WARMUP': '0'}),
+    ('preload', {'GUNICORN_PRELOAD': '1', 'GUNICORN_WARMUP': '0'}),
+    ('preload + warmup', {'GUNICORN_PRELOAD': '1', 'GUNICORN_WARMUP': '1'}),
+]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+class Command(BaseCommand):
+    help = 'Measure time-to-first-fast-request and worker memory for each gunicorn boot mode'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/auth/tech-news/featured/',
+                            help='Endpoint to poll (default: %(default)s)')
+        parser.add_argument('--workers', type=int, default=3, help='Workers (default: %(default)s)')
+        parser.add_argument('--fast-ms', type=float, default=20,
+                            help='A response under this counts as fast (default: %(default)s)')
+        parser.add_argument('--timeout', type=float, default=60,
+                            help='Give up on a mode after this many seconds (default: %(default)s)')
+
+    def handle(self, *args, **options):
+        base_dir = settings.BASE_DIR
+        self.stdout.write(f"{'mode':<18} {'first':>9} {'first fast':>11} {'rss/worker':>11} {'pss total':>10}")
+        for label, env in MODES:
+            result = self._boot(base_dir, env, options)
+            if result is None:
+                self.stdout.write(f"{label:<18} did not answer within {options['timeout']:.0f}s")
+                continue
+            first, fast, workers = result
+            rss = sum(usage.get('rss', 0) for usage in workers) / max(len(workers), 1)
+            pss = sum(usage.get('pss', 0) for usage in workers)
+            fast_text = f'{fast:>8.0f} ms' if fast is not None else f"{'never':>11}"
+            self.stdout.write(
+                f"{label:<18} {first:>6.0f} ms {fast_text} {rss / 1024:>7.1f} MiB {pss / 1024:>6.1f} MiB"
+            )
+
+    def _boot(self, base_dir, env, options):
+        port = _free_port()
+        environ = {
+            **os.environ, **env,
+            'PORT': str(port),
+            'WEB_CONCURRENCY': str(options['workers']),
+            'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'backend.settings'),
+        }
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'backend.asgi:application'],
+            cwd=base_dir, env=environ, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        url = f'http://127.0.0.1:{port}{options["path"]}'
+        started = time.perf_counter()
+        first = fast = None
+        try:
+            while time.perf_counter() - started < options['timeout']:
+                sent = time.perf_counter()
+                try:
+                    urllib.request.urlopen(urllib.request.Request(url, headers={'Host': 'localhost'}), timeout=5).read()
+                except (urllib.error.URLError, ConnectionError, OSError):
+                    time.sleep(0.02)
+                    continue
+                now = time.perf_counter()
+                if first is None:
+                    first = (now - started) * 1000
+                if (now - sent) * 1000 < options['fast_ms']:
+                    fast = (now - started) * 1000
+                    break
+            if first is None:
+                return None
+            # Let the remaining workers finish booting before reading their memory
+            deadline = time.perf_counter() + 10
+            while len(_children(server.pid)) < options['workers'] and time.perf_counter() < deadline:
+                time.sleep(0.1)
+            time.sleep(0.5)
+            workers = [memory_usage(pid) for pid in _children(server.pid)]
+            return first, fast, workers
+        finally:
+            server.send_signal(signal.SIGTERM)
+            try:
+                server.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                server.kill()
@@ -0,0 +1,83 @@
+"""
+Compare restoring the homepage payloads from the cache snapshot with
+rebuilding them (see authentication/cache_snapshot.py).
+
+Each round starts from an empty cache and times:
+
+- rebuild: payload_cache.warm() building every payload from the database;
+- restore: cache_snapshot.load(), its migration and watermark queries
+  shown separately, then the warm() that builds whatever it didn't cover.
+
+    python manage.py benchmark_cache_snapshot
+    python manage.py benchmark_cache_snapshot --rounds 20
+
+Run it against a copy of production data: both sides scale with the
+tables, the rebuild with the payload queries and the restore with the
+watermark aggregates.
+"""
+import os
+import statistics
+import tempfile
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from authentication import cache_snapshot, payload_cache
+
+
+def _ms(since):
+    return (time.perf_counter() - since) * 1000
+
+
+def _forget():
+    """Empty this process's payload cache, as in a fresh worker"""
+    cache.clear()
+    payload_cache._stored.clear()
+
+
+class Command(BaseCommand):
+    help = 'Time restoring cached payloads from the snapshot against rebuilding them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=10, help='Rounds per side (default: %(default)s)')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'snapshot.bin')
+            _forget()
+            payload_cache.warm()
+            saved = cache_snapshot.save(path)
+
+            rebuild, restore, migrations, marks = [], [], [], []
+            queries = {}
+            for _ in range(options['rounds']):
+                _forget()
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    payload_cache.warm()
+                    rebuild.append(_ms(started))
+                queries['rebuild'] = len(captured)
+
+                started = time.perf_counter()
+                cache_snapshot.migration_state()
+                migrations.append(_ms(started))
+                started = time.perf_counter()
+                cache_snapshot.watermarks()
+                marks.append(_ms(started))
+
+                _forget()
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    cache_snapshot.load(path)
+                    payload_cache.warm()
+                    restore.append(_ms(started))
+                queries['restore'] = len(captured)
+
+        self.stdout.write(f'{saved} payloads in the snapshot, median of {options["rounds"]} rounds:')
+        self.stdout.write(f'  rebuild  {statistics.median(rebuild):8.2f} ms  {queries["rebuild"]} queries')
+        self.stdout.write(f'  restore  {statistics.median(restore):8.2f} ms  {queries["restore"]} queries')
+        self.stdout.write(f'    of which migration check {statistics.median(migrations):.2f} ms, '
+                          f'watermarks {statistics.median(marks):.2f} ms')
@@ -0,0 +1,90 @@
+"""
+Benchmark per-request latency with and without persistent database connections.
+
+Requests go through the real WSGI handler, so Django opens and closes
+connections exactly as it does under gunicorn. Run it against a local
+Postgres by setting DATABASE_URL, e.g.:
+
+    DATABASE_URL=postgresql://postgres@localhost:5432/neosharx \
+        python manage.py benchmark_db_connections --requests 500
+"""
+import statistics
+import time
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Measure per-request latency with per-request vs persistent DB connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/auth/stories/',
+                            help='Endpoint to request (default: %(default)s)')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests per mode (default: %(default)s)')
+        parser.add_argument('--warmup', type=int, default=10,
+                            help='Untimed requests before each mode (default: %(default)s)')
+
+    def handle(self, *args, **options):
+        connection = connections['default']
+        configured_max_age = connection.settings_dict.get('CONN_MAX_AGE', 0)
+        pooled = bool(connection.settings_dict.get('OPTIONS', {}).get('pool'))
+
+        self.stdout.write(f"Database: {connection.vendor} ({connection.settings_dict.get('NAME')})")
+        self.stdout.write(f"Endpoint: {options['path']}")
+
+        handler = WSGIHandler()
+        if pooled:
+            modes = [('pooled (configured)', None)]
+        else:
+            modes = [
+                ('per-request connections (CONN_MAX_AGE=0)', 0),
+                (f'persistent connections (CONN_MAX_AGE={configured_max_age or 60})', configured_max_age or 60),
+            ]
+
+        for label, max_age in modes:
+            connection.close()
+            if max_age is not None:
+                connection.settings_dict['CONN_MAX_AGE'] = max_age
+
+            for _ in range(options['warmup']):
+                self._request(handler, options['path'])
+            timings = [self._request(handler, options['path']) for _ in range(options['requests'])]
+            self._report(label, timings)
+
+        connection.settings_dict['CONN_MAX_AGE'] = configured_max_age
+        connection.close()
+
+    def _request(self, handler, path):
+        """Issue one request through the WSGI stack and return its latency in ms"""
+        environ = {
+            'PATH_INFO': path,
+            'REQUEST_METHOD': 'GET',
+            'HTTP_HOST': settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost',
+            'wsgi.url_scheme': 'https',
+            'HTTPS': 'on',
+        }
+        setup_testing_defaults(environ)
+
+        start = time.perf_counter()
+        response = handler(environ, lambda status, headers, exc_info=None: None)
+        b''.join(response)
+        # close() fires request_finished, which is where Django drops
+        # connections older than CONN_MAX_AGE.
+        response.close()
+        return (time.perf_counter() - start) * 1000
+
+    def _report(self, label, timings):
+        timings = sorted(timings)
+        p95 = timings[int(len(timings) * 0.95) - 1] if timings else 0
+        self.stdout.write(self.style.SUCCESS(label))
+        self.stdout.write(
+            f"  mean {statistics.mean(timings):.2f} ms | "
+            f"p50 {statistics.median(timings):.2f} ms | "
+            f"p95 {p95:.2f} ms | "
+            f"n={len(timings)}"
+        )
@@ -0,0 +1,283 @@
+"""
+Benchmark the published-only partial indexes against full indexes for the same queries.
+
+Seeds the content tables with synthetic rows inside a transaction that is
+rolled back, times the queries the public list endpoints run (first page of
+20 rows), then swaps the partial indexes for full (is_published, ...)
+indexes covering the same queries and times them again:
+
+    python manage.py benchmark_published_indexes --rows 500000 --model technews --model event
+    DATABASE_URL=postgresql://postgres@localhost:5432/neosharx \\
+        python manage.py benchmark_published_indexes --rows 500000
+
+Index sizes are reported per model where the database can tell
+(PostgreSQL, or SQLite builds with the dbstat table).
+
+On SQLite with 500,000 rows in each of the 9 tables, 30% of them drafts
+(first page, median of 5 runs; size is every index in the set):
+
+    model          slowest query        full index   partial   index size
+    StartupStory   list                 118 ms       1.3 ms    17.3 -> 15.1 MiB
+    NeoStory       list                  90 ms       1.2 ms    17.3 -> 15.1 MiB
+    NeoProject     featured             5.2 ms       1.7 ms     0.0 -> 15.1 MiB
+    SharXathon     list                 150 ms       2.3 ms    17.3 -> 15.1 MiB
+    TechNews       trending             188 ms       1.1 ms    17.3 -> 39.0 MiB
+    TalkEpisode    list                 1.6 ms       0.7 ms     0.0 ->  4.0 MiB
+    RoboticsNews   popular              782 ms       1.4 ms    17.3 -> 29.5 MiB
+    Event          by type              124 ms       2.6 ms    19.1 -> 19.9 MiB
+    YouTubeVideo   by type              136 ms       0.9 ms    26.3 -> 32.0 MiB
+    total                                                     131.7 -> 185.0 MiB
+
+With the full indexes SQLite scanned and sorted the table for most of
+these; NeoProject, TalkEpisode and the plain Event and YouTubeVideo lists
+already walked an index and gain little. The partial set takes 40% more
+disk, nearly all of it the per-flag indexes on TechNews and RoboticsNews;
+on the other models the single list index is 12% smaller than a full one.
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+
+from authentication.models import (
+    CustomUser, Event, NeoProject, NeoStory, RoboticsNews, SharXathon, StartupStory, TalkEpisode,
+    TechNews, YouTubeVideo,
+)
+
+from .advise_indexes import Command as IndexAdvisor, Rollback
+
+# The queries behind the public list endpoints: (label, filters, ordering)
+QUERIES = {
+    StartupStory: [
+        ('list', {}, ('-created_at',)),
+        ('featured', {'is_featured': True}, ('-created_at',)),
+    ],
+    NeoStory: [
+        ('list', {}, ('-created_at',)),
+        ('featured', {'is_featured': True}, ('-created_at',)),
+    ],
+    NeoProject: [
+        ('list', {}, ('-created_at',)),
+        ('featured', {'is_featured': True}, ('-created_at',)),
+    ],
+    SharXathon: [
+        ('list', {}, ('-start_datetime',)),
+        ('featured', {'is_featured': True}, ('-start_datetime',)),
+    ],
+    TechNews: [
+        ('list', {}, ('-published_at', '-created_at')),
+        ('featured', {'is_featured': True}, ('-published_at', '-created_at')),
+        ('breaking', {'is_breaking': True}, ('-published_at', '-created_at')),
+        ('trending', {'is_trending': True}, ('-published_at', '-created_at')),
+    ],
+    TalkEpisode: [
+        ('list', {}, ('-episode_number',)),
+    ],
+    RoboticsNews: [
+        ('list', {}, ('-created_at',)),
+        ('featured', {'is_featured': True}, ('-created_at',)),
+        ('popular', {}, ('-views_count', '-likes_count', '-created_at')),
+    ],
+    Event: [
+        ('list', {}, ('display_order', '-event_date')),
+        ('by type', {'event_type': 'upcoming'}, ('display_order', '-event_date')),
+        ('featured', {'is_featured': True}, ('display_order', '-event_date')),
+    ],
+    YouTubeVideo: [
+        ('list', {}, ('display_order', '-created_at')),
+        ('by type', {'video_type': 'video'}, ('display_order', '-created_at')),
+        ('featured', {'is_featured': True}, ('display_order', '-created_at')),
+    ],
+}
+
+# Full indexes for the same queries: TechNews' and the by-type ones predate 0038, which dropped
+# them, the rest are what the index advisor suggests without partial indexes
+FULL_INDEXES = {
+    StartupStory: [['is_published', '-created_at']],
+    NeoStory: [['is_published', '-created_at']],
+    SharXathon: [['is_published', '-start_datetime']],
+    TechNews: [['is_published', '-published_at']],
+    RoboticsNews: [['is_published', '-created_at']],
+    Event: [['event_type', 'is_published'], ['is_published', 'display_order', '-event_date']],
+    YouTubeVideo: [['video_type', 'is_published'], ['is_published', 'display_order', '-created_at']],
+}
+
+PAGE_SIZE = 20
+
+
+def _partial_indexes(model):
+    return [
+        index for index in model._meta.indexes
+        if index.condition is not None and ('is_published', True) in index.condition.children
+    ]
+
+
+def _full_indexes(model):
+    return [
+        models.Index(fields=fields, name=f'bench_{model._meta.model_name}_{i}'[:30])
+        for i, fields in enumerate(FULL_INDEXES.get(model, []))
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Compare published-only partial indexes with full indexes for the same queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500000,
+                            help='Rows seeded per model (default: %(default)s)')
+        parser.add_argument('--drafts', type=float, default=0.3,
+                            help='Share of unpublished rows (default: %(default)s)')
+        parser.add_argument('--model', action='append', default=[],
+                            help='Only benchmark this model, by lowercase name (repeatable)')
+        parser.add_argument('--repeat', type=int, default=30,
+                            help='Timed runs per query (default: %(default)s)')
+
+    def handle(self, *args, **options):
+        selected = [
+            model for model in QUERIES
+            if not options['model'] or model._meta.model_name in options['model']
+        ]
+        if not selected:
+            raise CommandError(f"Unknown model; choose from {', '.join(m._meta.model_name for m in QUERIES)}")
+
+        self.stdout.write(f"Database: {connection.vendor}, {options['rows']} rows per model, "
+                          f"{options['drafts']:.0%} drafts")
+        to_full = self._swap_sql(selected, drop=_partial_indexes, create=_full_indexes)
+        to_partial = self._swap_sql(selected, drop=_full_indexes, create=_partial_indexes)
+        try:
+            with transaction.atomic():
+                for model in selected:
+                    self._seed(model, options['rows'], options['drafts'])
+                self._analyze()
+
+                self._execute(to_full)
+                before = self._measure(selected, options['repeat'])
+                before_sizes = self._sizes(selected, _full_indexes)
+
+                self._execute(to_partial)
+                after = self._measure(selected, options['repeat'])
+                after_sizes = self._sizes(selected, _partial_indexes)
+                raise Rollback
+        except Rollback:
+            pass
+
+        self._report(before, after)
+        if before_sizes is not None and after_sizes is not None:
+            self._report_sizes(before_sizes, after_sizes)
+
+    def _seed(self, model, rows, drafts):
+        start = time.perf_counter()
+        advisor = IndexAdvisor()
+        user = CustomUser.objects.create_user(username=f'bench-{model._meta.model_name}', password='unused')
+        batch = []
+        for i in range(rows):
+            row = advisor._fake_row(model, i, user)
+            # Spread the drafts evenly through the table
+            row['is_published'] = int((i + 1) * drafts) == int(i * drafts)
+            batch.append(model(**row))
+            if len(batch) == 5000:
+                model.objects.bulk_create(batch)
+                batch = []
+        model.objects.bulk_create(batch)
+        self.stdout.write(f"Seeded {model.__name__} in {time.perf_counter() - start:.1f}s")
+
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def _swap_sql(self, selected, drop, create):
+        """DDL for swapping index sets, collected up front: SQLite won't open a schema editor mid-transaction"""
+        with connection.schema_editor(collect_sql=True) as editor:
+            for model in selected:
+                for index in drop(model):
+                    editor.remove_index(model, index)
+                for index in create(model):
+                    editor.add_index(model, index)
+        return editor.collected_sql
+
+    def _execute(self, statements):
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+        self._analyze()
+
+    def _measure(self, selected, repeat):
+        results = {}
+        for model in selected:
+            for label, filters, ordering in QUERIES[model]:
+                queryset = model.objects.filter(is_published=True, **filters).order_by(*ordering)[:PAGE_SIZE]
+                list(queryset.all())
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    list(queryset.all())  # a fresh queryset each time, not the cached rows
+                    timings.append((time.perf_counter() - start) * 1000)
+                results[(model.__name__, label)] = (statistics.median(timings), self._plan(queryset))
+        return results
+
+    def _plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'EXPLAIN {sql}', params)
+                lines = [row[0] for row in cursor.fetchall()]
+                used = [line.split(' using ')[1].split()[0] for line in lines if ' using ' in line]
+                return used[0] if used else 'seq scan'
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            details = ' / '.join(row[-1] for row in cursor.fetchall())
+            if 'USING INDEX' in details:
+                plan = details.split('USING INDEX ')[1].split()[0]
+            else:
+                plan = 'scan'
+            return plan + (' + sort' if 'TEMP B-TREE' in details else '')
+
+    def _sizes(self, selected, indexes):
+        """{model name: bytes on disk of its indexes in the set}, or None if the database can't tell"""
+        sizes = {}
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                for model in selected:
+                    names = [index.name for index in indexes(model)]
+                    if not names:
+                        sizes[model.__name__] = 0
+                        continue
+                    placeholders = ', '.join(['%s'] * len(names))
+                    if connection.vendor == 'postgresql':
+                        cursor.execute(
+                            f'SELECT sum(pg_relation_size(c.oid)) FROM pg_class c WHERE c.relname IN ({placeholders})',
+                            names,
+                        )
+                    else:
+                        cursor.execute(f'SELECT sum(pgsize) FROM dbstat WHERE name IN ({placeholders})', names)
+                    sizes[model.__name__] = cursor.fetchone()[0] or 0
+        except Exception:
+            return None
+        return sizes
+
+    def _report(self, before, after):
+        self.stdout.write('')
+        self.stdout.write(f"{'query':<24} {'full index':>12} {'partial':>12} {'speedup':>8}  plan (full -> partial)")
+        for key, (before_ms, before_plan) in before.items():
+            after_ms, after_plan = after[key]
+            speedup = before_ms / after_ms if after_ms else float('inf')
+            self.stdout.write(
+                f"{' '.join(key):<24} {before_ms:>9.3f} ms {after_ms:>9.3f} ms {speedup:>7.1f}x  "
+                f"{before_plan} -> {after_plan}"
+            )
+
+    def _report_sizes(self, before, after):
+        self.stdout.write('')
+        self.stdout.write(f"{'index size':<24} {'full':>12} {'partial':>12} {'change':>8}")
+        for name in before:
+            self.stdout.write(f"{name:<24} {_mib(before[name])} {_mib(after[name])} {_change(before[name], after[name])}")
+        total_before, total_after = sum(before.values()), sum(after.values())
+        self.stdout.write(f"{'total':<24} {_mib(total_before)} {_mib(total_after)} {_change(total_before, total_after)}")
+
+
+def _mib(size):
+    return f"{size / 1048576:>8.1f} MiB"
+
+
+def _change(before, after):
+    return f"{(after - before) / before:>+8.0%}" if before else f"{'new':>8}"
@@ -0,0 +1,84 @@
+"""
+Benchmark comment screening against large term lists.
+
+Compares the Aho-Corasick matcher in authentication/screening.py with a
+regex search per term and with one big alternation regex, on synthetic
+terms and comments, so no database is needed:
+
+    python manage.py benchmark_screening --terms 10000 --comments 200
+"""
+import random
+import re
+import statistics
+import string
+import time
+
+from django.core.management.base import BaseCommand
+
+from authentication.screening import KeywordMatcher, normalize
+
+
+class Command(BaseCommand):
+    help = 'Measure comment screening time for large term lists'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--terms', type=int, default=10000,
+                            help='Terms in the list (default: %(default)s)')
+        parser.add_argument('--comments', type=int, default=200,
+                            help='Comments screened per matcher (default: %(default)s)')
+        parser.add_argument('--words', type=int, default=80,
+                            help='Words per comment (default: %(default)s)')
+        parser.add_argument('--naive-comments', type=int, default=5,
+                            help='Comments for the per-term regex loop, which is slow (default: %(default)s)')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        terms = sorted({self._word(rng) for _ in range(options['terms'])})
+        vocabulary = [self._word(rng) for _ in range(5000)]
+        comments = [
+            ' '.join(
+                rng.choice(terms) if rng.random() < 0.01 else rng.choice(vocabulary)
+                for _ in range(options['words'])
+            )
+            for _ in range(options['comments'])
+        ]
+        self.stdout.write(
+            f"{len(terms)} terms, {len(comments)} comments of ~{statistics.mean(map(len, comments)):.0f} chars"
+        )
+
+        start = time.perf_counter()
+        matcher = KeywordMatcher(terms)
+        self.stdout.write(f"Automaton build: {(time.perf_counter() - start) * 1000:.1f} ms")
+        self._report('Aho-Corasick', comments, lambda text: list(matcher.find(normalize(text))))
+
+        start = time.perf_counter()
+        alternation = re.compile(r'\b(?:' + '|'.join(map(re.escape, terms)) + r')\b')
+        self.stdout.write(f"Alternation regex compile: {(time.perf_counter() - start) * 1000:.1f} ms")
+        self._report('Alternation regex', comments, lambda text: alternation.findall(normalize(text)))
+
+        patterns = [re.compile(r'\b' + re.escape(term) + r'\b') for term in terms]
+        self._report(
+            'Regex per term', comments[:options['naive_comments']],
+            lambda text: [p for p in patterns if p.search(normalize(text))],
+        )
+
+    @staticmethod
+    def _word(rng):
+        return ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+
+    def _report(self, label, comments, screen):
+        timings = []
+        for text in comments:
+            start = time.perf_counter()
+            screen(text)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) > 1 else timings[0]
+        self.stdout.write(self.style.SUCCESS(label))
+        self.stdout.write(
+            f"  mean {statistics.mean(timings):.3f} ms | "
+            f"p50 {statistics.median(timings):.3f} ms | "
+            f"p95 {p95:.3f} ms | "
+            f"n={len(timings)}"
+        )
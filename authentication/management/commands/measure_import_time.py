@@ -0,0 +1,97 @@
+"""
+Measure what importing the app costs at startup.
+
+Runs a fresh interpreter with `python -X importtime`, sets Django up and
+imports the URLconf (and so every view module), the same work a worker or
+management command does before it handles anything. Then it parses the
+report:
+
+    python manage.py measure_import_time
+    python manage.py measure_import_time --top 30 --budget-ms 1000
+
+With --budget-ms the command fails when startup takes longer, or when it
+imports one of LAZY_MODULES, the provider libraries that
+authentication.lazy_services defers to first use. The test suite runs the
+same check against STARTUP_BUDGET_MS.
+"""
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Loaded on first use through authentication.lazy_services, never at startup
+LAZY_MODULES = ('twilio', 'aiohttp', 'jwt')
+
+# About 2.5x a cold start here (roughly 370 ms), leaving room for slower machines
+STARTUP_BUDGET_MS = 1000
+
+STARTUP_SCRIPT = (
+    "import importlib, django; django.setup(); "
+    "from django.conf import settings; importlib.import_module(settings.ROOT_URLCONF)"
+)
+
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(report):
+    """[(module, self_us, cumulative_us, depth)] from `-X importtime` output, in import order"""
+    entries = []
+    for line in report.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return entries
+
+
+def measure_startup(settings_module=None):
+    """Parsed `-X importtime` entries for a cold start of the project"""
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module or os.environ['DJANGO_SETTINGS_MODULE']}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(f"Startup failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def total_ms(entries):
+    return sum(cumulative for _, _, cumulative, depth in entries if depth == 0) / 1000
+
+
+def eager_lazy_modules(entries):
+    """Top-level packages from LAZY_MODULES that startup imported anyway"""
+    return sorted({module.split('.')[0] for module, _, _, _ in entries} & set(LAZY_MODULES))
+
+
+class Command(BaseCommand):
+    help = 'Report the import time of a cold project start (python -X importtime)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15,
+                            help='Modules to list by cumulative time (default: %(default)s)')
+        parser.add_argument('--budget-ms', type=float,
+                            help='Fail if startup imports take longer than this')
+
+    def handle(self, *args, **options):
+        entries = measure_startup()
+        total = total_ms(entries)
+        self.stdout.write(f"Startup imports: {len(entries)} modules, {total:.0f} ms")
+
+        # Children are listed before their parent, so sort rather than trust the order
+        self.stdout.write(f"\n{'cumulative':>11} {'self':>9}  module")
+        for module, self_us, cumulative_us, depth in sorted(entries, key=lambda e: -e[2])[:options['top']]:
+            self.stdout.write(f"{cumulative_us / 1000:>8.1f} ms {self_us / 1000:>6.1f} ms  {module}")
+
+        eager = eager_lazy_modules(entries)
+        if eager:
+            self.stdout.write(f"\nImported at startup but meant to load lazily: {', '.join(eager)}")
+
+        budget = options['budget_ms']
+        if budget is not None and (total > budget or eager):
+            raise CommandError(f"Startup import budget exceeded: {total:.0f} ms of {budget:.0f} ms"
+                               + (f", eager {', '.join(eager)}" if eager else ''))
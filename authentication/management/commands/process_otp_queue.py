@@ -0,0 +1,40 @@
+"""
+Deliver queued verification SMS (see authentication/otp_queue.py).
+
+Run continuously next to the web process when OTP_QUEUE_MODE=worker:
+
+    python manage.py process_otp_queue
+
+or from cron with --once to retry anything the in-process thread pool
+didn't get to (e.g. after a restart); render.yaml runs it every minute.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from authentication.otp_queue import dispatch_due
+
+
+class Command(BaseCommand):
+    help = 'Send pending OTP messages, retrying failed ones with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Process the messages that are due now and exit')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to sleep when the queue is empty (default: %(default)s)')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Messages claimed per pass (default: %(default)s)')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            sent, attempted = dispatch_due(limit=options['batch_size'])
+            if attempted:
+                self.stdout.write(f'Sent {sent} of {attempted} due message(s)')
+
+            if options['once']:
+                break
+            if attempted < options['batch_size']:
+                time.sleep(options['interval'])
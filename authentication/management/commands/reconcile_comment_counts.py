@@ -0,0 +1,27 @@
+"""
+Recompute Comment.likes_count / dislikes_count where they have drifted from
+the CommentLike rows (see authentication/reactions.py). Schedule it
+periodically, e.g. nightly from cron:
+
+    python manage.py reconcile_comment_counts
+"""
+from django.core.management.base import BaseCommand
+
+from authentication.reactions import reconcile_counts
+
+
+class Command(BaseCommand):
+    help = 'Fix comment reaction counters that disagree with the stored reactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Comments checked per query (default: %(default)s)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report drifted comments without changing them')
+
+    def handle(self, *args, **options):
+        fixed = reconcile_counts(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        verb = 'would be fixed' if options['dry_run'] else 'fixed'
+        self.stdout.write(f'{len(fixed)} comment(s) {verb}')
+        if fixed and options['verbosity'] > 1:
+            self.stdout.write('Ids: ' + ', '.join(str(pk) for pk in fixed))
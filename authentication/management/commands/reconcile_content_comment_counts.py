@@ -0,0 +1,29 @@
+"""
+Recompute comments_count on commentable content where it has drifted from
+the approved comments (see authentication/comment_counts.py). Schedule it
+periodically alongside reconcile_comment_counts:
+
+    python manage.py reconcile_content_comment_counts
+"""
+from django.core.management.base import BaseCommand
+
+from authentication.comment_counts import reconcile_counts
+
+
+class Command(BaseCommand):
+    help = 'Fix content comments_count values that disagree with the approved comments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows checked per query (default: %(default)s)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report drifted content without changing it')
+
+    def handle(self, *args, **options):
+        fixed = reconcile_counts(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        verb = 'would be fixed' if options['dry_run'] else 'fixed'
+        total = sum(len(pks) for pks in fixed.values())
+        self.stdout.write(f'{total} content item(s) {verb}')
+        if fixed and options['verbosity'] > 1:
+            for content_type, pks in fixed.items():
+                self.stdout.write(f'{content_type}: ' + ', '.join(str(pk) for pk in pks))
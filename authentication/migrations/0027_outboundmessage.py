@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-19 17:23
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0026_remove_sharxathon_judges_remove_sharxathon_mentors_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phone_number', models.CharField(db_index=True, max_length=15)),
+                ('purpose', models.CharField(choices=[('verify_phone', 'Verify Phone'), ('reset_password', 'Reset Password'), ('recover_username', 'Recover Username')], default='verify_phone', max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='authenticat_status_cee380_idx'), models.Index(fields=['phone_number', 'created_at'], name='authenticat_phone_n_558050_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-19 17:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0027_outboundmessage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['event_type', 'event_date'], name='authenticat_event_t_5f137d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sharxathon',
+            index=models.Index(fields=['status', 'registration_deadline'], name='authenticat_status_7de8be_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sharxathon',
+            index=models.Index(fields=['status', 'start_datetime'], name='authenticat_status_5256ae_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sharxathon',
+            index=models.Index(fields=['status', 'end_datetime'], name='authenticat_status_781ac9_idx'),
+        ),
+    ]
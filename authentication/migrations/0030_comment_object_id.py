@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 17:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0028_state_scheduler_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='object_id',
+            field=models.PositiveBigIntegerField(blank=True, help_text='Primary key of the content being commented on', null=True),
+        ),
+    ]
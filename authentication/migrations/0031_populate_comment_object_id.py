@@ -0,0 +1,41 @@
+from django.db import migrations
+
+# Comment.content_type key -> model name, as of this migration
+CONTENT_MODELS = {
+    'startup_story': 'StartupStory',
+    'neo_story': 'NeoStory',
+    'neo_project': 'NeoProject',
+    'tech_news': 'TechNews',
+    'robotics_news': 'RoboticsNews',
+    'talk_episode': 'TalkEpisode',
+    'sharxathon': 'SharXathon',
+}
+
+CHUNK_SIZE = 500
+
+
+def populate_object_ids(apps, schema_editor):
+    Comment = apps.get_model('authentication', 'Comment')
+    for key, model_name in CONTENT_MODELS.items():
+        model = apps.get_model('authentication', model_name)
+        slugs = list(
+            Comment.objects.filter(content_type=key, object_id__isnull=True)
+            .order_by()
+            .values_list('content_slug', flat=True)
+            .distinct()
+        )
+        for start in range(0, len(slugs), CHUNK_SIZE):
+            chunk = slugs[start:start + CHUNK_SIZE]
+            for slug, pk in model.objects.filter(slug__in=chunk).values_list('slug', 'pk'):
+                Comment.objects.filter(content_type=key, content_slug=slug).update(object_id=pk)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0030_comment_object_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_object_ids, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.1.7 on 2026-10-19 17:38
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+# Comment.content_type key -> model name, as of this migration
+CONTENT_MODELS = {
+    'startup_story': 'StartupStory',
+    'neo_story': 'NeoStory',
+    'neo_project': 'NeoProject',
+    'tech_news': 'TechNews',
+    'robotics_news': 'RoboticsNews',
+    'talk_episode': 'TalkEpisode',
+    'sharxathon': 'SharXathon',
+}
+
+
+def backfill_comments_count(apps, schema_editor):
+    Comment = apps.get_model('authentication', 'Comment')
+    for key, model_name in CONTENT_MODELS.items():
+        counts = (
+            Comment.objects.filter(content_type=key, object_id=OuterRef('pk'), is_approved=True)
+            .order_by()
+            .values('object_id')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        apps.get_model('authentication', model_name).objects.update(
+            comments_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0031_populate_comment_object_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='neoproject',
+            name='comments_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='neostory',
+            name='comments_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='sharxathon',
+            name='comments_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='startupstory',
+            name='comments_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='talkepisode',
+            name='comments_count',
+            field=models.IntegerField(default=0, help_text='Number of approved comments'),
+        ),
+        migrations.AddField(
+            model_name='technews',
+            name='comments_count',
+            field=models.IntegerField(default=0, help_text='Number of approved comments'),
+        ),
+        migrations.RunPython(backfill_comments_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-19 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0032_content_comments_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_flagged', True), ('is_approved', False), _connector='OR'), fields=['created_at', 'id'], name='comment_moderation_queue_idx'),
+        ),
+    ]
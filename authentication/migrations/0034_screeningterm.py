@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-19 17:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0033_comment_moderation_queue_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScreeningTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(help_text='Matched case-insensitively as a whole word or phrase', max_length=100, unique=True)),
+                ('action', models.CharField(choices=[('flag', 'Flag for review'), ('hold', 'Hold until approved')], default='flag', max_length=10)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['term'],
+            },
+        ),
+    ]
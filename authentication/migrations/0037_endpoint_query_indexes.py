@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-19 17:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0036_comment_user_activity_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['content_type', 'object_id', 'parent', '-created_at'], name='comment_thread_idx'),
+        ),
+    ]
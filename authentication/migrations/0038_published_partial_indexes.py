@@ -0,0 +1,113 @@
+# Generated by Django 5.1.7 on 2026-10-19 17:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0037_endpoint_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='event',
+            name='authenticat_event_t_2cdf12_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='technews',
+            name='authenticat_is_publ_454946_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='youtubevideo',
+            name='authenticat_video_t_fb669f_idx',
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['display_order', '-event_date'], name='event_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['event_type', 'display_order', '-event_date'], name='event_published_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_featured', True), ('is_published', True)), fields=['display_order', '-event_date'], name='event_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='neoproject',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-created_at'], name='neoproject_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='neoproject',
+            index=models.Index(condition=models.Q(('is_featured', True), ('is_published', True)), fields=['-created_at'], name='neoproject_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='neostory',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-created_at'], name='neostory_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='neostory',
+            index=models.Index(condition=models.Q(('is_featured', True), ('is_published', True)), fields=['-created_at'], name='neostory_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roboticsnews',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-created_at'], name='roboticsnews_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roboticsnews',
+            index=models.Index(condition=models.Q(('is_featured', True), ('is_published', True)), fields=['-created_at'], name='roboticsnews_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roboticsnews',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-views_count', '-likes_count', '-created_at'], name='roboticsnews_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sharxathon',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-start_datetime'], name='sharxathon_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sharxathon',
+            index=models.Index(condition=models.Q(('is_featured', True), ('is_published', True)), fields=['-start_datetime'], name='sharxathon_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='startupstory',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-created_at'], name='startupstory_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='startupstory',
+            index=models.Index(condition=models.Q(('is_featured', True), ('is_published', True)), fields=['-created_at'], name='startupstory_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='talkepisode',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-episode_number'], name='talkepisode_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='technews',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-published_at', '-created_at'], name='technews_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='technews',
+            index=models.Index(condition=models.Q(('is_featured', True), ('is_published', True)), fields=['-published_at', '-created_at'], name='technews_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='technews',
+            index=models.Index(condition=models.Q(('is_breaking', True), ('is_published', True)), fields=['-published_at', '-created_at'], name='technews_breaking_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='technews',
+            index=models.Index(condition=models.Q(('is_published', True), ('is_trending', True)), fields=['-published_at', '-created_at'], name='technews_trending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='youtubevideo',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['display_order', '-created_at'], name='youtubevideo_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='youtubevideo',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['video_type', 'display_order', '-created_at'], name='youtubevideo_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='youtubevideo',
+            index=models.Index(condition=models.Q(('is_featured', True), ('is_published', True)), fields=['display_order', '-created_at'], name='youtubevideo_featured_idx'),
+        ),
+    ]
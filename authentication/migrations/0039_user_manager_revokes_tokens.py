@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-19 18:39
+
+import authentication.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0038_published_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='customuser',
+            managers=[
+                ('objects', authentication.models.CustomUserManager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+
+def fail_duplicate_in_flight(apps, schema_editor):
+    """Keep the newest unsent message per number and purpose; the constraint allows one"""
+    OutboundMessage = apps.get_model('authentication', 'OutboundMessage')
+    in_flight = OutboundMessage.objects.filter(status__in=['pending', 'sending'])
+    kept = set()
+    duplicates = []
+    for pk, phone_number, purpose in in_flight.order_by('-created_at', '-pk').values_list(
+        'pk', 'phone_number', 'purpose'
+    ):
+        if (phone_number, purpose) in kept:
+            duplicates.append(pk)
+        else:
+            kept.add((phone_number, purpose))
+    OutboundMessage.objects.filter(pk__in=duplicates).update(
+        status='failed', last_error='Superseded by a newer message'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0039_user_manager_revokes_tokens'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_in_flight, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='outboundmessage',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'sending'])), fields=('phone_number', 'purpose'), name='otp_one_in_flight'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-19 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0040_otp_one_in_flight'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['parent', 'created_at'], name='comment_replies_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userpreference',
+            index=models.Index(fields=['-created_at'], name='authenticat_created_6ef822_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.7 on 2026-10-19 19:01
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0041_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentThread',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_type', models.CharField(max_length=20)),
+                ('thread_key', models.CharField(max_length=270)),
+                ('last_seq', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CommentTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_type', models.CharField(max_length=20)),
+                ('thread_key', models.CharField(max_length=270)),
+                ('comment_id', models.BigIntegerField()),
+                ('seq', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['content_type', 'object_id', 'seq', 'id'], name='authenticat_content_a54ff1_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='commentthread',
+            constraint=models.UniqueConstraint(fields=('content_type', 'thread_key'), name='comment_thread_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='commenttombstone',
+            index=models.Index(fields=['content_type', 'thread_key', 'seq', 'comment_id'], name='authenticat_content_01e2bb_idx'),
+        ),
+    ]
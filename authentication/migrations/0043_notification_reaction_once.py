@@ -0,0 +1,42 @@
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def drop_repeated_reactions(apps, schema_editor):
+    """Keep the first notification per reaction; the constraint allows one"""
+    Notification = apps.get_model('authentication', 'Notification')
+    NotificationCounter = apps.get_model('authentication', 'NotificationCounter')
+    reactions = Notification.objects.filter(kind__in=['like', 'dislike'], comment__isnull=False)
+    kept = set()
+    duplicates = []
+    unread = Counter()
+    for pk, recipient_id, actor_id, kind, comment_id, is_read in reactions.order_by('created_at', 'pk').values_list(
+        'pk', 'recipient_id', 'actor_id', 'kind', 'comment_id', 'is_read'
+    ):
+        key = (recipient_id, actor_id, kind, comment_id)
+        if key in kept:
+            duplicates.append(pk)
+            if not is_read:
+                unread[recipient_id] += 1
+        else:
+            kept.add(key)
+    Notification.objects.filter(pk__in=duplicates).delete()
+    for recipient_id, count in unread.items():
+        NotificationCounter.objects.filter(user_id=recipient_id, unread__gte=count).update(unread=F('unread') - count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0042_comment_feed_sequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_repeated_reactions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('kind__in', ['like', 'dislike'])), fields=('recipient', 'actor', 'kind', 'comment'), name='notification_reaction_once'),
+        ),
+    ]
@@ -1,13 +1,35 @@
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.db import models, transaction
 from django.utils import timezone
 import random
 import string
 
+# Public pages only ever read published rows, so their indexes leave drafts out
+PUBLISHED = models.Q(is_published=True)
+PUBLISHED_FEATURED = models.Q(is_published=True, is_featured=True)
+
+class UserQuerySet(models.QuerySet):
+
+    def update(self, **kwargs):
+        """Bulk updates skip post_save, so retire cached tokens here (see authentication.py)"""
+        from .authentication import IGNORED_USER_FIELDS, revoke_cached_tokens
+
+        rows = super().update(**kwargs)
+        if rows and not set(kwargs) <= IGNORED_USER_FIELDS:
+            revoke_cached_tokens()
+        return rows
+
+
+class CustomUserManager(UserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 class CustomUser(AbstractUser):
     phone_number = models.CharField(max_length=15, unique=True, null=True, blank=True)
     is_phone_verified = models.BooleanField(default=False)
     created_at = models.DateTimeField(default=timezone.now)
+
+    objects = CustomUserManager()
     
     def __str__(self):
         return self.username or self.phone_number
@@ -36,6 +58,48 @@ class OTPVerification(models.Model):
         return f"OTP for {self.phone_number} - {self.otp}"
 
 
+class OutboundMessage(models.Model):
+    """Queued verification SMS, delivered outside the request (see otp_queue.py)"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    PURPOSE_CHOICES = [
+        ('verify_phone', 'Verify Phone'),
+        ('reset_password', 'Reset Password'),
+        ('recover_username', 'Recover Username'),
+    ]
+
+    phone_number = models.CharField(max_length=15, db_index=True)
+    purpose = models.CharField(max_length=20, choices=PURPOSE_CHOICES, default='verify_phone')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['phone_number', 'created_at']),
+        ]
+        constraints = [
+            # Concurrent requests can't queue the same code twice (see otp_queue.py)
+            models.UniqueConstraint(
+                fields=['phone_number', 'purpose'],
+                condition=models.Q(status__in=['pending', 'sending']),
+                name='otp_one_in_flight',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_purpose_display()} SMS to {self.phone_number} ({self.status})"
+
+
 class StartupStory(models.Model):
     INDUSTRY_CHOICES = [
         ('technology', 'Technology'),
@@ -99,6 +163,7 @@ class StartupStory(models.Model):
     is_featured = models.BooleanField(default=False, help_text="Show on homepage as featured")
     is_published = models.BooleanField(default=False, help_text="Make visible to public")
     views_count = models.IntegerField(default=0)
+    comments_count = models.IntegerField(default=0)
     
     # Timestamps
     created_at = models.DateTimeField(default=timezone.now)
@@ -112,6 +177,10 @@ class StartupStory(models.Model):
         verbose_name = "Startup Story"
         verbose_name_plural = "Startup Stories"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], condition=PUBLISHED, name='startupstory_published_idx'),
+            models.Index(fields=['-created_at'], condition=PUBLISHED_FEATURED, name='startupstory_featured_idx'),
+        ]
     
     def __str__(self):
         return self.heading
@@ -191,6 +260,7 @@ class NeoStory(models.Model):
     is_featured = models.BooleanField(default=False, help_text="Show on homepage as featured")
     is_published = models.BooleanField(default=False, help_text="Make visible to public")
     views_count = models.IntegerField(default=0)
+    comments_count = models.IntegerField(default=0)
     
     # Timestamps
     created_at = models.DateTimeField(default=timezone.now)
@@ -204,6 +274,10 @@ class NeoStory(models.Model):
         verbose_name = "Neo Story"
         verbose_name_plural = "Neo Stories"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], condition=PUBLISHED, name='neostory_published_idx'),
+            models.Index(fields=['-created_at'], condition=PUBLISHED_FEATURED, name='neostory_featured_idx'),
+        ]
     
     def __str__(self):
         return self.header
@@ -381,6 +455,7 @@ class SharXathon(models.Model):
     is_featured = models.BooleanField(default=False, help_text="Show on homepage as featured")
     is_published = models.BooleanField(default=False, help_text="Make visible to public")
     views_count = models.IntegerField(default=0)
+    comments_count = models.IntegerField(default=0)
     
     # Timestamps
     created_at = models.DateTimeField(default=timezone.now)
@@ -394,6 +469,14 @@ class SharXathon(models.Model):
         verbose_name = "SharXathon"
         verbose_name_plural = "SharXathons"
         ordering = ['-start_datetime']
+        indexes = [
+            # Deadline range scans used by authentication/scheduler.py
+            models.Index(fields=['status', 'registration_deadline']),
+            models.Index(fields=['status', 'start_datetime']),
+            models.Index(fields=['status', 'end_datetime']),
+            models.Index(fields=['-start_datetime'], condition=PUBLISHED, name='sharxathon_published_idx'),
+            models.Index(fields=['-start_datetime'], condition=PUBLISHED_FEATURED, name='sharxathon_featured_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.location}"
@@ -408,20 +491,12 @@ class SharXathon(models.Model):
         if self.is_published and not self.published_at:
             self.published_at = timezone.now()
         
-        # Auto-update status based on dates
-        from django.utils import timezone as tz
-        now = tz.now()
-        
-        if now < self.registration_deadline:
-            if self.status == 'upcoming':
-                self.status = 'registration_open'
-        elif self.registration_deadline <= now < self.start_datetime:
-            self.status = 'upcoming'
-        elif self.start_datetime <= now < self.end_datetime:
-            self.status = 'ongoing'
-        elif now >= self.end_datetime:
-            if self.status != 'cancelled':
-                self.status = 'completed'
+        # Auto-update status based on dates (authentication/scheduler.py keeps
+        # it current between saves)
+        from .scheduler import sharxathon_status
+        self.status = sharxathon_status(
+            self.registration_deadline, self.start_datetime, self.end_datetime, self.status
+        )
         
         super().save(*args, **kwargs)
     
@@ -441,18 +516,22 @@ class SharXathon(models.Model):
             return self.end_datetime - tz.now()
         return None
     
+    @property
+    def current_status(self):
+        """status as of now, whether or not the scheduler has caught up"""
+        from .scheduler import sharxathon_status
+
+        return sharxathon_status(self.registration_deadline, self.start_datetime, self.end_datetime, self.status)
+
     @property
     def is_registration_open(self):
         """Check if registration is still open"""
-        from django.utils import timezone as tz
-        return tz.now() < self.registration_deadline and self.status in ['upcoming', 'registration_open']
+        return self.current_status == 'registration_open'
     
     @property
     def is_active(self):
         """Check if hackathon is currently active/ongoing"""
-        from django.utils import timezone as tz
-        now = tz.now()
-        return self.start_datetime <= now <= self.end_datetime
+        return self.current_status == 'ongoing'
     
     @property
     def participation_percentage(self):
@@ -544,6 +623,7 @@ class TechNews(models.Model):
     views_count = models.IntegerField(default=0, help_text="Number of views")
     likes_count = models.IntegerField(default=0, help_text="Number of likes")
     shares_count = models.IntegerField(default=0, help_text="Number of shares")
+    comments_count = models.IntegerField(default=0, help_text="Number of approved comments")
     
     # Featured Screen
     featured_screen = models.JSONField(
@@ -587,9 +667,22 @@ class TechNews(models.Model):
         indexes = [
             models.Index(fields=['slug']),
             models.Index(fields=['category']),
-            models.Index(fields=['is_published', '-published_at']),
             models.Index(fields=['is_featured']),
             models.Index(fields=['is_breaking']),
+            models.Index(fields=['-published_at', '-created_at'], condition=PUBLISHED, name='technews_published_idx'),
+            models.Index(
+                fields=['-published_at', '-created_at'], condition=PUBLISHED_FEATURED, name='technews_featured_idx'
+            ),
+            models.Index(
+                fields=['-published_at', '-created_at'],
+                condition=models.Q(is_published=True, is_breaking=True),
+                name='technews_breaking_idx',
+            ),
+            models.Index(
+                fields=['-published_at', '-created_at'],
+                condition=models.Q(is_published=True, is_trending=True),
+                name='technews_trending_idx',
+            ),
         ]
     
     def __str__(self):
@@ -670,6 +763,7 @@ class TalkEpisode(models.Model):
     
     # Episode Metadata
     duration_minutes = models.IntegerField(default=60, help_text="Episode duration in minutes")
+    comments_count = models.IntegerField(default=0, help_text="Number of approved comments")
     published_at = models.DateTimeField(help_text="When the episode was published")
     
     # Status
@@ -683,6 +777,9 @@ class TalkEpisode(models.Model):
         ordering = ['-episode_number']
         verbose_name = 'Talk Episode'
         verbose_name_plural = 'Talk Episodes'
+        indexes = [
+            models.Index(fields=['-episode_number'], condition=PUBLISHED, name='talkepisode_published_idx'),
+        ]
     
     def __str__(self):
         return f"Episode {self.episode_number}: {self.title}"
@@ -808,6 +905,15 @@ class RoboticsNews(models.Model):
         ordering = ['-created_at']
         verbose_name = "Robotics News Article"
         verbose_name_plural = "Robotics News Articles"
+        indexes = [
+            models.Index(fields=['-created_at'], condition=PUBLISHED, name='roboticsnews_published_idx'),
+            models.Index(fields=['-created_at'], condition=PUBLISHED_FEATURED, name='roboticsnews_featured_idx'),
+            models.Index(
+                fields=['-views_count', '-likes_count', '-created_at'],
+                condition=PUBLISHED,
+                name='roboticsnews_popular_idx',
+            ),
+        ]
     
     def __str__(self):
         return self.title
@@ -861,6 +967,7 @@ class Comment(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='comments')
     content_type = models.CharField(max_length=20, choices=CONTENT_TYPE_CHOICES)
     content_slug = models.CharField(max_length=255, help_text="Slug of the content being commented on")
+    object_id = models.PositiveBigIntegerField(null=True, blank=True, help_text="Primary key of the content being commented on")
     
     # Comment content
     text = models.TextField(help_text="Comment text content")
@@ -879,47 +986,102 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Thread change number of the last write, for the incremental feed (comment_feed.py)
+    seq = models.BigIntegerField(default=0, editable=False)
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['content_type', 'content_slug']),
-            models.Index(fields=['user']),
+            # Thread pages: top-level approved comments on one item, newest first. Partial on
+            # is_approved, as SQLite only matches a bare boolean filter against an index condition
+            models.Index(
+                fields=['content_type', 'object_id', 'parent', '-created_at'],
+                condition=models.Q(is_approved=True),
+                name='comment_thread_idx',
+            ),
+            # Incremental feed: changes on one item in change order
+            models.Index(fields=['content_type', 'object_id', 'seq', 'id']),
+            # Approved replies under each listed comment, oldest first
+            models.Index(fields=['parent', 'created_at'], condition=models.Q(is_approved=True), name='comment_replies_idx'),
+            # Per-user activity, newest first; also serves plain user lookups
+            models.Index(fields=['user', '-created_at', '-id']),
             models.Index(fields=['created_at']),
+            # Moderation queue: only the few flagged or hidden comments are indexed
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=models.Q(is_flagged=True) | models.Q(is_approved=False),
+                name='comment_moderation_queue_idx',
+            ),
         ]
     
     def __str__(self):
         return f"Comment by {self.user.username} on {self.content_type}: {self.content_slug}"
     
+    COUNTED_FIELDS = ('content_type', 'object_id', 'is_approved')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # What the stored row contributes to its content's comments_count
+        loaded = dict(zip(field_names, values))
+        if all(name in loaded for name in cls.COUNTED_FIELDS):
+            from .comment_counts import counted_key
+            instance._counted_key = counted_key(*(loaded[name] for name in cls.COUNTED_FIELDS))
+        return instance
+    
+    def save(self, *args, **kwargs):
+        from .comment_counts import counted_key, record_change
+        
+        # The API resolves object_id while validating; fill it in for other callers
+        if self.object_id is None:
+            from .content_registry import resolve_object_id
+            self.object_id = resolve_object_id(self.content_type, self.content_slug)
+        
+        from .comment_feed import number_after_commit
+        
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic():
+            if update_fields is not None and not set(update_fields) & set(self.COUNTED_FIELDS):
+                super().save(*args, **kwargs)
+                number_after_commit(self.content_type, self.object_id, self.content_slug, [self.pk])
+                return
+            
+            if self._state.adding:
+                before = None
+            elif hasattr(self, '_counted_key'):
+                before = self._counted_key
+            else:
+                stored = Comment.objects.filter(pk=self.pk).values_list(*self.COUNTED_FIELDS).first()
+                before = counted_key(*stored) if stored else None
+            super().save(*args, **kwargs)
+            after = counted_key(self.content_type, self.object_id, self.is_approved)
+            record_change(before, after)
+            # The feed numbers the change once it has committed
+            number_after_commit(self.content_type, self.object_id, self.content_slug, [self.pk])
+        self._counted_key = after
+    
     @property
     def is_reply(self):
         """Check if this comment is a reply to another comment"""
-        return self.parent is not None
+        return self.parent_id is not None
     
     @property
     def reply_count(self):
         """Get count of replies to this comment"""
+        annotated = getattr(self, 'approved_reply_count', None)
+        if annotated is not None:
+            return annotated
         return self.replies.filter(is_approved=True).count()
     
     def get_content_title(self):
         """Get the title of the content this comment belongs to"""
-        try:
-            if self.content_type == 'startup_story':
-                return StartupStory.objects.get(slug=self.content_slug).title
-            elif self.content_type == 'neo_story':
-                return NeoStory.objects.get(slug=self.content_slug).title
-            elif self.content_type == 'neo_project':
-                return NeoProject.objects.get(slug=self.content_slug).title
-            elif self.content_type == 'tech_news':
-                return TechNews.objects.get(slug=self.content_slug).headline
-            elif self.content_type == 'robotics_news':
-                return RoboticsNews.objects.get(slug=self.content_slug).title
-            elif self.content_type == 'talk_episode':
-                return TalkEpisode.objects.get(slug=self.content_slug).title
-            elif self.content_type == 'sharxathon':
-                return SharXathon.objects.get(slug=self.content_slug).title
-        except:
-            return "Unknown Content"
-        return "Unknown Content"
+        cached = getattr(self, '_content_title', None)
+        if cached is not None:
+            return cached
+        from .content_registry import attach_titles
+        attach_titles([self])
+        return self._content_title
 
 
 class CommentLike(models.Model):
@@ -942,6 +1104,115 @@ class CommentLike(models.Model):
         return f"{self.user.username} {self.reaction}d comment {self.comment.id}"
 
 
+class CommentThread(models.Model):
+    """
+    Change counter for one comment thread. Writers take the next number
+    with an UPDATE that keeps the row locked until they commit, so on one
+    thread the numbers are handed out in commit order (see comment_feed.py).
+    """
+    content_type = models.CharField(max_length=20)
+    # 'id:<object_id>', or 'slug:<content_slug>' for content outside the registry
+    thread_key = models.CharField(max_length=270)
+    last_seq = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'thread_key'], name='comment_thread_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.content_type} {self.thread_key}: {self.last_seq}"
+
+
+class CommentTombstone(models.Model):
+    """A deleted comment, so the incremental feed can report the deletion"""
+    content_type = models.CharField(max_length=20)
+    thread_key = models.CharField(max_length=270)
+    comment_id = models.BigIntegerField()
+    seq = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['content_type', 'thread_key', 'seq', 'comment_id']),
+        ]
+
+    def __str__(self):
+        return f"Deleted comment {self.comment_id} ({self.content_type} {self.thread_key})"
+
+
+class Notification(models.Model):
+    """Inbox entry for a reply to, or reaction on, a user's comment (see notifications.py)"""
+    KIND_CHOICES = [
+        ('reply', 'Reply'),
+        ('like', 'Like'),
+        ('dislike', 'Dislike'),
+    ]
+    REACTION_KINDS = ('like', 'dislike')
+
+    recipient = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='notifications')
+    actor = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Kept when the comment is deleted; the inbox entry and its preview remain
+    comment = models.ForeignKey('Comment', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    content_type = models.CharField(max_length=20)
+    content_slug = models.CharField(max_length=255)
+    preview = models.CharField(max_length=140, blank=True)
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['recipient', '-created_at', '-id']),
+            models.Index(
+                fields=['recipient', '-created_at', '-id'],
+                condition=models.Q(is_read=False),
+                name='notification_unread_idx',
+            ),
+        ]
+        constraints = [
+            # A reaction notifies its comment's author once, however often it is toggled
+            models.UniqueConstraint(
+                fields=['recipient', 'actor', 'kind', 'comment'],
+                condition=models.Q(kind__in=['like', 'dislike']),
+                name='notification_reaction_once',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for {self.recipient_id} from {self.actor_id}"
+
+
+class NotificationCounter(models.Model):
+    """Per-user unread notification count, so the badge is a primary-key read"""
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter')
+    unread = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} unread"
+
+
+class ScreeningTerm(models.Model):
+    """Word or phrase that new comments are screened for (see screening.py)"""
+    ACTION_CHOICES = [
+        ('flag', 'Flag for review'),
+        ('hold', 'Hold until approved'),
+    ]
+
+    term = models.CharField(max_length=100, unique=True, help_text="Matched case-insensitively as a whole word or phrase")
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, default='flag')
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['term']
+
+    def __str__(self):
+        return f"{self.term} ({self.action})"
+
+
 class NeoProject(models.Model):
     """
     Model for Neo Projects - showcase of innovative projects and developments
@@ -1042,6 +1313,7 @@ class NeoProject(models.Model):
     is_published = models.BooleanField(default=False, help_text="Make visible to public")
     is_open_source = models.BooleanField(default=True, help_text="Is this an open source project?")
     views_count = models.IntegerField(default=0)
+    comments_count = models.IntegerField(default=0)
     stars_count = models.IntegerField(default=0, help_text="GitHub stars or similar rating")
     
     # Timestamps
@@ -1062,6 +1334,8 @@ class NeoProject(models.Model):
             models.Index(fields=['category', 'is_published']),
             models.Index(fields=['status', 'is_featured']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['-created_at'], condition=PUBLISHED, name='neoproject_published_idx'),
+            models.Index(fields=['-created_at'], condition=PUBLISHED_FEATURED, name='neoproject_featured_idx'),
         ]
     
     def __str__(self):
@@ -1276,9 +1550,16 @@ class Event(models.Model):
         verbose_name_plural = "Events"
         ordering = ['display_order', '-event_date']
         indexes = [
-            models.Index(fields=['event_type', 'is_published']),
+            models.Index(fields=['event_type', 'event_date']),
             models.Index(fields=['event_date', 'is_featured']),
             models.Index(fields=['display_order']),
+            models.Index(fields=['display_order', '-event_date'], condition=PUBLISHED, name='event_published_idx'),
+            models.Index(
+                fields=['event_type', 'display_order', '-event_date'], condition=PUBLISHED, name='event_published_type_idx'
+            ),
+            models.Index(
+                fields=['display_order', '-event_date'], condition=PUBLISHED_FEATURED, name='event_featured_idx'
+            ),
         ]
     
     def __str__(self):
@@ -1395,9 +1676,17 @@ class YouTubeVideo(models.Model):
         verbose_name_plural = "YouTube Videos"
         ordering = ['display_order', '-created_at']
         indexes = [
-            models.Index(fields=['video_type', 'is_published']),
             models.Index(fields=['category', 'is_featured']),
             models.Index(fields=['display_order']),
+            models.Index(
+                fields=['display_order', '-created_at'], condition=PUBLISHED, name='youtubevideo_published_idx'
+            ),
+            models.Index(
+                fields=['video_type', 'display_order', '-created_at'], condition=PUBLISHED, name='youtubevideo_type_idx'
+            ),
+            models.Index(
+                fields=['display_order', '-created_at'], condition=PUBLISHED_FEATURED, name='youtubevideo_featured_idx'
+            ),
         ]
     
     def __str__(self):
@@ -1496,6 +1785,10 @@ class UserPreference(models.Model):
         verbose_name = "User Preference"
         verbose_name_plural = "User Preferences"
         ordering = ['-created_at']
+        indexes = [
+            # The admin listing reads the latest 100
+            models.Index(fields=['-created_at']),
+        ]
     
     def __str__(self):
         return f"{self.user_type} - {self.interest} ({self.created_at.strftime('%Y-%m-%d')})"
@@ -0,0 +1,120 @@
+"""
+Comment moderation queue and bulk actions.
+
+The queue holds flagged comments awaiting review and rejected ones kept
+hidden for reference, oldest first. Both states are covered by the partial
+comment_moderation_queue_idx index on (created_at, id), which only holds
+those few rows, and pages are keyset-paginated on the same columns, so the
+hundredth page costs what the first does.
+
+Approving and rejecting change the selected comments with one UPDATE per
+thread and adjust the content comments_count in bulk in the same
+transaction; once that commits, each thread numbers its changed comments
+for the feed (comment_feed.py).
+Deleting goes through the ORM's delete(), so replies and reactions cascade,
+notifications are detached and the post_delete receivers (see signals.py)
+uncount every removed comment, the same as deleting one at a time. Either
+way open streams on the affected threads are woken once committed.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .comment_counts import apply_deltas, counted_key
+from .comment_feed import decode_cursor, encode_cursor, number_after_commit
+from .models import Comment
+from .serializers import ModerationCommentSerializer
+
+IN_QUEUE = Q(is_flagged=True) | Q(is_approved=False)
+
+QUEUE_STATES = {
+    'flagged': Q(is_flagged=True),
+    'rejected': Q(is_flagged=False, is_approved=False),
+}
+
+BULK_ACTIONS = ('approve', 'reject', 'delete')
+
+# What ModerationCommentSerializer reads
+QUEUE_COLUMNS = (
+    'id', 'user__username', 'content_type', 'content_slug', 'text', 'parent', 'is_approved',
+    'is_flagged', 'flagged_reason', 'likes_count', 'dislikes_count', 'created_at',
+)
+
+MAX_QUEUE_LIMIT = 100
+MAX_BULK_IDS = 500
+
+
+def queue_page(state='flagged', cursor=None, limit=50):
+    """
+    One page of the queue. Pass 'next_cursor' back as `cursor` for the
+    next page; raises ValueError for a malformed cursor.
+    """
+    limit = max(1, min(limit, MAX_QUEUE_LIMIT))
+    comments = Comment.objects.filter(IN_QUEUE, QUEUE_STATES[state])
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        comments = comments.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+
+    page = list(
+        comments.select_related('user')
+        .only(*QUEUE_COLUMNS)
+        .order_by('created_at', 'id')[:limit + 1]
+    )
+    has_more = len(page) > limit
+    page = page[:limit]
+    return {
+        'results': ModerationCommentSerializer(page, many=True).data,
+        'next_cursor': encode_cursor(page[-1].created_at, page[-1].id) if has_more else None,
+        'has_more': has_more,
+    }
+
+
+def _update_by_thread(rows, **changes):
+    threads = defaultdict(list)
+    for pk, content_type, object_id, content_slug, _ in rows:
+        threads[(content_type, object_id, content_slug)].append(pk)
+    for thread, pks in threads.items():
+        Comment.objects.filter(pk__in=pks).update(**changes)
+        number_after_commit(*thread, comment_ids=pks)
+
+
+def bulk_moderate(action, ids):
+    """
+    Approve, reject or delete the given comments. Approving clears the flag;
+    rejecting hides the comment and clears the flag; deleting also removes
+    replies and reactions. Returns the ids that existed and were acted on.
+    """
+    if action not in BULK_ACTIONS:
+        raise ValueError(f'Unknown action: {action}')
+
+    with transaction.atomic():
+        rows = list(
+            Comment.objects.select_for_update()
+            .filter(pk__in=ids)
+            .order_by()
+            .values_list('pk', 'content_type', 'object_id', 'content_slug', 'is_approved')
+        )
+        found = [row[0] for row in rows]
+        if not found:
+            return []
+
+        deltas = Counter()
+        now = timezone.now()
+        if action == 'approve':
+            _update_by_thread(rows, is_approved=True, is_flagged=False, flagged_reason='', updated_at=now)
+            for _, content_type, object_id, _, approved in rows:
+                if not approved:
+                    deltas[counted_key(content_type, object_id, True)] += 1
+        elif action == 'reject':
+            _update_by_thread(rows, is_approved=False, is_flagged=False, updated_at=now)
+            for _, content_type, object_id, _, approved in rows:
+                if approved:
+                    deltas[counted_key(content_type, object_id, True)] -= 1
+        else:
+            Comment.objects.filter(pk__in=found).delete()
+
+        apply_deltas(deltas)
+
+    return found
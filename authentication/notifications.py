@@ -0,0 +1,219 @@
+"""
+Reply and reaction notifications, fanned out on write.
+
+When someone replies to or reacts to a comment, its author gets an inbox
+row and their NotificationCounter goes up, so reading the unread badge
+is a primary-key lookup and reading the inbox is a range scan on
+(recipient, created_at), not a search through comment threads.
+
+Writes are batched. Depending on NOTIFICATION_MODE:
+
+- 'thread' (default): notify() hands the event to an in-process buffer
+  once the request's transaction commits. A background thread then
+  writes whatever has accumulated, either every NOTIFICATION_FLUSH_SECONDS
+  or as soon as NOTIFICATION_BATCH_SIZE events are waiting. Each batch is
+  one bulk INSERT plus one counter UPDATE per distinct increment, so the
+  comment and reaction endpoints never wait on it. Events still buffered
+  when a worker is killed are lost; a missed notification is acceptable.
+- 'sync': written inside the request (tests, local debugging).
+
+A batch drops events whose comment or users were deleted before the
+flush, and reactions already notified: a like toggled off and on again
+notifies once, however many flushes apart. The notification_reaction_once
+constraint backs that up against a concurrent writer. If the bulk INSERT
+still fails, the batch is retried one row at a time, so one bad event
+doesn't cost the others theirs.
+"""
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Greatest
+
+from .comment_feed import decode_cursor, encode_cursor
+from .models import Comment, CustomUser, Notification, NotificationCounter
+from .serializers import NotificationSerializer
+
+logger = logging.getLogger(__name__)
+
+MAX_INBOX_LIMIT = 100
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def notify(recipient_id, actor_id, kind, comment):
+    """Queue a notification for recipient about `comment`; self-notifications are dropped"""
+    if recipient_id is None or recipient_id == actor_id:
+        return
+    event = {
+        'recipient_id': recipient_id,
+        'actor_id': actor_id,
+        'kind': kind,
+        'comment_id': comment.pk,
+        'content_type': comment.content_type,
+        'content_slug': comment.content_slug,
+        'preview': comment.text[:140],
+    }
+    if _setting('NOTIFICATION_MODE', 'thread') == 'sync':
+        write_batch([event])
+    else:
+        transaction.on_commit(lambda: buffer.add(event))
+
+
+def _deliverable(events):
+    """The events whose comment and users still exist, less reactions already notified"""
+    comment_ids = {event['comment_id'] for event in events}
+    user_ids = {event['recipient_id'] for event in events} | {event['actor_id'] for event in events}
+    comments = set(Comment.objects.filter(pk__in=comment_ids).values_list('pk', flat=True))
+    users = set(CustomUser.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+    notified = set(
+        Notification.objects.filter(kind__in=Notification.REACTION_KINDS, comment_id__in=comments)
+        .values_list('recipient_id', 'actor_id', 'kind', 'comment_id')
+    )
+    return [
+        event for event in events
+        if event['comment_id'] in comments and event['recipient_id'] in users and event['actor_id'] in users
+        and (event['recipient_id'], event['actor_id'], event['kind'], event['comment_id']) not in notified
+    ]
+
+
+def _count_unread(recipient_ids):
+    per_recipient = Counter(recipient_ids)
+    by_increment = defaultdict(list)
+    for recipient_id, count in per_recipient.items():
+        by_increment[count].append(recipient_id)
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=recipient_id) for recipient_id in per_recipient],
+        ignore_conflicts=True,
+    )
+    for count, recipient_ids in by_increment.items():
+        NotificationCounter.objects.filter(user_id__in=recipient_ids).update(unread=F('unread') + count)
+
+
+def write_batch(events):
+    """
+    Insert the events' inbox rows and bump the recipients' counters.
+    Repeats of the same (recipient, actor, kind, comment) within the batch,
+    e.g. a like toggled off and on, produce one row. Returns the rows written.
+    """
+    unique = {}
+    for event in events:
+        key = (event['recipient_id'], event['actor_id'], event['kind'], event['comment_id'])
+        unique.setdefault(key, event)
+    if not unique:
+        return 0
+    rows = [Notification(**event) for event in _deliverable(list(unique.values()))]
+    if not rows:
+        return 0
+
+    try:
+        with transaction.atomic():
+            Notification.objects.bulk_create(rows)
+            _count_unread(row.recipient_id for row in rows)
+        return len(rows)
+    except IntegrityError:
+        # Something changed since the check: a comment deleted, a reaction notified elsewhere
+        pass
+
+    written = []
+    for row in rows:
+        row.pk = None
+        try:
+            with transaction.atomic():
+                row.save(force_insert=True)
+        except IntegrityError:
+            continue
+        written.append(row)
+    if written:
+        with transaction.atomic():
+            _count_unread(row.recipient_id for row in written)
+    return len(written)
+
+
+class NotificationBuffer:
+    """Events waiting to be written, drained by one daemon thread per process"""
+
+    def __init__(self):
+        self._events = []
+        self._wakeup = threading.Condition()
+        self._thread = None
+
+    def add(self, event):
+        with self._wakeup:
+            self._events.append(event)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='notification-writer', daemon=True)
+                self._thread.start()
+            if len(self._events) >= _setting('NOTIFICATION_BATCH_SIZE', 200):
+                self._wakeup.notify()
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of rows written"""
+        with self._wakeup:
+            events, self._events = self._events, []
+        if not events:
+            return 0
+        try:
+            return write_batch(events)
+        except Exception:
+            logger.exception(f"Dropped {len(events)} notification(s)")
+            return 0
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                self._wakeup.wait(timeout=_setting('NOTIFICATION_FLUSH_SECONDS', 1))
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+buffer = NotificationBuffer()
+atexit.register(buffer.flush)
+
+
+def unread_count(user):
+    return NotificationCounter.objects.filter(user=user).values_list('unread', flat=True).first() or 0
+
+
+def inbox_page(user, cursor=None, limit=20, unread_only=False):
+    """Newest first; pass 'next_cursor' back as `cursor`. Raises ValueError for a bad cursor."""
+    limit = max(1, min(limit, MAX_INBOX_LIMIT))
+    notifications = Notification.objects.filter(recipient=user)
+    if unread_only:
+        notifications = notifications.filter(is_read=False)
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        notifications = notifications.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    page = list(notifications.select_related('actor').order_by('-created_at', '-id')[:limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+    return {
+        'results': NotificationSerializer(page, many=True).data,
+        'next_cursor': encode_cursor(page[-1].created_at, page[-1].id) if has_more else None,
+        'has_more': has_more,
+    }
+
+
+def mark_read(user, ids=None):
+    """Mark the given notifications (or all of them) read; returns how many changed"""
+    with transaction.atomic():
+        unread = Notification.objects.filter(recipient=user, is_read=False)
+        if ids is not None:
+            unread = unread.filter(pk__in=ids)
+        changed = unread.update(is_read=True)
+        if ids is None:
+            NotificationCounter.objects.filter(user=user).update(unread=0)
+        elif changed:
+            NotificationCounter.objects.filter(user=user).update(
+                unread=Greatest(F('unread') - changed, Value(0))
+            )
+    return changed
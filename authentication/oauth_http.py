@@ -0,0 +1,173 @@
+"""
+Shared HTTP plumbing for the Google and LinkedIn OAuth services.
+
+- One pooled, keep-alive requests.Session per process instead of a fresh
+  TCP/TLS handshake for every token exchange.
+- A process-local TTL cache for OpenID Connect discovery and JWKS documents,
+  so ID tokens can be verified locally without calling the userinfo endpoint.
+- aiohttp equivalents for the async OAuth callbacks, with one pooled
+  ClientSession per event loop.
+"""
+import asyncio
+import logging
+import threading
+import time
+import weakref
+
+import aiohttp
+import jwt
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) seconds applied to every outbound OAuth request
+DEFAULT_TIMEOUT = (3.05, 10)
+
+
+class OAuthSession(requests.Session):
+    """requests.Session with connection pooling and a default timeout"""
+
+    def __init__(self, pool_maxsize=10, timeout=DEFAULT_TIMEOUT):
+        super().__init__()
+        self.timeout = timeout
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+session = OAuthSession()
+
+_async_sessions = weakref.WeakKeyDictionary()
+
+
+def get_async_session():
+    """
+    Return the pooled aiohttp session for the running event loop. Under an
+    ASGI server the loop lives as long as the worker, so connections are
+    kept alive across requests.
+    """
+    loop = asyncio.get_running_loop()
+    http = _async_sessions.get(loop)
+    if http is None or http.closed:
+        http = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(sock_connect=DEFAULT_TIMEOUT[0], sock_read=DEFAULT_TIMEOUT[1]),
+            connector=aiohttp.TCPConnector(limit=10),
+        )
+        _async_sessions[loop] = http
+    return http
+
+
+async def close_async_session():
+    """
+    Close the running loop's session. Needed when an async view runs under
+    WSGI, where Django gives each request its own short-lived event loop.
+    """
+    http = _async_sessions.pop(asyncio.get_running_loop(), None)
+    if http is not None:
+        await http.close()
+
+
+class DocumentCache:
+    """
+    Thread-safe TTL cache of JSON documents keyed by URL.
+    Used for OIDC discovery documents and JWKS key sets.
+    """
+
+    def __init__(self, http=None):
+        self.http = http or session
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'OAUTH_JWKS_CACHE_TIMEOUT', 3600)
+
+    def get(self, url, force_refresh=False):
+        document = None if force_refresh else self._cached(url)
+        if document is not None:
+            return document
+
+        response = self.http.get(url)
+        response.raise_for_status()
+        document = response.json()
+        self.set(url, document)
+        return document
+
+    def _cached(self, url):
+        with self._lock:
+            entry = self._entries.get(url)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    async def aget(self, url, force_refresh=False):
+        document = None if force_refresh else self._cached(url)
+        if document is not None:
+            return document
+
+        async with get_async_session().get(url) as response:
+            response.raise_for_status()
+            document = await response.json(content_type=None)
+        self.set(url, document)
+        return document
+
+    def set(self, url, document):
+        with self._lock:
+            self._entries[url] = (time.monotonic() + self.ttl, document)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+documents = DocumentCache()
+
+
+async def averify_id_token(id_token, discovery_url, audience, issuers=None):
+    """
+    Verify an OIDC ID token's signature and claims against the provider's
+    cached JWKS. Returns the decoded claims or raises jwt.InvalidTokenError.
+
+    An unknown key id forces one JWKS refresh, so provider key rotation
+    is picked up without waiting for the cache to expire.
+    """
+    metadata = await documents.aget(discovery_url)
+    header = _signing_header(id_token, metadata)
+    jwk = _find_key(await documents.aget(metadata['jwks_uri']), header.get('kid'))
+    if jwk is None:
+        jwk = _find_key(await documents.aget(metadata['jwks_uri'], force_refresh=True), header.get('kid'))
+    return _decode(id_token, header, jwk, audience, issuers or metadata['issuer'])
+
+
+def _signing_header(id_token, metadata):
+    header = jwt.get_unverified_header(id_token)
+    algorithm = header.get('alg', 'RS256')
+    if algorithm not in metadata.get('id_token_signing_alg_values_supported', ['RS256']):
+        raise jwt.InvalidAlgorithmError(f'Unexpected ID token algorithm: {algorithm}')
+    return header
+
+
+def _decode(id_token, header, jwk, audience, issuers):
+    if jwk is None:
+        raise jwt.InvalidTokenError('No matching signing key for ID token')
+    algorithm = header.get('alg', 'RS256')
+    return jwt.decode(
+        id_token,
+        key=jwt.PyJWK(jwk, algorithm=algorithm).key,
+        algorithms=[algorithm],
+        audience=audience,
+        issuer=issuers,
+    )
+
+
+def _find_key(jwks, kid):
+    for key in jwks.get('keys', []):
+        if kid is None or key.get('kid') == kid:
+            return key
+    return None
@@ -0,0 +1,196 @@
+"""
+Outbound OTP queue.
+
+Views enqueue a verification SMS and return straight away instead of
+waiting on Twilio. Delivery depends on OTP_QUEUE_MODE:
+
+- 'thread' (default): a small in-process thread pool sends it once the
+  request's transaction commits, and schedules its own retries.
+- 'worker': nothing is sent in the web process; run
+  `python manage.py process_otp_queue` alongside it.
+- 'sync': sent inside the request (tests, local debugging).
+
+Thread-mode retries are timers inside the web process and die with it, so
+production also runs `process_otp_queue --once` every minute (the cron job
+in render.yaml) to send whatever they lost. Failed sends are retried with
+exponential backoff.
+
+A number that was sent the same kind of code within OTP_DEDUPE_WINDOW
+seconds isn't texted again. The window check alone races with a concurrent
+request, so the database also allows only one unsent message per number
+and purpose (the otp_one_in_flight constraint); the loser of that race
+reuses the winner's message.
+
+If the message can't be queued at all, or 'sync' delivery fails for good,
+enqueue_verification() raises EnqueueError so the view can say so.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .lazy_services import twilio_service
+from .models import OutboundMessage
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class EnqueueError(Exception):
+    """The verification SMS could not be queued, or was rejected for good"""
+
+
+def _recent(phone_number, purpose):
+    window_start = timezone.now() - timedelta(seconds=_setting('OTP_DEDUPE_WINDOW', 60))
+    return OutboundMessage.objects.filter(
+        phone_number=phone_number,
+        purpose=purpose,
+        created_at__gte=window_start,
+    ).exclude(status='failed').order_by('-created_at').first()
+
+
+def enqueue_verification(phone_number, purpose='verify_phone'):
+    """
+    Queue a verification SMS for phone_number. Returns (message, created);
+    created is False when a recent message to the number for the same
+    purpose was reused instead. Raises EnqueueError on failure.
+    """
+    try:
+        recent = _recent(phone_number, purpose)
+        if recent is not None:
+            logger.info(f"OTP to {phone_number} deduplicated against message {recent.pk}")
+            return recent, False
+        try:
+            with transaction.atomic():
+                message = OutboundMessage.objects.create(phone_number=phone_number, purpose=purpose)
+        except IntegrityError:
+            # A concurrent request queued the same message first
+            recent = _recent(phone_number, purpose)
+            if recent is None:
+                raise
+            return recent, False
+    except DatabaseError as e:
+        logger.exception(f"Could not queue OTP to {phone_number}")
+        raise EnqueueError('Could not queue the verification code') from e
+
+    mode = _setting('OTP_QUEUE_MODE', 'thread')
+    if mode == 'sync':
+        deliver(message.pk)
+        message.refresh_from_db()
+        if message.status == 'failed':
+            raise EnqueueError(message.last_error or 'The verification code could not be sent')
+    elif mode == 'thread':
+        transaction.on_commit(lambda: _submit(message.pk))
+    return message, True
+
+
+def deliver(message_id):
+    """
+    Claim one due message and send it. Safe to call from several workers at
+    once: the conditional UPDATE lets only one of them claim the row.
+    Returns True if the message was sent.
+    """
+    now = timezone.now()
+    lease = timedelta(seconds=_setting('OTP_QUEUE_LEASE', 300))
+    claimed = OutboundMessage.objects.filter(
+        pk=message_id,
+        status='pending',
+        next_attempt_at__lte=now,
+    ).update(status='sending', attempts=F('attempts') + 1, next_attempt_at=now + lease)
+    if not claimed:
+        return False
+
+    message = OutboundMessage.objects.get(pk=message_id)
+    try:
+        result = twilio_service().send_verification_code(message.phone_number)
+    except Exception as e:
+        logger.exception(f"OTP delivery to {message.phone_number} raised")
+        result = {'success': False, 'message': str(e), 'retryable': True}
+
+    if result['success']:
+        OutboundMessage.objects.filter(pk=message_id).update(
+            status='sent', sent_at=timezone.now(), last_error=''
+        )
+        return True
+
+    if result.get('retryable', True) and message.attempts < _setting('OTP_QUEUE_MAX_ATTEMPTS', 4):
+        delay = retry_delay(message.attempts)
+        OutboundMessage.objects.filter(pk=message_id).update(
+            status='pending',
+            next_attempt_at=timezone.now() + timedelta(seconds=delay),
+            last_error=result['message'],
+        )
+        logger.warning(f"OTP to {message.phone_number} failed (attempt {message.attempts}), retrying in {delay}s")
+        if _setting('OTP_QUEUE_MODE', 'thread') == 'thread':
+            _schedule(message_id, delay)
+    else:
+        OutboundMessage.objects.filter(pk=message_id).update(
+            status='failed', last_error=result['message']
+        )
+        logger.error(f"OTP to {message.phone_number} failed permanently: {result['message']}")
+    return False
+
+
+def dispatch_due(limit=100):
+    """
+    Send every message that is due, oldest first. Messages whose sender died
+    mid-send (lease expired while 'sending') are put back in the queue first.
+    Returns (sent, attempted).
+    """
+    now = timezone.now()
+    OutboundMessage.objects.filter(status='sending', next_attempt_at__lte=now).update(status='pending')
+
+    due = list(
+        OutboundMessage.objects.filter(status='pending', next_attempt_at__lte=now)
+        .order_by('next_attempt_at')
+        .values_list('pk', flat=True)[:limit]
+    )
+    sent = sum(1 for message_id in due if deliver(message_id))
+    return sent, len(due)
+
+
+def retry_delay(attempts):
+    """Seconds to wait before the next attempt: base * 2^(attempts - 1), capped"""
+    base = _setting('OTP_QUEUE_RETRY_BACKOFF', 5)
+    return min(base * 2 ** max(attempts - 1, 0), _setting('OTP_QUEUE_MAX_BACKOFF', 300))
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_setting('OTP_QUEUE_WORKERS', 4),
+                thread_name_prefix='otp-queue',
+            )
+        return _executor
+
+
+def _submit(message_id):
+    _get_executor().submit(_run, message_id)
+
+
+def _schedule(message_id, delay):
+    timer = threading.Timer(delay, _submit, args=(message_id,))
+    timer.daemon = True
+    timer.start()
+
+
+def _run(message_id):
+    try:
+        deliver(message_id)
+    except Exception:
+        logger.exception(f"OTP queue worker failed on message {message_id}")
+    finally:
+        close_old_connections()
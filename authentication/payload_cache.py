@@ -0,0 +1,362 @@
+"""
+Cached payloads for the homepage widgets.
+
+The featured, breaking and trending lists and the category counts are the
+same for every visitor and change only when an editor publishes something,
+yet each request rebuilt them from several queries. Each one is now built
+by a registered function and kept in the Django cache for
+PAYLOAD_CACHE_SECONDS.
+
+warm() builds every payload up front. gunicorn.conf.py runs it in the
+master before forking, so each worker starts with a full local cache
+instead of sending its first visitors to the database.
+
+Entries are versioned by their namespace's generation (cache_bus), which
+saving or deleting the model bumps, so an edit made through any worker
+retires the cached copies in all of them. Code that changes rows without
+save(), such as queryset.update() in admin actions, calls invalidate(),
+which retires the models' cached row counts (counting.py) as well.
+
+Payloads are cached as the JSON they are sent as, and the views return
+them with response(), so a hit is passed through as bytes: it is neither
+decoded nor rendered again. get() decodes one for code that needs the
+data itself.
+
+With PAYLOAD_STORE_DIR set, the payloads live in the memory-mapped
+payload_store instead of the Django cache. Every worker on the host then
+reads the same copy, and a hit is copied once, into the response.
+
+Payloads whose output depends on the clock (hackathon countdowns) are not
+cached here. Two that are carry a field computed from it: TechNews.is_recent
+and the events' days_until_event. Their builders register an expiry, read
+off the built data, and the entry is dropped at that moment whatever
+PAYLOAD_CACHE_SECONDS says. put() refuses data that is already past it, so
+a snapshot (cache_snapshot) cannot bring those fields back stale.
+"""
+import json
+import logging
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count
+from django.http import HttpResponse
+from django.utils.dateparse import parse_datetime
+
+from .cache_bus import bus
+from .counting import count_namespace
+from .payload_store import PayloadStore
+from .models import Event, NeoProject, NeoStory, RoboticsNews, StartupStory, TechNews, YouTubeVideo
+from .serializers import (
+    EventListSerializer, NeoProjectSerializer, NeoStorySerializer, RoboticsNewsSerializer,
+    StartupStorySerializer, TechNewsSerializer,
+)
+
+logger = logging.getLogger(__name__)
+
+_builders = {}
+_expiries = {}
+_MISSING = object()
+
+# Namespace (the part of a payload name before ':') each model's rows feed
+NAMESPACES = {
+    StartupStory: 'startup_story',
+    NeoStory: 'neo_story',
+    NeoProject: 'neo_project',
+    TechNews: 'tech_news',
+    RoboticsNews: 'robotics_news',
+    Event: 'event',
+    YouTubeVideo: 'youtube_video',
+}
+
+# (key, version) of each entry this process stored, by namespace, to drop on a bump
+_stored = defaultdict(set)
+
+# cache key -> (name, params) of every payload this process has served or warmed
+_requested = {}
+
+
+def payload(name, expires=None):
+    """Register the decorated function as the builder of payload `name`
+
+    expires, for payloads with fields computed from the clock, takes the
+    built data and returns the unix time those fields go stale, or None.
+    """
+    def register(builder):
+        _builders[name] = builder
+        if expires is not None:
+            _expiries[name] = expires
+        return builder
+    return register
+
+
+def cache_key(name, params=None):
+    suffix = ''.join(f':{key}={value}' for key, value in sorted((params or {}).items()))
+    return f'payload:{name}{suffix}'
+
+
+def _namespace(name):
+    return name.split(':', 1)[0]
+
+
+def _timeout():
+    return getattr(settings, 'PAYLOAD_CACHE_SECONDS', 60)
+
+
+_shared = None
+
+
+def shared_store():
+    """The PayloadStore for PAYLOAD_STORE_DIR, or None to use the Django cache"""
+    global _shared
+    directory = getattr(settings, 'PAYLOAD_STORE_DIR', '')
+    if not directory:
+        return None
+    if _shared is None or _shared.directory != directory:
+        _shared = PayloadStore(directory)
+    return _shared
+
+
+def _encode(data):
+    # Compact and unescaped, like DRF's JSONRenderer
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def _expires_at(name, data):
+    expires = _expiries.get(name)
+    return expires(data) if expires is not None else None
+
+
+def _keep(name, key, data, version):
+    """Cache data's JSON as the payload for this generation and return it; version is read before building"""
+    body = _encode(data)
+    expires_at = _expires_at(name, data)
+    timeout = _timeout()
+    if expires_at is not None:
+        timeout = min(timeout, int(expires_at - time.time()))
+        if timeout <= 0:
+            return body
+    store = shared_store()
+    if store is not None:
+        store.write(key, version, body, expires_at)
+        return body
+    cache.set(key, body, timeout, version=version)
+    _stored[_namespace(name)].add((key, version))
+    return body
+
+
+def _lookup(key, version):
+    """The cached JSON body (bytes or a memoryview into the store), or _MISSING"""
+    store = shared_store()
+    if store is None:
+        return cache.get(key, _MISSING, version=version)
+    stored = store.read(key, version, _timeout())
+    return _MISSING if stored is None else stored
+
+
+def body(name, **params):
+    """The payload's JSON, from the cache or freshly built; params must be hashable and few"""
+    key = cache_key(name, params)
+    _requested.setdefault(key, (name, params))
+    version = bus.generation(_namespace(name))
+    cached = _lookup(key, version)
+    if cached is _MISSING:
+        cached = _keep(name, key, _builders[name](**params), version)
+    return cached
+
+
+def response(name, **params):
+    """The payload as a JSON response, its cached bytes sent as they are"""
+    return HttpResponse(body(name, **params), content_type='application/json')
+
+
+def get(name, **params):
+    """The payload decoded"""
+    return json.loads(bytes(body(name, **params)))
+
+
+def put(name, params, data):
+    """Cache data as the current payload, e.g. one restored from a snapshot; False for unknown names and stale data"""
+    if name not in _builders:
+        return False
+    expires_at = _expires_at(name, data)
+    if expires_at is not None and expires_at <= time.time():
+        return False
+    key = cache_key(name, params)
+    _requested.setdefault(key, (name, params))
+    _keep(name, key, data, bus.generation(_namespace(name)))
+    return True
+
+
+def cached_entries():
+    """[(name, params, data)] for the payloads this process has used that are still cached"""
+    entries = []
+    for key, (name, params) in list(_requested.items()):
+        cached = _lookup(key, bus.generation(_namespace(name)))
+        if cached is not _MISSING:
+            entries.append((name, params, json.loads(bytes(cached))))
+    return entries
+
+
+def warm():
+    """Build every payload not already cached, with default parameters; returns {name: milliseconds}"""
+    timings = {}
+    for name, builder in _builders.items():
+        start = time.perf_counter()
+        key = cache_key(name)
+        _requested.setdefault(key, (name, {}))
+        version = bus.generation(_namespace(name))
+        if _lookup(key, version) is not _MISSING:
+            continue
+        try:
+            _keep(name, key, builder(), version)
+        except Exception:
+            logger.exception(f"Could not warm payload {name}")
+            continue
+        timings[name] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+def invalidate(*models):
+    """Retire the payloads and row counts built from these models, in every worker, after commit"""
+    bus.bump(
+        *(NAMESPACES[model] for model in models if model in NAMESPACES),
+        *(count_namespace(model) for model in models),
+    )
+
+
+def _drop(namespace):
+    for key, version in _stored.pop(namespace, set()):
+        cache.delete(key, version=version)
+
+
+for _namespace_name in NAMESPACES.values():
+    bus.subscribe(_namespace_name, _drop)
+
+
+# ----- expiries -----
+
+def _recent_until(articles):
+    """When the first article marked is_recent stops being recent (TechNews.is_recent: 24 hours)"""
+    ends = [
+        parse_datetime(article['published_at']) + timedelta(hours=24)
+        for article in articles if article.get('is_recent') and article.get('published_at')
+    ]
+    return min(ends).timestamp() if ends else None
+
+
+def _day_ends(data):
+    """Midnight after the day days_until_event was counted on (Event uses date.today())"""
+    for event in data['results']:
+        if event.get('days_until_event') is not None:
+            counted_on = date.fromisoformat(event['event_date']) - timedelta(days=event['days_until_event'])
+            return datetime.combine(counted_on + timedelta(days=1), datetime.min.time()).timestamp()
+    return None
+
+
+# ----- builders -----
+
+@payload('startup_story:featured')
+def featured_startup_story():
+    story = StartupStory.objects.filter(is_published=True, is_featured=True).first()
+    return StartupStorySerializer(story).data if story else None
+
+
+@payload('neo_story:featured')
+def featured_neo_story():
+    story = NeoStory.objects.filter(is_published=True, is_featured=True).first()
+    return NeoStorySerializer(story).data if story else None
+
+
+@payload('neo_project:featured')
+def featured_neo_projects():
+    projects = NeoProject.objects.filter(is_published=True, is_featured=True).order_by('-created_at')
+    return list(NeoProjectSerializer(projects, many=True).data)
+
+
+@payload('tech_news:featured', expires=_recent_until)
+def featured_tech_news():
+    return list(TechNewsSerializer(TechNews.objects.filter(is_published=True, is_featured=True)[:6], many=True).data)
+
+
+@payload('tech_news:breaking', expires=_recent_until)
+def breaking_tech_news():
+    return list(TechNewsSerializer(TechNews.objects.filter(is_published=True, is_breaking=True)[:5], many=True).data)
+
+
+@payload('tech_news:trending', expires=_recent_until)
+def trending_tech_news():
+    return list(TechNewsSerializer(TechNews.objects.filter(is_published=True, is_trending=True)[:8], many=True).data)
+
+
+@payload('tech_news:categories')
+def tech_news_categories():
+    # One grouped query rather than a COUNT per category
+    counts = dict(
+        TechNews.objects.filter(is_published=True).order_by()
+        .values_list('category').annotate(count=Count('id'))
+    )
+    return {
+        'categories': [
+            {'value': value, 'label': label, 'count': counts[value]}
+            for value, label in TechNews.CATEGORY_CHOICES if counts.get(value)
+        ],
+        'priorities': [{'value': v, 'label': l} for v, l in TechNews.PRIORITY_CHOICES],
+    }
+
+
+@payload('robotics_news:featured')
+def featured_robotics_news(limit=1):
+    articles = RoboticsNews.objects.filter(is_published=True, is_featured=True).order_by('-created_at')[:limit]
+    data = list(RoboticsNewsSerializer(articles, many=True).data)
+    return {'results': data, 'count': len(data)}
+
+
+@payload('robotics_news:trending')
+def trending_robotics_news(limit=4):
+    articles = RoboticsNews.objects.filter(is_published=True).order_by(
+        '-views_count', '-likes_count', '-created_at'
+    )[:limit]
+    data = list(RoboticsNewsSerializer(articles, many=True).data)
+    return {'results': data, 'count': len(data)}
+
+
+@payload('event:featured', expires=_day_ends)
+def featured_events():
+    events = Event.objects.filter(is_published=True, is_featured=True).order_by('display_order', '-event_date')
+    data = list(EventListSerializer(events, many=True).data)
+    return {'results': data, 'count': len(data)}
+
+
+@payload('event:categories')
+def event_categories():
+    categories = Event.objects.filter(is_published=True).values('category').annotate(
+        count=Count('id')
+    ).order_by('-count')
+    return {'categories': list(categories)}
+
+
+@payload('youtube_video:featured')
+def featured_youtube_videos():
+    videos = YouTubeVideo.objects.filter(is_published=True, is_featured=True).order_by('display_order', '-created_at')
+    videos_data = [
+        {
+            'id': video.id,
+            'title': video.title,
+            'description': video.description,
+            'slug': video.slug,
+            'video_id': video.video_id,
+            'embed_url': video.embed_url,
+            'video_type': video.video_type,
+            'category': video.category,
+            'thumbnail': video.thumbnail,
+            'autoplay': video.autoplay,
+            'duration': video.duration,
+            'watch_url': video.watch_url,
+        }
+        for video in videos
+    ]
+    return {'count': len(videos_data), 'featured_videos': videos_data}
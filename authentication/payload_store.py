@@ -0,0 +1,118 @@
+"""
+Memory-mapped store for the homepage payloads, shared by the workers on a host.
+
+With the locmem cache every worker holds its own copy of each payload. When
+PAYLOAD_STORE_DIR is set, payload_cache keeps them here instead: one file
+per payload holding a small header and the JSON, under a directory that
+should live on tmpfs (/dev/shm on Linux) so the pages are plain shared
+memory.
+
+- Writing: whoever builds a payload first (the warmup in the gunicorn
+  master, or the first worker to find it stale) writes a new file next to
+  the old one and swaps it in with os.replace(). A non-blocking flock keeps
+  it to one writer per payload; a worker that loses the race serves what
+  it built without writing it.
+- Reading: a worker maps each file once and gets a memoryview of the JSON
+  straight from the mapping, without copying. One os.stat() per read
+  tells it when the file has been swapped, and it maps the new one; views
+  into the old mapping stay valid until they are dropped.
+- Versioning: the header records the cache_bus generation, the build
+  time and, for payloads with clock-dependent fields, when those go stale.
+  A copy built for an older generation, older than PAYLOAD_CACHE_SECONDS
+  or past its expiry reads as missing, so every worker sees the same bytes
+  and no worker can serve a payload another one has retired.
+"""
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, the swap is still atomic
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'NSXPAY02'
+HEADER = struct.Struct('<8sQddI')  # magic, generation, built_at, expires_at (unix times), body length
+
+
+class PayloadStore:
+    """Versioned payload files under one directory, mapped read-only by every reader"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._maps = {}  # path -> (stamp, mmap)
+        self._lock = threading.Lock()
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + '.payload')
+
+    def _mapping(self, path):
+        """This process's mapping of the file's current version, or None"""
+        try:
+            info = os.stat(path)
+        except FileNotFoundError:
+            return None
+        stamp = (info.st_ino, info.st_mtime_ns, info.st_size)
+        cached = self._maps.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        with self._lock:
+            cached = self._maps.get(path)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+            try:
+                with open(path, 'rb') as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (FileNotFoundError, ValueError):
+                # Swapped out from under us, or empty
+                return None
+            # The replaced mapping is unmapped once the last view into it is gone
+            self._maps[path] = (stamp, mapped)
+            return mapped
+
+    def read(self, key, generation, max_age):
+        """memoryview of the stored bytes, or None if missing, stale or from another generation"""
+        mapped = self._mapping(self._path(key))
+        if mapped is None or len(mapped) < HEADER.size:
+            return None
+        magic, stored_generation, built_at, expires_at, length = HEADER.unpack_from(mapped)
+        if magic != MAGIC or stored_generation != generation:
+            return None
+        now = time.time()
+        if now - built_at > max_age or now >= expires_at:
+            return None
+        return memoryview(mapped)[HEADER.size:HEADER.size + length]
+
+    def write(self, key, generation, body, expires_at=None):
+        """Swap in a new version; returns False if another process is writing this key"""
+        if expires_at is None:
+            expires_at = float('inf')
+        path = self._path(key)
+        with open(f'{path}.lock', 'a') as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return False
+            fd, temporary = tempfile.mkstemp(dir=self.directory, prefix='.writing-')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(HEADER.pack(MAGIC, generation, time.time(), expires_at, len(body)))
+                    f.write(body)
+                os.replace(temporary, path)
+            except OSError:
+                logger.exception(f"Could not store payload {key}")
+                if os.path.exists(temporary):
+                    os.unlink(temporary)
+                return False
+        return True
+
@@ -0,0 +1,123 @@
+"""
+Comment like/dislike bookkeeping.
+
+A reaction change is applied as +/-1 deltas to Comment.likes_count and
+dislikes_count with F() expressions, in the same transaction as the
+CommentLike write, instead of recounting every reaction on the comment.
+reconcile_counts() (manage.py reconcile_comment_counts) repairs any drift.
+
+Reactions don't take a feed change number (comment_feed.py), so toggles
+never wait on the thread's CommentThread row. The counts reach feed
+readers with the comment's row: on page reads, and in ?since= deltas
+whenever the comment itself changes.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Comment, CommentLike
+
+
+def apply_reaction(user, comment, reaction, toggle=True):
+    """
+    Set `user`'s reaction on a comment. With toggle=True, repeating the
+    current reaction removes it. Returns a dict with the action taken
+    ('added', 'updated', 'removed' or 'unchanged'), the comment's new
+    counts and the user's reaction afterwards.
+    """
+    comment_id = comment.pk
+    with transaction.atomic():
+        existing = CommentLike.objects.select_for_update().filter(user=user, comment_id=comment_id).first()
+        before = existing.reaction if existing else None
+
+        if existing is None:
+            try:
+                with transaction.atomic():
+                    CommentLike.objects.create(user=user, comment_id=comment_id, reaction=reaction)
+                action, after = 'added', reaction
+            except IntegrityError:
+                # A concurrent request from the same user got there first
+                existing = CommentLike.objects.select_for_update().get(user=user, comment_id=comment_id)
+                before = existing.reaction
+
+        if existing is not None:
+            if before == reaction and toggle:
+                existing.delete()
+                action, after = 'removed', None
+            elif before == reaction:
+                action, after = 'unchanged', reaction
+            else:
+                existing.reaction = reaction
+                existing.save(update_fields=['reaction'])
+                action, after = 'updated', reaction
+
+        delta = {'like': 0, 'dislike': 0}
+        if before:
+            delta[before] -= 1
+        if after:
+            delta[after] += 1
+
+        comments = Comment.objects.filter(pk=comment_id)
+        if delta['like'] or delta['dislike']:
+            comments.update(
+                likes_count=Greatest(F('likes_count') + delta['like'], Value(0)),
+                dislikes_count=Greatest(F('dislikes_count') + delta['dislike'], Value(0)),
+                updated_at=timezone.now(),
+            )
+        likes, dislikes = comments.values_list('likes_count', 'dislikes_count').get()
+
+        if action in ('added', 'updated'):
+            from .notifications import notify
+            notify(comment.user_id, user.pk, after, comment)
+
+    return {
+        'action': action,
+        'likes_count': likes,
+        'dislikes_count': dislikes,
+        'user_reaction': after,
+    }
+
+
+def _reaction_count(reaction):
+    counts = (
+        CommentLike.objects.filter(comment=OuterRef('pk'), reaction=reaction)
+        .order_by()
+        .values('comment')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def reconcile_counts(batch_size=1000, dry_run=False):
+    """
+    Find comments whose stored counters disagree with their CommentLike rows
+    and recompute them. Works through the table in primary-key batches;
+    each fix is a single UPDATE computing the counts in the database, so it
+    doesn't overwrite toggles made while it runs. Returns the ids fixed.
+    """
+    fixed = []
+    last_pk = 0
+    while True:
+        batch = list(
+            Comment.objects.filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not batch:
+            return fixed
+        last_pk = batch[-1]
+
+        drifted = list(
+            Comment.objects.filter(pk__in=batch)
+            .annotate(actual_likes=_reaction_count('like'), actual_dislikes=_reaction_count('dislike'))
+            .exclude(likes_count=F('actual_likes'), dislikes_count=F('actual_dislikes'))
+            .values_list('pk', flat=True)
+        )
+        if drifted and not dry_run:
+            Comment.objects.filter(pk__in=drifted).update(
+                likes_count=_reaction_count('like'),
+                dislikes_count=_reaction_count('dislike'),
+            )
+        fixed.extend(drifted)
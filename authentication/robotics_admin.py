@@ -1,5 +1,8 @@
 from django.contrib import admin
+from django.utils import timezone
 from . import models
+from .counting import EstimatedCountPaginator
+from .payload_cache import invalidate
 
 @admin.register(models.RoboticsNews)
 class RoboticsNewsAdmin(admin.ModelAdmin):
@@ -8,6 +11,8 @@ class RoboticsNewsAdmin(admin.ModelAdmin):
     search_fields = ('title', 'subtitle', 'summary', 'content', 'author_name', 'company_mentioned', 'technology_focus')
     readonly_fields = ('slug', 'views_count', 'likes_count', 'shares_count', 'comments_count', 'created_at', 'updated_at', 'published_at', 'youtube_embed_url')
     ordering = ('-created_at',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Article Information', {
@@ -45,21 +50,26 @@ class RoboticsNewsAdmin(admin.ModelAdmin):
     actions = ['mark_as_featured', 'mark_as_published', 'mark_as_breaking', 'reset_engagement']
     
     def mark_as_featured(self, request, queryset):
-        queryset.update(is_featured=True)
+        queryset.update(is_featured=True, updated_at=timezone.now())
+        invalidate(models.RoboticsNews)
         self.message_user(request, f'{queryset.count()} articles marked as featured.')
     mark_as_featured.short_description = "Mark selected articles as featured"
     
     def mark_as_published(self, request, queryset):
-        queryset.update(is_published=True)
+        queryset.update(is_published=True, updated_at=timezone.now())
+        invalidate(models.RoboticsNews)
         self.message_user(request, f'{queryset.count()} articles published.')
     mark_as_published.short_description = "Publish selected articles"
     
     def mark_as_breaking(self, request, queryset):
-        queryset.update(is_breaking=True)
+        queryset.update(is_breaking=True, updated_at=timezone.now())
+        invalidate(models.RoboticsNews)
         self.message_user(request, f'{queryset.count()} articles marked as breaking news.')
     mark_as_breaking.short_description = "Mark as breaking news"
     
     def reset_engagement(self, request, queryset):
-        queryset.update(views_count=0, likes_count=0, shares_count=0, comments_count=0)
+        # comments_count is maintained from the Comment table, so it is left alone
+        queryset.update(views_count=0, likes_count=0, shares_count=0, updated_at=timezone.now())
+        invalidate(models.RoboticsNews)
         self.message_user(request, f'Engagement metrics reset for {queryset.count()} articles.')
     reset_engagement.short_description = "Reset engagement metrics to 0"
\ No newline at end of file
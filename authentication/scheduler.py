@@ -0,0 +1,160 @@
+"""
+Time-driven state transitions for SharXathon.status and Event.event_type.
+
+Both fields depend on the clock, not just on edits, so rows drift out of
+date between saves. advance_states() moves every row whose deadline has
+passed into its next state with one bulk UPDATE per transition. Each
+transition filters on the current state plus a deadline range, which the
+(status, <deadline>) indexes answer directly; already-advanced rows never
+match again, so a missed or repeated run is harmless.
+
+Production runs `python manage.py advance_states` from the Render cron job
+in render.yaml, and nothing else does: a second runner would only repeat
+the same UPDATEs, and a lock shared by every host would have to live in the
+database.
+
+Public listings don't rely on it having run: current_state_q() matches
+rows by the state the next run would give them, so a late or missing run
+never shows a closed registration as open.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Event, SharXathon
+
+logger = logging.getLogger(__name__)
+
+# Sent after a bulk transition with sender=<model>, pks=[...], slugs=[...],
+# field=<name> and value=<new state>. Bulk UPDATEs skip post_save, so anything
+# caching these rows should listen here as well.
+state_changed = Signal()
+
+
+def sharxathon_status(registration_deadline, start_datetime, end_datetime, current, now=None):
+    """
+    The status a hackathon should have at `now`. Cancelled hackathons stay
+    cancelled; before the registration deadline an explicitly chosen status
+    other than 'upcoming' is left alone.
+    """
+    now = now or timezone.now()
+    if current == 'cancelled':
+        return current
+    if now >= end_datetime:
+        return 'completed'
+    if now >= start_datetime:
+        return 'ongoing'
+    if now >= registration_deadline:
+        return 'upcoming'
+    return 'registration_open' if current == 'upcoming' else current
+
+
+def sharxathon_transitions(now):
+    """(new status, filter kwargs) pairs, latest stage first"""
+    return [
+        ('completed', {
+            'status__in': ['registration_open', 'upcoming', 'ongoing'],
+            'end_datetime__lte': now,
+        }),
+        ('ongoing', {
+            'status__in': ['registration_open', 'upcoming'],
+            'start_datetime__lte': now,
+            'end_datetime__gt': now,
+        }),
+        ('upcoming', {
+            'status': 'registration_open',
+            'registration_deadline__lte': now,
+            'start_datetime__gt': now,
+        }),
+        ('registration_open', {
+            'status': 'upcoming',
+            'registration_deadline__gt': now,
+        }),
+    ]
+
+
+def event_transitions(today):
+    """
+    (new type, filter kwargs) pairs. An event is 'upcoming' until its date,
+    'recent' for EVENT_RECENT_DAYS afterwards and 'past' after that. Only
+    forward moves are made, so an editor can still file an event early.
+    """
+    recent_cutoff = today - timedelta(days=getattr(settings, 'EVENT_RECENT_DAYS', 30))
+    return [
+        ('past', {
+            'event_type__in': ['upcoming', 'recent'],
+            'event_date__lt': recent_cutoff,
+        }),
+        ('recent', {
+            'event_type': 'upcoming',
+            'event_date__lt': today,
+            'event_date__gte': recent_cutoff,
+        }),
+    ]
+
+
+def current_state_q(field, transitions, value):
+    """
+    Q for rows whose `field` is `value` once the due `transitions` are
+    applied: rows a transition moves to `value`, plus rows already there
+    that no transition moves. Like _apply(), the first matching transition
+    wins.
+    """
+    matched = Q()
+    q = Q()
+    for new_value, filters in transitions:
+        condition = Q(**filters)
+        if new_value == value:
+            q |= condition & ~matched if matched else condition
+        matched |= condition
+    return q | (Q(**{field: value}) & ~matched)
+
+
+def sharxathon_status_q(status, now=None):
+    return current_state_q('status', sharxathon_transitions(now or timezone.now()), status)
+
+
+def event_type_q(event_type, today=None):
+    return current_state_q('event_type', event_transitions(today or timezone.localdate()), event_type)
+
+
+def advance_states(now=None):
+    """
+    Apply every due transition. Returns {'sharxathon': {status: count},
+    'event': {event_type: count}} for the rows that changed.
+    """
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    return {
+        'sharxathon': _apply(SharXathon, 'status', sharxathon_transitions(now), now),
+        'event': _apply(Event, 'event_type', event_transitions(today), now),
+    }
+
+
+def _apply(model, field, transitions, now):
+    changed = {}
+    for value, filters in transitions:
+        with transaction.atomic():
+            rows = list(
+                model.objects.select_for_update()
+                .filter(**filters)
+                .order_by()
+                .values_list('pk', 'slug')
+            )
+            if not rows:
+                continue
+            pks = [pk for pk, _ in rows]
+            updated = model.objects.filter(pk__in=pks, **filters).update(**{field: value, 'updated_at': now})
+
+        changed[value] = updated
+        logger.info(f"Moved {updated} {model.__name__} row(s) to {field}={value}")
+        state_changed.send(
+            sender=model, pks=pks, slugs=[slug for _, slug in rows], field=field, value=value
+        )
+    return changed
+
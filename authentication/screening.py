@@ -0,0 +1,158 @@
+"""
+Comment screening against the admin-managed ScreeningTerm list.
+
+All active terms are compiled into one Aho-Corasick automaton, so screening
+a comment is a single pass over its text however long the list is. The
+automaton is rebuilt only when the list changes: saves and deletes in this
+process invalidate it straight away (see signals.py), and other workers
+notice a changed list through a cheap aggregate checked at most every
+SCREENING_RECHECK_SECONDS.
+
+Matching is case-insensitive on whole words or phrases, with runs of
+whitespace treated as one space. A 'hold' match unpublishes the comment
+until a moderator approves it; a 'flag' match publishes it but puts it in
+the moderation queue.
+"""
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+
+from .models import ScreeningTerm
+
+
+def normalize(text):
+    return ' '.join(text.casefold().split())
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over a fixed list of terms"""
+
+    def __init__(self, terms):
+        self.terms = [normalize(term) for term in terms]
+        self._goto = [{}]
+        self._fail = [0]
+        self._ends = [None]   # index of the term ending exactly at this state
+        self._dict = [0]      # nearest state on the fail chain where a term ends
+        for index, term in enumerate(self.terms):
+            if term:
+                self._add(term, index)
+        self._link()
+
+    def _add(self, term, index):
+        state = 0
+        for char in term:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._ends.append(None)
+                self._dict.append(0)
+            state = nxt
+        if self._ends[state] is None:
+            self._ends[state] = index
+
+    def _link(self):
+        """Breadth-first pass setting failure and dictionary-suffix links"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[nxt] = fail
+                self._dict[nxt] = fail if self._ends[fail] is not None else self._dict[fail]
+                queue.append(nxt)
+
+    def find(self, text):
+        """(start, end, term index) for every whole-word match in normalized text"""
+        goto, fail, ends, dict_link = self._goto, self._fail, self._ends, self._dict
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            match = state if ends[state] is not None else dict_link[state]
+            while match:
+                index = ends[match]
+                end = position + 1
+                start = end - len(self.terms[index])
+                if self._bounded(text, start, end):
+                    yield start, end, index
+                match = dict_link[match]
+
+    @staticmethod
+    def _bounded(text, start, end):
+        """True unless the match is glued to letters/digits, e.g. 'ass' in 'class'"""
+        if start > 0 and text[start].isalnum() and text[start - 1].isalnum():
+            return False
+        if end < len(text) and text[end - 1].isalnum() and text[end].isalnum():
+            return False
+        return True
+
+
+class TermScreener:
+    """The compiled active term list, rebuilt when it changes"""
+
+    def __init__(self):
+        self._compiled = (KeywordMatcher([]), [])  # swapped as one so readers never mix lists
+        self._signature = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def recheck_interval(self):
+        return getattr(settings, 'SCREENING_RECHECK_SECONDS', 30)
+
+    def invalidate(self):
+        self._checked_at = None
+
+    def _signature_now(self):
+        summary = ScreeningTerm.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(is_active=True)),
+            latest=Max('updated_at'),
+        )
+        return summary['total'], summary['active'], summary['latest']
+
+    def _current(self):
+        checked_at = self._checked_at
+        if checked_at is not None and time.monotonic() - checked_at <= self.recheck_interval:
+            return self._compiled
+
+        with self._lock:
+            signature = self._signature_now()
+            if signature != self._signature:
+                rows = list(ScreeningTerm.objects.filter(is_active=True).values_list('term', 'action'))
+                self._compiled = (KeywordMatcher([term for term, _ in rows]), [action for _, action in rows])
+                self._signature = signature
+            self._checked_at = time.monotonic()
+            return self._compiled
+
+    def screen(self, text):
+        """
+        {'action': 'hold' | 'flag' | None, 'terms': [matched terms, in text order]}.
+        'hold' wins over 'flag' when both kinds of term match.
+        """
+        matcher, actions = self._current()
+        matched = {}
+        for _, _, index in matcher.find(normalize(text)):
+            matched.setdefault(index, actions[index])
+
+        found = set(matched.values())
+        action = 'hold' if 'hold' in found else 'flag' if found else None
+        return {'action': action, 'terms': [matcher.terms[index] for index in matched]}
+
+
+screener = TermScreener()
+
+
+def screen(text):
+    return screener.screen(text)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
-from . import models
+from . import content_registry, models, screening
+from .reactions import apply_reaction
 import re
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -130,10 +131,10 @@ class StartupStorySerializer(serializers.ModelSerializer):
             'key_takeaways', 'challenges_faced', 'solutions_implemented',
             'featured_image', 'video_url', 'additional_images', 'featured_screen',
             'industry', 'stage', 'tags', 'founder_name', 'company_name',
-            'founded_year', 'is_featured', 'is_published', 'views_count',
+            'founded_year', 'is_featured', 'is_published', 'views_count', 'comments_count',
             'created_at', 'updated_at', 'published_at', 'author_name'
         ]
-        read_only_fields = ['id', 'views_count', 'created_at', 'updated_at', 'published_at', 'author_name']
+        read_only_fields = ['id', 'views_count', 'comments_count', 'created_at', 'updated_at', 'published_at', 'author_name']
 
 
 class NeoStorySerializer(serializers.ModelSerializer):
@@ -144,10 +145,10 @@ class NeoStorySerializer(serializers.ModelSerializer):
         fields = [
             'id', 'header', 'slug', 'main_image', 'introduction', 'sections',
             'category', 'tags', 'author_name', 'read_time', 'featured_screen',
-            'is_featured', 'is_published', 'views_count', 'created_at', 'updated_at',
+            'is_featured', 'is_published', 'views_count', 'comments_count', 'created_at', 'updated_at',
             'published_at', 'author_username'
         ]
-        read_only_fields = ['id', 'views_count', 'created_at', 'updated_at', 'published_at', 'author_username']
+        read_only_fields = ['id', 'views_count', 'comments_count', 'created_at', 'updated_at', 'published_at', 'author_username']
 
 
 class SharXathonSerializer(serializers.ModelSerializer):
@@ -168,12 +169,12 @@ class SharXathonSerializer(serializers.ModelSerializer):
             'requirements', 'organizer_name', 'organizer_email', 'organizer_phone',
             'website_url', 'registration_url', 'discord_url', 'social_links',
             'judging_criteria', 'sponsors', 'status', 'is_featured', 'is_published',
-            'views_count', 'created_at', 'updated_at', 'published_at', 'created_by_username',
+            'views_count', 'comments_count', 'created_at', 'updated_at', 'published_at', 'created_by_username',
             'time_until_start', 'time_until_end', 'participation_percentage',
             'is_registration_open', 'is_active'
         ]
         read_only_fields = [
-            'id', 'views_count', 'created_at', 'updated_at', 'published_at',
+            'id', 'views_count', 'comments_count', 'created_at', 'updated_at', 'published_at',
             'created_by_username', 'time_until_start', 'time_until_end',
             'participation_percentage', 'is_registration_open', 'is_active'
         ]
@@ -219,13 +220,13 @@ class TechNewsSerializer(serializers.ModelSerializer):
             'video_url', 'gallery_images', 'featured_screen', 'source_name', 'source_url', 
             'author_name', 'author_bio', 'author_avatar', 'priority', 
             'priority_display', 'read_time_minutes', 'views_count', 'likes_count',
-            'shares_count', 'related_links', 'key_points', 'is_published',
+            'shares_count', 'comments_count', 'related_links', 'key_points', 'is_published',
             'is_featured', 'is_breaking', 'is_trending', 'published_at',
             'meta_description', 'meta_keywords', 'created_at', 'updated_at',
             'engagement_score', 'is_recent'
         ]
         read_only_fields = [
-            'id', 'slug', 'views_count', 'likes_count', 'shares_count',
+            'id', 'slug', 'views_count', 'likes_count', 'shares_count', 'comments_count',
             'created_at', 'updated_at', 'engagement_score', 'is_recent',
             'category_display', 'priority_display'
         ]
@@ -250,12 +251,13 @@ class TalkEpisodeSerializer(serializers.ModelSerializer):
             'featured_screen',
             'speaker_panels',
             'duration_minutes',
+            'comments_count',
             'published_at',
             'is_published',
             'created_at',
             'updated_at'
         ]
-        read_only_fields = ['slug', 'created_at', 'updated_at', 'youtube_embed_url']
+        read_only_fields = ['slug', 'comments_count', 'created_at', 'updated_at', 'youtube_embed_url']
 
 
 class RoboticsNewsSerializer(serializers.ModelSerializer):
@@ -345,11 +347,18 @@ class CommentSerializer(serializers.ModelSerializer):
         if obj.is_reply:
             return []
         
-        replies = obj.replies.filter(is_approved=True).order_by('created_at')[:10]  # Limit replies
+        replies = getattr(obj, 'shown_replies', None)  # prefetched by comment_feed.listing_page
+        if replies is None:
+            replies = list(obj.replies.filter(is_approved=True).order_by('created_at')[:10])  # Limit replies
+        for reply in replies:
+            # Replies are on the same content as their parent
+            reply._content_title = obj.get_content_title()
         return CommentSerializer(replies, many=True, context=self.context).data
     
     def get_user_reaction(self, obj):
         """Get current user's reaction to this comment"""
+        if 'user_reactions' in self.context:
+            return self.context['user_reactions'].get(obj.id)
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             try:
@@ -374,6 +383,63 @@ class CommentSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class CommentDeltaSerializer(serializers.ModelSerializer):
+    """Flat comment for the incremental feed; replies arrive as their own rows"""
+    user_name = serializers.CharField(source='user.username', read_only=True)
+    is_reply = serializers.BooleanField(read_only=True)
+    user_reaction = serializers.SerializerMethodField()
+
+    class Meta:
+        model = models.Comment
+        fields = [
+            'id', 'user', 'user_name', 'content_type', 'content_slug', 'text', 'parent',
+            'is_reply', 'likes_count', 'dislikes_count', 'created_at', 'updated_at', 'user_reaction'
+        ]
+        read_only_fields = fields
+
+    def get_user_reaction(self, obj):
+        """Current user's reaction, looked up in bulk by the caller"""
+        return self.context.get('user_reactions', {}).get(obj.id)
+
+
+class ModerationCommentSerializer(serializers.ModelSerializer):
+    """Queue row for moderators: no replies, reactions or content title lookups"""
+    user_name = serializers.CharField(source='user.username', read_only=True)
+
+    class Meta:
+        model = models.Comment
+        fields = [
+            'id', 'user', 'user_name', 'content_type', 'content_slug', 'text', 'parent',
+            'is_approved', 'is_flagged', 'flagged_reason', 'likes_count', 'dislikes_count', 'created_at'
+        ]
+        read_only_fields = fields
+
+
+class ActivityCommentSerializer(serializers.ModelSerializer):
+    """A user's own comment in their activity feed; titles are attached in bulk by the caller"""
+    content_title = serializers.CharField(source='get_content_title', read_only=True)
+
+    class Meta:
+        model = models.Comment
+        fields = [
+            'id', 'content_type', 'content_slug', 'content_title', 'text', 'parent', 'is_approved',
+            'is_flagged', 'likes_count', 'dislikes_count', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    actor_name = serializers.CharField(source='actor.username', read_only=True)
+
+    class Meta:
+        model = models.Notification
+        fields = [
+            'id', 'kind', 'actor', 'actor_name', 'comment', 'content_type', 'content_slug',
+            'preview', 'is_read', 'created_at'
+        ]
+        read_only_fields = fields
+
+
 class CommentCreateSerializer(serializers.ModelSerializer):
     """Simplified serializer for creating comments"""
     
@@ -381,6 +447,25 @@ class CommentCreateSerializer(serializers.ModelSerializer):
         model = models.Comment
         fields = ['content_type', 'content_slug', 'text', 'parent']
     
+    def validate(self, attrs):
+        content_type = attrs.get('content_type', getattr(self.instance, 'content_type', None))
+        content_slug = attrs.get('content_slug', getattr(self.instance, 'content_slug', None))
+        if self.instance is None or 'content_type' in attrs or 'content_slug' in attrs:
+            object_id = content_registry.resolve_object_id(content_type, content_slug)
+            if object_id is None:
+                raise serializers.ValidationError({'content_slug': 'Content not found'})
+            attrs['object_id'] = object_id
+        
+        if 'text' in attrs:
+            result = screening.screen(attrs['text'])
+            if result['action']:
+                # Screening only ever adds a flag; clearing one is a moderator's call
+                attrs['is_flagged'] = True
+                attrs['flagged_reason'] = f"Screening matched: {', '.join(result['terms'])}"[:255]
+                if result['action'] == 'hold':
+                    attrs['is_approved'] = False
+        return attrs
+    
     def create(self, validated_data):
         request = self.context.get('request')
         validated_data['user'] = request.user
@@ -394,22 +479,11 @@ class CommentLikeSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         request = self.context.get('request')
-        validated_data['user'] = request.user
-        
-        # Update or create the reaction
-        comment_like, created = models.CommentLike.objects.update_or_create(
-            user=request.user,
-            comment=validated_data['comment'],
-            defaults={'reaction': validated_data['reaction']}
-        )
         
-        # Update comment counts
-        comment = validated_data['comment']
-        comment.likes_count = comment.reactions.filter(reaction='like').count()
-        comment.dislikes_count = comment.reactions.filter(reaction='dislike').count()
-        comment.save()
+        # Set (not toggle) the reaction, adjusting the counters in the same transaction
+        apply_reaction(request.user, validated_data['comment'], validated_data['reaction'], toggle=False)
         
-        return comment_like
+        return models.CommentLike.objects.get(user=request.user, comment=validated_data['comment'])
 
 
 class NeoProjectSerializer(serializers.ModelSerializer):
@@ -428,12 +502,12 @@ class NeoProjectSerializer(serializers.ModelSerializer):
             'usage_instructions', 'developer_name', 'developer_email',
             'collaborators', 'collaborator_list', 'tags', 'tag_list',
             'license', 'version', 'featured_screen', 'is_featured', 'is_published', 'is_open_source',
-            'views_count', 'stars_count', 'created_at', 'updated_at',
+            'views_count', 'stars_count', 'comments_count', 'created_at', 'updated_at',
             'published_at', 'project_start_date', 'project_completion_date',
             'author_username'
         ]
         read_only_fields = [
-            'id', 'views_count', 'created_at', 'updated_at', 'published_at',
+            'id', 'views_count', 'comments_count', 'created_at', 'updated_at', 'published_at',
             'author_username', 'technology_list', 'tag_list', 'collaborator_list'
         ]
 
@@ -459,12 +533,12 @@ class NeoProjectDetailSerializer(serializers.ModelSerializer):
             'usage_instructions', 'developer_name', 'developer_email',
             'collaborators', 'collaborator_list', 'tags', 'tag_list',
             'license', 'version', 'featured_screen', 'is_featured', 'is_published', 'is_open_source',
-            'views_count', 'stars_count', 'created_at', 'updated_at',
+            'views_count', 'stars_count', 'comments_count', 'created_at', 'updated_at',
             'published_at', 'project_start_date', 'project_completion_date',
             'author_username', 'owner', 'links'
         ]
         read_only_fields = [
-            'id', 'views_count', 'created_at', 'updated_at', 'published_at',
+            'id', 'views_count', 'comments_count', 'created_at', 'updated_at', 'published_at',
             'author_username', 'technology_list', 'tag_list', 'collaborator_list', 'owner', 'links'
         ]
     
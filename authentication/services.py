@@ -40,15 +40,19 @@ class TwilioService:
             }
         except TwilioException as e:
             logger.error(f"Twilio error: {str(e)}")
+            # 4xx other than rate limiting (bad number, blocked region...) won't succeed on retry
+            status_code = getattr(e, 'status', None)
             return {
                 'success': False,
-                'message': f'Failed to send verification code: {str(e)}'
+                'message': f'Failed to send verification code: {str(e)}',
+                'retryable': status_code is None or status_code == 429 or status_code >= 500
             }
         except Exception as e:
             logger.error(f"Unexpected error: {str(e)}")
             return {
                 'success': False,
-                'message': 'An unexpected error occurred'
+                'message': 'An unexpected error occurred',
+                'retryable': True
             }
     
     def verify_code(self, phone_number, code):
@@ -4,6 +4,7 @@ Add this to your main admin.py file
 """
 
 from django.contrib import admin
+from .counting import EstimatedCountPaginator
 from .models import SharXathon
 
 @admin.register(SharXathon)
@@ -14,6 +15,8 @@ class SharXathonAdmin(admin.ModelAdmin):
     readonly_fields = ('views_count', 'created_at', 'updated_at', 'published_at', 'slug', 'time_until_start', 'time_until_end', 'participation_percentage')
     ordering = ('-start_datetime',)
     date_hierarchy = 'start_datetime'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Basic Information', {
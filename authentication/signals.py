@@ -0,0 +1,113 @@
+"""
+Signal handlers for the authentication app
+"""
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import content_registry, payload_cache
+from .authentication import IGNORED_USER_FIELDS, invalidate_token, invalidate_user_tokens
+from .cache_bus import bus
+from .comment_counts import counted_key, record_change
+from .comment_feed import record_deletion
+from .countdown import NAMESPACE as COUNTDOWN_NAMESPACE, schedule as countdown_schedule
+from .notifications import notify
+from .models import Comment, CustomUser, ScreeningTerm, SharXathon
+from .scheduler import state_changed
+from .screening import screener
+
+
+@receiver(post_delete, sender=Token)
+def drop_deleted_token(sender, instance, **kwargs):
+    """Logout (and user deletion) removes the token; forget it immediately"""
+    invalidate_token(instance)
+
+
+@receiver(post_save, sender=CustomUser)
+def drop_tokens_on_user_save(sender, instance, created, update_fields=None, **kwargs):
+    """Password resets and profile edits must not be served from a stale cached user"""
+    if created or (update_fields is not None and set(update_fields) <= IGNORED_USER_FIELDS):
+        return
+    invalidate_user_tokens(instance)
+
+
+@receiver(post_save, sender=SharXathon)
+@receiver(post_delete, sender=SharXathon)
+@receiver(state_changed, sender=SharXathon)
+def reload_countdown_schedule(sender, **kwargs):
+    """Countdown streams pick up edits on their next tick, here now and in other workers after commit"""
+    countdown_schedule.invalidate()
+    bus.bump(COUNTDOWN_NAMESPACE)
+
+
+@receiver(post_save, sender=ScreeningTerm)
+@receiver(post_delete, sender=ScreeningTerm)
+def recompile_screening_terms(sender, **kwargs):
+    """The next comment screened in this process rebuilds the automaton"""
+    screener.invalidate()
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_deleted_comment(sender, instance, **kwargs):
+    """Runs inside the delete's transaction, once per comment, cascaded replies included"""
+    if hasattr(instance, '_counted_key'):
+        before = instance._counted_key
+    else:
+        before = counted_key(instance.content_type, instance.object_id, instance.is_approved)
+    record_change(before, None)
+
+
+@receiver(post_delete, sender=Comment)
+def leave_comment_tombstone(sender, instance, **kwargs):
+    """Open feeds and streams on the thread report the deletion once it commits"""
+    record_deletion(instance)
+
+
+@receiver(post_save, sender=Comment)
+def notify_parent_author(sender, instance, created, **kwargs):
+    """Tell the author of the comment being replied to; held replies stay silent"""
+    if created and instance.parent_id and instance.is_approved:
+        notify(instance.parent.user_id, instance.user_id, 'reply', instance)
+
+
+def remember_slug(sender, instance, **kwargs):
+    """The slug as loaded (None if deferred), so follow_slug_rename can tell if a save changed it"""
+    instance._stored_slug = instance.__dict__.get('slug')
+
+
+def follow_slug_rename(sender, instance, created, update_fields=None, **kwargs):
+    """Comments keep their object_id across a rename; refresh their copy of the slug"""
+    if update_fields is not None and 'slug' not in update_fields:
+        return
+    stored, instance._stored_slug = getattr(instance, '_stored_slug', None), instance.slug
+    if created or stored == instance.slug:
+        return
+    kind = content_registry.for_model(sender)
+    Comment.objects.filter(content_type=kind.key, object_id=instance.pk).exclude(
+        content_slug=instance.slug
+    ).update(content_slug=instance.slug)
+
+
+for _kind in content_registry.kinds():
+    post_init.connect(remember_slug, sender=_kind.model, dispatch_uid=f'remember_slug_{_kind.key}')
+    post_save.connect(follow_slug_rename, sender=_kind.model, dispatch_uid=f'follow_slug_rename_{_kind.key}')
+
+
+# Engagement counters bumped on every page view; cached payloads show them up to a TTL late
+COUNTER_FIELDS = {'views_count', 'likes_count', 'shares_count', 'comments_count', 'stars_count'}
+
+
+def retire_cached_payloads(sender, update_fields=None, **kwargs):
+    """Every worker rebuilds this model's homepage payloads and list counts after the write commits"""
+    if update_fields is not None and set(update_fields) <= COUNTER_FIELDS:
+        return
+    payload_cache.invalidate(sender)
+
+
+# SharXathon has no payloads, only cached list counts
+for _model in [*payload_cache.NAMESPACES, SharXathon]:
+    _uid = f'retire_cached_payloads_{_model._meta.model_name}'
+    post_save.connect(retire_cached_payloads, sender=_model, dispatch_uid=_uid)
+    post_delete.connect(retire_cached_payloads, sender=_model, dispatch_uid=_uid)
+    # The scheduler's bulk event_type transitions skip post_save
+    state_changed.connect(retire_cached_payloads, sender=_model, dispatch_uid=_uid)
@@ -0,0 +1,51 @@
+"""
+Server-Sent Events helpers.
+
+Streams are async generators, so under an ASGI worker (see Procfile) a
+connection costs an idle coroutine rather than a thread. Under WSGI Django
+would have to buffer the whole async stream first, so views send a single
+batch of events there and let EventSource reconnect after `retry`.
+"""
+import json
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.encoding import force_str
+
+
+def format_event(data, event=None, event_id=None, retry=None):
+    """Encode one SSE message; data is serialised as JSON"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event:
+        lines.append(f'event: {event}')
+    if retry is not None:
+        lines.append(f'retry: {int(retry)}')
+    lines.append(f'data: {json.dumps(data, default=force_str)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def comment(text=''):
+    """Keep-alive line; ignored by EventSource"""
+    return f': {text}\n\n'
+
+
+def is_streaming_request(request):
+    """True when the response can be streamed incrementally (ASGI)"""
+    return isinstance(request, ASGIRequest)
+
+
+async def event_stream_response(request, events):
+    """
+    Stream `events` (an async generator of SSE strings) under ASGI. Under
+    WSGI the generator is drained first, so it must be a bounded one there.
+    """
+    if is_streaming_request(request):
+        response = StreamingHttpResponse(events, content_type='text/event-stream')
+        # Stop nginx-style proxies from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+    else:
+        response = HttpResponse(''.join([chunk async for chunk in events]), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    return response
@@ -2,8 +2,11 @@
 Django Admin configuration for TechNews model
 """
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
+from .counting import EstimatedCountPaginator
 from .models import TechNews
+from .payload_cache import invalidate
 
 @admin.register(TechNews)
 class TechNewsAdmin(admin.ModelAdmin):
@@ -13,6 +16,8 @@ class TechNewsAdmin(admin.ModelAdmin):
     readonly_fields = ('slug', 'views_count', 'likes_count', 'shares_count', 'created_at', 'updated_at', 'engagement_score_display')
     prepopulated_fields = {}  # slug auto-generated in model
     date_hierarchy = 'published_at'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Basic Information', {
@@ -87,7 +92,6 @@ class TechNewsAdmin(admin.ModelAdmin):
     
     def publish_articles(self, request, queryset):
         """Bulk publish articles"""
-        from django.utils import timezone
         for article in queryset:
             if not article.published_at:
                 article.published_at = timezone.now()
@@ -98,24 +102,28 @@ class TechNewsAdmin(admin.ModelAdmin):
     
     def unpublish_articles(self, request, queryset):
         """Bulk unpublish articles"""
-        queryset.update(is_published=False)
+        queryset.update(is_published=False, updated_at=timezone.now())
+        invalidate(TechNews)
         self.message_user(request, f"{queryset.count()} article(s) unpublished.")
     unpublish_articles.short_description = "Unpublish selected articles"
     
     def feature_articles(self, request, queryset):
         """Bulk feature articles"""
-        queryset.update(is_featured=True)
+        queryset.update(is_featured=True, updated_at=timezone.now())
+        invalidate(TechNews)
         self.message_user(request, f"{queryset.count()} article(s) featured.")
     feature_articles.short_description = "Feature selected articles"
     
     def unfeature_articles(self, request, queryset):
         """Bulk unfeature articles"""
-        queryset.update(is_featured=False)
+        queryset.update(is_featured=False, updated_at=timezone.now())
+        invalidate(TechNews)
         self.message_user(request, f"{queryset.count()} article(s) unfeatured.")
     unfeature_articles.short_description = "Unfeature selected articles"
     
     def mark_as_breaking(self, request, queryset):
         """Mark articles as breaking news"""
-        queryset.update(is_breaking=True, priority='breaking')
+        queryset.update(is_breaking=True, priority='breaking', updated_at=timezone.now())
+        invalidate(TechNews)
         self.message_user(request, f"{queryset.count()} article(s) marked as breaking news.")
     mark_as_breaking.short_description = "Mark as breaking news"
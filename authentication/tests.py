@@ -1,3 +1,1709 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import jwt
+from asgiref.sync import sync_to_async
+from django.contrib.admin import site
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.db import OperationalError, connection
+from django.db.models import F
+from django.db.models.signals import post_delete
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import (
+    cache_bus, cache_snapshot, comment_counts, comment_feed, content_registry, countdown, counting, db_routing,
+    deadlines, lazy_services, moderation, notifications, oauth_http, otp_queue, payload_cache, payload_store, reactions, scheduler,
+    screening, views, warmup,
+)
+from .authentication import TOKEN_NAMESPACE, CachedTokenAuthentication
+from .management.commands import measure_import_time
+from .google_service import GoogleService
+from .models import (
+    Comment, CommentLike, CommentThread, CustomUser, Event, Notification, NotificationCounter, OutboundMessage, ScreeningTerm,
+    SharXathon, StartupStory, TechNews,
+)
+from .services import TwilioService
+
+try:
+    from cryptography.hazmat.primitives.asymmetric import rsa
+except ImportError:  # pragma: no cover - RS256 verification needs cryptography
+    rsa = None
+
+
+class StubOIDCProvider:
+    """
+    Minimal OpenID Connect provider on a local port: discovery, JWKS,
+    token and userinfo endpoints. Records every request it serves.
+    """
+
+    def __init__(self, client_id):
+        self.client_id = client_id
+        self.requests = []
+        self.key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.kid = 'key-1'
+        self.id_token_claims = {}
+
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                provider.requests.append((self.command, self.path, self.client_address[1]))
+                if self.path == '/.well-known/openid-configuration':
+                    self._json(provider.discovery())
+                elif self.path == '/jwks':
+                    self._json(provider.jwks())
+                elif self.path == '/userinfo':
+                    self._json({'id': 'userinfo-id', 'email': 'userinfo@example.com'})
+                else:
+                    self._json({'error': 'not found'}, status=404)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                provider.requests.append((self.command, self.path, self.client_address[1]))
+                self._json({'access_token': 'access', 'id_token': provider.id_token(), 'expires_in': 3600})
+
+            def _json(self, payload, status=200):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def paths(self):
+        return [path for _, path, _ in self.requests]
+
+    def discovery(self):
+        return {
+            'issuer': self.url,
+            'jwks_uri': f'{self.url}/jwks',
+            'id_token_signing_alg_values_supported': ['RS256'],
+        }
+
+    def jwks(self):
+        jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(self.key.public_key()))
+        jwk.update({'kid': self.kid, 'alg': 'RS256', 'use': 'sig'})
+        return {'keys': [jwk]}
+
+    def rotate_key(self):
+        self.key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.kid = f'key-{time.monotonic_ns()}'
+
+    def id_token(self, **overrides):
+        now = int(time.time())
+        claims = {
+            'iss': self.url,
+            'aud': self.client_id,
+            'sub': 'google-sub-1',
+            'email': 'stub.user@example.com',
+            'given_name': 'Stub',
+            'family_name': 'User',
+            'iat': now,
+            'exp': now + 300,
+        }
+        claims.update(self.id_token_claims)
+        claims.update(overrides)
+        return jwt.encode(claims, self.key, algorithm='RS256', headers={'kid': self.kid})
+
+
+@unittest.skipIf(rsa is None, 'cryptography is not installed')
+@override_settings(GOOGLE_CLIENT_ID='stub-client')
+class OAuthHTTPTests(TestCase):
+
+    def setUp(self):
+        oauth_http.documents.clear()
+        self.provider = StubOIDCProvider('stub-client').__enter__()
+        self.addCleanup(self.provider.__exit__)
+        self.addCleanup(oauth_http.documents.clear)
+        for name, value in {
+            'DISCOVERY_URL': f'{self.provider.url}/.well-known/openid-configuration',
+            'TOKEN_URL': f'{self.provider.url}/token',
+            'USERINFO_URL': f'{self.provider.url}/userinfo',
+            'ISSUERS': None,
+        }.items():
+            patcher = mock.patch.object(GoogleService, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_id_token_verified_from_cached_jwks(self):
+        service = GoogleService()
+        first = await service.averify_id_token(self.provider.id_token())
+        second = await service.averify_id_token(self.provider.id_token())
+        await oauth_http.close_async_session()
+
+        self.assertTrue(first['success'])
+        self.assertTrue(second['success'])
+        self.assertEqual(first['data']['email'], 'stub.user@example.com')
+        self.assertEqual(first['data']['id'], 'google-sub-1')
+        # Discovery and JWKS fetched once, then served from the cache
+        self.assertEqual(self.provider.paths(), ['/.well-known/openid-configuration', '/jwks'])
+
+    async def test_rejects_wrong_audience_and_bad_signature(self):
+        service = GoogleService()
+        self.assertFalse((await service.averify_id_token(self.provider.id_token(aud='someone-else')))['success'])
+
+        forged = jwt.encode(
+            {'iss': self.provider.url, 'aud': 'stub-client', 'exp': int(time.time()) + 60},
+            rsa.generate_private_key(public_exponent=65537, key_size=2048),
+            algorithm='RS256',
+            headers={'kid': self.provider.kid},
+        )
+        self.assertFalse((await service.averify_id_token(forged))['success'])
+        await oauth_http.close_async_session()
+
+    async def test_key_rotation_refreshes_jwks_once(self):
+        service = GoogleService()
+        self.assertTrue((await service.averify_id_token(self.provider.id_token()))['success'])
+
+        self.provider.rotate_key()
+        self.assertTrue((await service.averify_id_token(self.provider.id_token()))['success'])
+        await oauth_http.close_async_session()
+        self.assertEqual(self.provider.paths().count('/jwks'), 2)
+
+    def test_session_reuses_connections(self):
+        service = GoogleService()
+        service.exchange_code_for_tokens('code-1')
+        service.exchange_code_for_tokens('code-2')
+
+        ports = {port for _, _, port in self.provider.requests}
+        self.assertEqual(len(ports), 1)
+
+    def test_callback_skips_userinfo_when_id_token_verifies(self):
+        response = self.client.post(
+            '/api/auth/google/callback/',
+            data=json.dumps({'code': 'abc', 'state': 'xyz'}),
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['email'], 'stub.user@example.com')
+        self.assertNotIn('/userinfo', self.provider.paths())
+        self.assertTrue(CustomUser.objects.filter(email='stub.user@example.com').exists())
+
+    def test_callback_falls_back_to_userinfo(self):
+        self.provider.id_token_claims = {'aud': 'someone-else'}
+        response = self.client.post(
+            '/api/auth/google/callback/',
+            data=json.dumps({'code': 'abc'}),
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['email'], 'userinfo@example.com')
+        self.assertIn('/userinfo', self.provider.paths())
+
+    async def test_callback_under_asgi_keeps_loop_session(self):
+        response = await self.async_client.post(
+            '/api/auth/google/callback/',
+            data=json.dumps({'code': 'abc'}),
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['email'], 'stub.user@example.com')
+        # ASGI requests leave the pooled aiohttp session open for the next request
+        self.assertIn(asyncio.get_running_loop(), oauth_http._async_sessions)
+        await oauth_http.close_async_session()
+
+
+# Builds the production ASGI app and serves one static file through it
+PRODUCTION_ASGI_SCRIPT = """
+import asyncio, json
+import django
+django.setup()
+from backend.asgi import application
+sent = []
+requests = [{'type': 'http.request', 'body': b''}]
+async def receive():
+    if requests:
+        return requests.pop()
+    await asyncio.Event().wait()  # the client stays connected
+async def send(message):
+    sent.append(message)
+scope = {'type': 'http', 'method': 'GET', 'path': '/static/admin/css/base.css', 'query_string': b'',
+         'headers': [], 'scheme': 'http', 'server': ('testserver', 80), 'root_path': '', 'http_version': '1.1'}
+asyncio.run(application(scope, receive, send))
+print(json.dumps({'status': sent[0]['status'], 'bytes': sum(len(m.get('body', b'')) for m in sent[1:])}))
+"""
+
+
+class ProductionASGITests(SimpleTestCase):
+
+    def test_static_files_are_served_under_settings_prod(self):
+        from django.conf import settings
+
+        with tempfile.TemporaryDirectory() as directory:
+            env = dict(
+                os.environ,
+                DJANGO_SETTINGS_MODULE='backend.settings_prod',
+                DEBUG='True',  # WhiteNoise finds files without collectstatic
+                DATABASE_URL=f'sqlite:///{directory}/db.sqlite3',
+                PYTHONPATH=str(settings.BASE_DIR),
+            )
+            env.pop('DATABASE_REPLICA_URL', None)
+            result = subprocess.run(
+                [sys.executable, '-c', PRODUCTION_ASGI_SCRIPT],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+            )
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+
+        self.assertEqual(report['status'], 200)
+        self.assertGreater(report['bytes'], 0)
+
+
+@override_settings(USE_MOCK_OTP=True, OTP_QUEUE_MODE='sync', OTP_DEDUPE_WINDOW=60,
+                   OTP_QUEUE_MAX_ATTEMPTS=3, OTP_QUEUE_RETRY_BACKOFF=5)
+class OTPQueueTests(TestCase):
+
+    def test_mock_mode_delivers_and_dedupes_per_number_and_purpose(self):
+        first, created = otp_queue.enqueue_verification('+15550000001')
+        second, created_again = otp_queue.enqueue_verification('+15550000001')
+        reset, reset_created = otp_queue.enqueue_verification('+15550000001', purpose='reset_password')
+        other, _ = otp_queue.enqueue_verification('+15550000002')
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(second.pk, first.pk)
+        self.assertTrue(reset_created)
+        self.assertEqual(first.status, 'sent')
+        self.assertEqual(first.attempts, 1)
+        self.assertEqual(other.status, 'sent')
+        self.assertEqual(OutboundMessage.objects.count(), 3)
+
+    @override_settings(OTP_QUEUE_MODE='worker')
+    def test_concurrent_request_reuses_the_message_in_flight(self):
+        queued, _ = otp_queue.enqueue_verification('+15550000007')
+        # The other request's window check ran before this message was visible
+        with mock.patch.object(otp_queue, '_recent', side_effect=[None, queued]):
+            message, created = otp_queue.enqueue_verification('+15550000007')
+
+        self.assertFalse(created)
+        self.assertEqual(message.pk, queued.pk)
+        self.assertEqual(OutboundMessage.objects.count(), 1)
+
+    def test_view_reports_a_message_that_could_not_be_sent(self):
+        CustomUser.objects.create_user(username='texted', password='pw', phone_number='+15550000008')
+        request = RequestFactory().post(
+            '/', data=json.dumps({'phone_number': '+15550000008'}), content_type='application/json'
+        )
+        failure = {'success': False, 'message': 'Invalid number', 'retryable': False}
+        with mock.patch.object(TwilioService, 'send_verification_code', return_value=failure):
+            response = views.forgot_password(request)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.data, {'error': 'Invalid number'})
+
+    @override_settings(OTP_QUEUE_MODE='worker')
+    def test_views_accept_rather_than_claim_delivery(self):
+        CustomUser.objects.create_user(username='texted', password='pw', phone_number='+15550000009')
+        responses = [
+            views.forgot_password(RequestFactory().post(
+                '/', data=json.dumps({'phone_number': '+15550000009'}), content_type='application/json'
+            ))
+            for _ in range(2)
+        ]
+        self.assertEqual([r.status_code for r in responses], [202, 202])
+        self.assertEqual(responses[0].data['message'], 'Password reset code is being sent')
+        self.assertFalse(responses[0].data['already_requested'])
+        self.assertTrue(responses[1].data['already_requested'])
+
+    def test_failed_number_is_not_deduplicated(self):
+        OutboundMessage.objects.create(phone_number='+15550000003', status='failed')
+        _, created = otp_queue.enqueue_verification('+15550000003')
+        self.assertTrue(created)
+
+    @override_settings(OTP_QUEUE_MODE='worker')
+    def test_retries_with_backoff_then_gives_up(self):
+        message, _ = otp_queue.enqueue_verification('+15550000004')
+        self.assertEqual(message.status, 'pending')
+
+        failure = {'success': False, 'message': 'Twilio unavailable', 'retryable': True}
+        with mock.patch.object(TwilioService, 'send_verification_code', return_value=failure) as send:
+            self.assertEqual(otp_queue.dispatch_due(), (0, 1))
+            message.refresh_from_db()
+            self.assertEqual((message.status, message.attempts), ('pending', 1))
+            self.assertGreater(message.next_attempt_at, timezone.now() + timedelta(seconds=4))
+
+            # Not due yet, so nothing is attempted
+            self.assertEqual(otp_queue.dispatch_due(), (0, 0))
+
+            for attempt in (2, 3):
+                OutboundMessage.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+                otp_queue.dispatch_due()
+            message.refresh_from_db()
+
+        self.assertEqual(send.call_count, 3)
+        self.assertEqual(message.status, 'failed')
+        self.assertEqual(message.last_error, 'Twilio unavailable')
+        self.assertEqual([otp_queue.retry_delay(n) for n in (1, 2, 3)], [5, 10, 20])
+
+    @override_settings(OTP_QUEUE_MODE='worker')
+    def test_non_retryable_failure_fails_immediately(self):
+        message, _ = otp_queue.enqueue_verification('+15550000005')
+        failure = {'success': False, 'message': 'Invalid number', 'retryable': False}
+        with mock.patch.object(TwilioService, 'send_verification_code', return_value=failure):
+            otp_queue.dispatch_due()
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ('failed', 1))
+
+    @override_settings(OTP_QUEUE_MODE='worker')
+    def test_expired_lease_is_requeued(self):
+        message = OutboundMessage.objects.create(
+            phone_number='+15550000006', status='sending', attempts=1,
+            next_attempt_at=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual(otp_queue.dispatch_due(), (1, 1))
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ('sent', 2))
+
+
+class StateSchedulerTests(TestCase):
+
+    def make_hackathon(self, slug, registration, start, end):
+        now = timezone.now()
+        return SharXathon.objects.create(
+            name=slug, slug=slug, description='d', content='c', location='Online', topic='AI',
+            registration_deadline=now + timedelta(hours=registration),
+            start_datetime=now + timedelta(hours=start),
+            end_datetime=now + timedelta(hours=end),
+            is_published=True,
+        )
+
+    def make_event(self, slug, days_from_today):
+        return Event.objects.create(
+            name=slug, slug=slug, description='d', details='d', location='Online',
+            featured_image='https://example.com/e.png', benefits=[],
+            event_date=timezone.localdate() + timedelta(days=days_from_today),
+            event_type='upcoming', is_published=True,
+        )
+
+    def test_bulk_transitions_as_time_passes(self):
+        hackathon = self.make_hackathon('h1', 1, 2, 3)
+        cancelled = self.make_hackathon('h2', 1, 2, 3)
+        SharXathon.objects.filter(pk=cancelled.pk).update(status='cancelled')
+        self.assertEqual(hackathon.status, 'registration_open')
+
+        received = []
+        def receiver(sender, **kwargs):
+            received.append((sender, kwargs['slugs'], kwargs['value']))
+        scheduler.state_changed.connect(receiver)
+        self.addCleanup(scheduler.state_changed.disconnect, receiver)
+
+        expected = [(1.5, 'upcoming'), (2.5, 'ongoing'), (3.5, 'completed')]
+        for hours, status in expected:
+            with CaptureQueriesContext(connection) as queries:
+                changed = scheduler.advance_states(now=timezone.now() + timedelta(hours=hours))
+            updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+            self.assertEqual(len(updates), 1)
+            self.assertEqual(changed['sharxathon'], {status: 1})
+            hackathon.refresh_from_db()
+            self.assertEqual(hackathon.status, status)
+
+        # Nothing left to move, and cancelled rows are never touched
+        self.assertEqual(scheduler.advance_states(now=timezone.now() + timedelta(hours=4))['sharxathon'], {})
+        cancelled.refresh_from_db()
+        self.assertEqual(cancelled.status, 'cancelled')
+        self.assertEqual([value for _, _, value in received], ['upcoming', 'ongoing', 'completed'])
+        self.assertEqual(received[0][:2], (SharXathon, ['h1']))
+
+    def test_missed_runs_jump_straight_to_final_state(self):
+        hackathon = self.make_hackathon('h3', 1, 2, 3)
+        changed = scheduler.advance_states(now=timezone.now() + timedelta(days=1))
+        self.assertEqual(changed['sharxathon'], {'completed': 1})
+        hackathon.refresh_from_db()
+        self.assertEqual(hackathon.status, 'completed')
+
+    @override_settings(EVENT_RECENT_DAYS=30)
+    def test_event_types_only_move_forward(self):
+        upcoming = self.make_event('e1', 1)
+        recent = self.make_event('e2', -3)
+        past = self.make_event('e3', -40)
+        filed_early = self.make_event('e4', 10)
+        Event.objects.filter(pk=filed_early.pk).update(event_type='past')
+
+        changed = scheduler.advance_states()
+        self.assertEqual(changed['event'], {'past': 1, 'recent': 1})
+        types = dict(Event.objects.values_list('slug', 'event_type'))
+        self.assertEqual(types, {'e1': 'upcoming', 'e2': 'recent', 'e3': 'past', 'e4': 'past'})
+
+    def test_listings_follow_the_clock_before_the_scheduler_runs(self):
+        self.make_hackathon('open', 1, 2, 3)
+        stale = self.make_hackathon('closed', 1, 2, 3)
+        # The deadline passed but no scheduler run has moved it yet
+        SharXathon.objects.filter(pk=stale.pk).update(registration_deadline=timezone.now() - timedelta(hours=1))
+        self.assertEqual(SharXathon.objects.get(pk=stale.pk).status, 'registration_open')
+
+        response = self.client.get('/api/auth/hackathons/upcoming/')
+        self.assertEqual([h['slug'] for h in response.json()], ['open'])
+        response = self.client.get('/api/auth/hackathons/?status=upcoming')
+        self.assertEqual([h['slug'] for h in response.json()['hackathons']], ['closed'])
+        self.assertFalse(SharXathon.objects.get(pk=stale.pk).is_registration_open)
+
+    def test_state_filter_matches_what_the_scheduler_will_store(self):
+        for slug, hours in [('a', (1, 2, 3)), ('b', (-1, 2, 3)), ('c', (-2, -1, 3)), ('d', (-3, -2, -1))]:
+            self.make_hackathon(slug, *hours)
+        now = timezone.now()
+        expected = {
+            status: set(SharXathon.objects.filter(scheduler.sharxathon_status_q(status, now)).values_list('slug', flat=True))
+            for status, _ in SharXathon.STATUS_CHOICES
+        }
+        scheduler.advance_states(now=now)
+        stored = {
+            status: set(SharXathon.objects.filter(status=status).values_list('slug', flat=True))
+            for status, _ in SharXathon.STATUS_CHOICES
+        }
+        self.assertEqual(expected, stored)
+        self.assertEqual(stored['ongoing'], {'c'})
+
+
+@override_settings(COUNTDOWN_SCHEDULE_REFRESH=60, COUNTDOWN_STREAM_MAX_SECONDS=300)
+class CountdownStreamTests(TestCase):
+
+    def setUp(self):
+        countdown.schedule.invalidate()
+        self.addCleanup(countdown.schedule.invalidate)
+        now = timezone.now()
+        self.hackathon = SharXathon.objects.create(
+            name='Stream', slug='stream', description='d', content='c', location='Online', topic='AI',
+            registration_deadline=now + timedelta(seconds=2),
+            start_datetime=now + timedelta(hours=1),
+            end_datetime=now + timedelta(hours=2),
+            is_published=True,
+        )
+
+    def test_ticks_come_from_memory(self):
+        countdown.schedule.refresh()
+        with self.assertNumQueries(0):
+            entry = countdown.schedule.get('stream')
+            first = countdown.countdown_data(entry, timezone.now())
+            later = countdown.countdown_data(entry, timezone.now() + timedelta(seconds=3))
+
+        self.assertEqual(first['status'], 'registration_open')
+        # The deadline passes between scheduler runs; the countdown still reports it
+        self.assertEqual(later['status'], 'upcoming')
+        self.assertFalse(later['is_registration_open'])
+        self.assertIn('time_until_start', later)
+
+    def test_saving_a_hackathon_reloads_the_schedule(self):
+        countdown.schedule.refresh()
+        self.hackathon.name = 'Renamed'
+        self.hackathon.save()
+        self.assertTrue(countdown.schedule.is_stale())
+        self.assertEqual(countdown.schedule.get('stream')['name'], 'Renamed')
+
+    def test_polling_endpoint_and_wsgi_stream_share_payload(self):
+        detail = self.client.get('/api/auth/hackathons/stream/countdown/')
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(detail.json()['name'], 'Stream')
+        self.assertEqual(self.client.get('/api/auth/hackathons/missing/countdown/').status_code, 404)
+
+        # Outside ASGI the stream sends one batch and lets EventSource reconnect
+        response = self.client.get('/api/auth/hackathons/countdown/stream/?slugs=stream,missing')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = response.content.decode()
+        self.assertTrue(body.startswith('event: countdown\n'))
+        payload = json.loads(body.split('data: ', 1)[1])
+        self.assertEqual(list(payload['hackathons']), ['stream'])
+        self.assertEqual(payload['missing'], ['missing'])
+        self.assertEqual(self.client.get('/api/auth/hackathons/countdown/stream/').status_code, 400)
+
+    async def test_asgi_stream_pushes_status_change(self):
+        response = await self.async_client.get('/api/auth/hackathons/countdown/stream/?slugs=stream')
+        self.assertTrue(response.streaming)
+        events = []
+        async for chunk in response.streaming_content:
+            events.append(chunk.decode().split('\n', 1)[0])
+            if 'event: status' in events:
+                break
+            self.assertLess(len(events), 5)
+        self.assertEqual(events[-1], 'event: status')
+
+
+@override_settings(NOTIFICATION_MODE='sync')
+class CommentFeedTests(TestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='reader', password='pw')
+        self.other = CustomUser.objects.create_user(username='writer', password='pw')
+        TechNews.objects.create(title='Feed', slug='feed', excerpt='x', content='x')
+        self.url = '/api/auth/comments/?content_type=tech_news&content_slug=feed'
+
+    def post_comment(self, text, parent=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Comment.objects.create(
+                user=self.other, content_type='tech_news', content_slug='feed', text=text, parent=parent
+            )
+
+    def test_since_returns_only_later_changes(self):
+        first = self.post_comment('first')
+        cursor = self.client.get(self.url).json()['cursor']
+
+        self.assertEqual(self.client.get(f'{self.url}&since={cursor}').json()['comments'], [])
+
+        reply = self.post_comment('reply', parent=first)
+        Comment.objects.create(user=self.other, content_type='tech_news', content_slug='other', text='elsewhere')
+        self.client.force_login(self.user)
+        self.client.post('/api/auth/comments/like/', {'comment_id': first.id, 'reaction': 'like'})
+
+        # The like is a counter change only, so the thread isn't renumbered for it
+        delta = self.client.get(f'{self.url}&since={cursor}').json()
+        self.assertEqual([c['id'] for c in delta['comments']], [reply.id])
+        self.assertEqual(delta['comments'][0]['parent'], first.id)
+        self.assertFalse(delta['has_more'])
+        self.assertEqual(CommentThread.objects.get(thread_key=f'id:{first.object_id}').last_seq, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.text = 'first, edited'
+            first.save(update_fields=['text'])
+        edited = self.client.get(f"{self.url}&since={delta['cursor']}").json()['comments']
+        self.assertEqual([(c['id'], c['likes_count'], c['user_reaction']) for c in edited], [(first.id, 1, 'like')])
+
+
+    def test_hidden_and_deleted_comments_are_reported_as_removed(self):
+        spam, gone = self.post_comment('spam'), self.post_comment('gone')
+        cursor = self.client.get(self.url).json()['cursor']
+        gone_id = gone.id
+        with self.captureOnCommitCallbacks(execute=True):
+            spam.is_approved = False
+            spam.save()
+            gone.delete()
+
+        delta = self.client.get(f'{self.url}&since={cursor}').json()
+        self.assertEqual(delta['comments'], [])
+        self.assertEqual(delta['removed'], [spam.id, gone_id])
+
+    def test_pages_through_a_bulk_change(self):
+        comments = [self.post_comment(f'c{i}') for i in range(5)]
+        cursor = self.client.get(self.url).json()['cursor']
+        # One moderation action gives every comment on the thread the same change number
+        with self.captureOnCommitCallbacks(execute=True):
+            moderation.bulk_moderate('reject', [c.id for c in comments])
+
+        seen = []
+        while True:
+            delta = self.client.get(f'{self.url}&since={cursor}&limit=2').json()
+            seen += delta['removed']
+            cursor = delta['cursor']
+            if not delta['has_more']:
+                break
+        self.assertEqual(seen, [c.id for c in comments])
+        self.assertEqual(self.client.get(f'{self.url}&since={cursor}').json()['removed'], [])
+
+    def test_reads_stop_at_the_committed_change_number(self):
+        cursor = self.client.get(self.url).json()['cursor']
+        first, second = self.post_comment('first'), self.post_comment('second')
+        # As if `second` were still committing when the feed read the thread's counter
+        CommentThread.objects.update(last_seq=F('last_seq') - 1)
+
+        delta = self.client.get(f'{self.url}&since={cursor}').json()
+        self.assertEqual([c['id'] for c in delta['comments']], [first.id])
+
+        CommentThread.objects.update(last_seq=F('last_seq') + 1)
+        delta = self.client.get(f"{self.url}&since={delta['cursor']}").json()
+        self.assertEqual([c['id'] for c in delta['comments']], [second.id])
+
+    def test_changes_are_numbered_after_the_write_commits(self):
+        with self.captureOnCommitCallbacks() as numbering:
+            comment = Comment.objects.create(user=self.other, content_type='tech_news', content_slug='feed', text='first')
+            # The write itself leaves the thread row alone
+            self.assertFalse(CommentThread.objects.exists())
+        self.assertEqual(Comment.objects.get(pk=comment.pk).seq, 0)
+
+        for callback in numbering:
+            callback()
+        self.assertEqual(CommentThread.objects.get().last_seq, 1)
+        self.assertEqual(Comment.objects.get(pk=comment.pk).seq, 1)
+
+    def test_bad_cursor_and_limit_are_rejected(self):
+        response = self.client.get(f'{self.url}&since=not-a-cursor')
+        self.assertEqual(response.json()['error'], 'Invalid since cursor')
+        cursor = self.client.get(self.url).json()['cursor']
+        response = self.client.get(f'{self.url}&since={cursor}&limit=ten')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'limit must be a whole number')
+        self.assertEqual(self.client.get('/api/auth/comments/stream/?content_type=tech_news&content_slug=feed&since=x').status_code, 400)
+
+
+class CommentStreamTests(TransactionTestCase):
+    """Stream queries run on executor threads, so test data must be committed"""
+
+    def setUp(self):
+        self.other = CustomUser.objects.create_user(username='writer', password='pw')
+        TechNews.objects.create(title='Feed', slug='feed', excerpt='x', content='x')
+
+    def post_comment(self, text):
+        return Comment.objects.create(user=self.other, content_type='tech_news', content_slug='feed', text=text)
+
+    @override_settings(COMMENT_STREAM_POLL_SECONDS=30)
+    async def test_asgi_stream_is_woken_by_new_comment(self):
+        response = await self.async_client.get('/api/auth/comments/stream/?content_type=tech_news&content_slug=feed')
+        stream = aiter(response.streaming_content)
+
+        # First pass finds nothing new, so the stream parks until woken
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0.2)
+        self.assertFalse(pending.done())
+
+        await sync_to_async(self.post_comment)('live')
+        # Outside a transaction on_commit fires immediately; the poll interval is 30s
+        chunk = await asyncio.wait_for(pending, timeout=5)
+        payload = json.loads(chunk.decode().split('data: ', 1)[1])
+        self.assertEqual([c['text'] for c in payload['comments']], ['live'])
+
+    def test_wsgi_stream_sends_one_batch(self):
+        self.post_comment('hello')
+        response = self.client.get(
+            '/api/auth/comments/stream/?content_type=tech_news&content_slug=feed',
+            headers={'Last-Event-ID': comment_feed.encode_position(0)},
+        )
+        body = response.content.decode()
+        self.assertTrue(body.startswith('id: '))
+        payload = json.loads(body.split('data: ', 1)[1])
+        self.assertEqual([c['text'] for c in payload['comments']], ['hello'])
+
+    def test_stream_authenticates_with_the_api_token(self):
+        comment = self.post_comment('hello')
+        reader = CustomUser.objects.create_user(username='reader', password='pw')
+        CommentLike.objects.create(user=reader, comment=comment, reaction='like')
+        url = '/api/auth/comments/stream/?content_type=tech_news&content_slug=feed'
+        since = {'Last-Event-ID': comment_feed.encode_position(0)}
+
+        token = Token.objects.create(user=reader)
+        response = self.client.get(url, headers={**since, 'Authorization': f'Token {token.key}'})
+        payload = json.loads(response.content.decode().split('data: ', 1)[1])
+        self.assertEqual(payload['comments'][0]['user_reaction'], 'like')
+
+        response = self.client.get(url, headers={**since, 'Authorization': 'Token not-a-token'})
+        self.assertEqual(response.status_code, 401)
+
+
+class ContentRegistryTests(TestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='reader', password='pw')
+        self.story = StartupStory.objects.create(heading='Garage to IPO', slug='garage', summary='x', content='x')
+        self.news = [
+            TechNews.objects.create(title=f'News {i}', slug=f'news-{i}', excerpt='x', content='x')
+            for i in range(3)
+        ]
+
+    def test_titles_resolve_with_one_query_per_type(self):
+        comments = [
+            Comment.objects.create(user=self.user, content_type='tech_news', content_slug=n.slug, text='hi')
+            for n in self.news
+        ]
+        comments.append(Comment.objects.create(
+            user=self.user, content_type='startup_story', content_slug='garage', text='hi'
+        ))
+        comments.append(Comment(user=self.user, content_type='neo_story', content_slug='gone', text='hi'))
+
+        with self.assertNumQueries(2):
+            content_registry.attach_titles(comments)
+        self.assertEqual(
+            [c.get_content_title() for c in comments],
+            ['News 0', 'News 1', 'News 2', 'Garage to IPO', 'Unknown Content'],
+        )
+
+    def test_comments_follow_slug_rename(self):
+        Comment.objects.create(user=self.user, content_type='startup_story', content_slug='garage', text='hi')
+        story = StartupStory.objects.get(pk=self.story.pk)
+        with CaptureQueriesContext(connection) as captured:
+            story.save()
+        self.assertFalse([q for q in captured if 'authentication_comment' in q['sql']])
+
+        story.slug = 'garage-to-ipo'
+        story.save()
+
+        response = self.client.get('/api/auth/comments/?content_type=startup_story&content_slug=garage-to-ipo')
+        results = response.json()['results']
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['content_slug'], 'garage-to-ipo')
+        self.assertEqual(results[0]['content_title'], 'Garage to IPO')
+
+    def test_comment_on_missing_content_is_rejected(self):
+        self.client.force_login(self.user)
+        response = self.client.post('/api/auth/comments/', {
+            'content_type': 'tech_news', 'content_slug': 'nope', 'text': 'hi'
+        })
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/api/auth/comments/', {
+            'content_type': 'tech_news', 'content_slug': 'news-1', 'text': 'hi'
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Comment.objects.get().object_id, self.news[1].pk)
+
+
+
+class CommentListingTests(TestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='reader', password='pw', is_staff=True)
+        self.other = CustomUser.objects.create_user(username='writer', password='pw')
+        TechNews.objects.create(title='Listed', slug='listed', excerpt='x', content='x')
+        self.client.force_login(self.user)
+
+    def add_thread(self, user):
+        comment = Comment.objects.create(
+            user=user, content_type='tech_news', content_slug='listed', text='top', is_flagged=True
+        )
+        for i in range(3):
+            Comment.objects.create(
+                user=self.other, content_type='tech_news', content_slug='listed', text=f'reply {i}', parent=comment,
+                is_approved=i != 2,
+            )
+        CommentLike.objects.create(user=self.user, comment=comment, reaction='like')
+        return comment
+
+    def queries(self, url):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(captured), response.json()['results']
+
+    def test_pages_cost_the_same_however_many_comments_they_hold(self):
+        for url in ('/api/auth/comments/user/', '/api/auth/comments/admin/flagged/'):
+            with self.subTest(url=url):
+                Comment.objects.all().delete()
+                self.add_thread(self.user)
+                few, _ = self.queries(url)
+                for _ in range(5):
+                    self.add_thread(self.user)
+                many, results = self.queries(url)
+
+                self.assertEqual(few, many)
+                top = [c for c in results if c['parent'] is None]
+                self.assertEqual(len(top), 6)
+                self.assertEqual(top[0]['reply_count'], 2)
+                self.assertEqual([r['text'] for r in top[0]['replies']], ['reply 0', 'reply 1'])
+                self.assertEqual(top[0]['user_reaction'], 'like')
+                self.assertEqual(top[0]['content_title'], 'Listed')
+
+    def test_replies_shown_are_capped(self):
+        comment = self.add_thread(self.user)
+        for i in range(comment_feed.REPLIES_SHOWN + 2):
+            Comment.objects.create(
+                user=self.other, content_type='tech_news', content_slug='listed', text='more', parent=comment
+            )
+        results = self.client.get('/api/auth/comments/?content_type=tech_news&content_slug=listed').json()['results']
+        self.assertEqual(len(results[0]['replies']), comment_feed.REPLIES_SHOWN)
+        self.assertEqual(results[0]['reply_count'], comment_feed.REPLIES_SHOWN + 4)
+
+    def test_index_advisor_has_nothing_left_to_suggest(self):
+        out = StringIO()
+        call_command('advise_indexes', rows=20, stdout=out, stderr=StringIO())
+        self.assertIn('No index suggestions', out.getvalue())
+
+class CommentCountTests(TestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='reader', password='pw')
+        self.news = TechNews.objects.create(title='News', slug='news', excerpt='x', content='x')
+        self.story = StartupStory.objects.create(heading='Story', slug='story', summary='x', content='x')
+
+    def comment(self, slug='news', content_type='tech_news', **kwargs):
+        return Comment.objects.create(
+            user=self.user, content_type=content_type, content_slug=slug, text='hi', **kwargs
+        )
+
+    def count(self, obj):
+        obj.refresh_from_db(fields=['comments_count'])
+        return obj.comments_count
+
+    def test_count_follows_create_moderation_and_delete(self):
+        parent = self.comment()
+        self.comment(parent=parent)
+        self.comment(is_approved=False)
+        self.assertEqual(self.count(self.news), 2)
+
+        parent = Comment.objects.get(pk=parent.pk)
+        parent.is_approved = False
+        parent.save()
+        self.assertEqual(self.count(self.news), 1)
+        parent.is_approved = True
+        parent.save(update_fields=['is_approved'])
+        self.assertEqual(self.count(self.news), 2)
+
+        # Deleting the parent cascades to its reply
+        Comment.objects.get(pk=parent.pk).delete()
+        self.assertEqual(self.count(self.news), 0)
+
+    def test_counts_endpoint_answers_a_feed_in_one_query(self):
+        self.comment()
+        self.comment(slug='story', content_type='startup_story')
+        self.comment(slug='story', content_type='startup_story')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                '/api/auth/comments/counts/?items=tech_news:news,startup_story:story,tech_news:gone,bogus'
+            )
+        self.assertEqual(response.json(), {
+            'counts': {'tech_news:news': 1, 'startup_story:story': 2},
+            'missing': ['tech_news:gone'],
+        })
+        self.assertEqual(self.client.get('/api/auth/comments/counts/?items=bogus').status_code, 400)
+
+    def test_counts_items_are_deduplicated_and_capped(self):
+        limit = comment_counts.MAX_COUNT_ITEMS
+        repeated = ','.join(['tech_news:news'] * (limit * 2))
+        self.assertEqual(comment_counts.parse_items(repeated), [('tech_news', 'news')])
+        distinct = ','.join(f'tech_news:n{i}' for i in range(limit))
+        self.assertEqual(len(comment_counts.parse_items(distinct)), limit)
+        with self.assertRaises(ValueError):
+            comment_counts.parse_items(distinct + ',tech_news:one-more')
+
+        response = self.client.get(f'/api/auth/comments/counts/?items={distinct},tech_news:one-more')
+        self.assertEqual(response.status_code, 400)
+
+    def test_reconcile_fixes_drift(self):
+        self.comment()
+        TechNews.objects.filter(pk=self.news.pk).update(comments_count=7)
+        StartupStory.objects.filter(pk=self.story.pk).update(comments_count=3)
+
+        self.assertEqual(comment_counts.reconcile_counts(dry_run=True), {
+            'tech_news': [self.news.pk], 'startup_story': [self.story.pk]
+        })
+        self.assertEqual(self.count(self.news), 7)
+        comment_counts.reconcile_counts(batch_size=1)
+        self.assertEqual((self.count(self.news), self.count(self.story)), (1, 0))
+        self.assertEqual(comment_counts.reconcile_counts(), {})
+
+
+class ReactionCounterTests(TestCase):
+
+    def setUp(self):
+        self.author = CustomUser.objects.create_user(username='author', password='pw')
+        self.fan = CustomUser.objects.create_user(username='fan', password='pw')
+        self.comment = Comment.objects.create(
+            user=self.author, content_type='tech_news', content_slug='reactions', text='hi'
+        )
+
+    def toggle(self, reaction):
+        self.client.force_login(self.fan)
+        return self.client.post('/api/auth/comments/like/', {'comment_id': self.comment.id, 'reaction': reaction}).json()
+
+    def test_toggle_applies_deltas(self):
+        self.assertEqual(self.toggle('like')['action'], 'added')
+        result = self.toggle('dislike')
+        self.assertEqual((result['action'], result['likes_count'], result['dislikes_count']), ('updated', 0, 1))
+        result = self.toggle('dislike')
+        self.assertEqual((result['action'], result['dislikes_count'], result['user_reaction']), ('removed', 0, None))
+
+    def test_toggle_does_not_recount(self):
+        self.client.force_login(self.fan)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post('/api/auth/comments/like/', {'comment_id': self.comment.id, 'reaction': 'like'})
+        self.assertFalse([q for q in queries.captured_queries if 'COUNT(' in q['sql']])
+
+    def test_reconcile_fixes_drift_only(self):
+        other = Comment.objects.create(user=self.author, content_type='tech_news', content_slug='reactions', text='ok')
+        CommentLike.objects.create(user=self.fan, comment=self.comment, reaction='like')
+        Comment.objects.filter(pk=self.comment.pk).update(likes_count=7, dislikes_count=2)
+
+        self.assertEqual(reactions.reconcile_counts(dry_run=True), [self.comment.pk])
+        self.assertEqual(reactions.reconcile_counts(batch_size=1), [self.comment.pk])
+        self.comment.refresh_from_db()
+        self.assertEqual((self.comment.likes_count, self.comment.dislikes_count), (1, 0))
+        self.assertEqual(reactions.reconcile_counts(), [])
+        self.assertEqual(Comment.objects.get(pk=other.pk).likes_count, 0)
+
+
+@override_settings(NOTIFICATION_MODE='sync')
+class ConcurrentReactionTests(TransactionTestCase):
+
+    def test_many_users_toggling_one_comment(self):
+        author = CustomUser.objects.create_user(username='author', password='pw')
+        comment = Comment.objects.create(user=author, content_type='tech_news', content_slug='hot', text='hot take')
+        users = [CustomUser(username=f'user{i}') for i in range(20)]
+        CustomUser.objects.bulk_create(users)
+        users = list(CustomUser.objects.filter(username__startswith='user'))
+        # Each user likes, switches to dislike, then likes again: net one like each,
+        # with the odd-numbered users removing theirs at the end
+        plans = {user.pk: ['like', 'dislike', 'like'] + (['like'] if user.pk % 2 else []) for user in users}
+
+        def run(user):
+            try:
+                for reaction in plans[user.pk]:
+                    for _ in range(200):
+                        try:
+                            reactions.apply_reaction(user, comment, reaction)
+                            break
+                        except OperationalError:
+                            # SQLite's shared test database reports lock contention
+                            # instead of waiting; retry like a client would
+                            time.sleep(0.005)
+                    else:
+                        raise AssertionError('gave up retrying')
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(run, users))
+
+        comment.refresh_from_db()
+        expected_likes = sum(1 for user in users if not user.pk % 2)
+        self.assertEqual(comment.likes_count, expected_likes)
+        self.assertEqual(comment.dislikes_count, 0)
+        self.assertEqual(CommentLike.objects.filter(comment=comment, reaction='like').count(), expected_likes)
+        self.assertEqual(reactions.reconcile_counts(), [])
+
+
+class ModerationQueueTests(TestCase):
+
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(username='mod', password='pw', is_staff=True)
+        self.user = CustomUser.objects.create_user(username='reader', password='pw')
+        self.news = TechNews.objects.create(title='News', slug='news', excerpt='x', content='x')
+        self.client.force_login(self.admin)
+
+    def comment(self, **kwargs):
+        return Comment.objects.create(
+            user=self.user, content_type='tech_news', content_slug='news', text='hi', **kwargs
+        )
+
+    def bulk(self, action, ids):
+        return self.client.post(
+            f'/api/auth/comments/admin/bulk/{action}/', {'ids': ids}, content_type='application/json'
+        )
+
+    def test_queue_pages_with_cursor(self):
+        flagged = [self.comment(is_flagged=True, flagged_reason='spam') for _ in range(5)]
+        self.comment()
+        rejected = self.comment(is_approved=False)
+
+        seen, cursor = [], ''
+        while True:
+            page = self.client.get(f'/api/auth/comments/admin/queue/?limit=2&cursor={cursor}').json()
+            seen += [c['id'] for c in page['results']]
+            if not page['has_more']:
+                break
+            cursor = page['next_cursor']
+        self.assertEqual(seen, [c.id for c in flagged])
+
+        page = self.client.get('/api/auth/comments/admin/queue/?state=rejected').json()
+        self.assertEqual([c['id'] for c in page['results']], [rejected.id])
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/api/auth/comments/admin/queue/').status_code, 403)
+
+    def test_bulk_approve_and_reject_are_single_updates(self):
+        held = [self.comment(is_approved=False, is_flagged=True) for _ in range(3)]
+        shown = [self.comment(is_flagged=True) for _ in range(2)]
+        self.news.refresh_from_db()
+        self.assertEqual(self.news.comments_count, 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.bulk('approve', [c.id for c in held] + [999999])
+        updates = [q for q in queries if q['sql'].startswith('UPDATE "authentication_comment"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(response.json()['not_found'], [999999])
+        self.news.refresh_from_db()
+        self.assertEqual(self.news.comments_count, 5)
+
+        self.bulk('reject', [c.id for c in shown])
+        self.news.refresh_from_db()
+        self.assertEqual(self.news.comments_count, 3)
+        self.assertFalse(Comment.objects.filter(is_flagged=True).exists())
+        self.assertEqual(Comment.objects.filter(is_approved=False).count(), 2)
+
+    def test_bulk_delete_removes_replies_and_counts(self):
+        parent = self.comment(is_flagged=True)
+        reply = self.comment(parent=parent)
+        self.comment(parent=reply)
+        self.comment(parent=reply, is_approved=False)
+        CommentLike.objects.create(user=self.admin, comment=reply, reaction='like')
+        notification = Notification.objects.create(
+            recipient=self.admin, actor=self.user, kind='reply', comment=reply,
+            content_type='tech_news', content_slug='news',
+        )
+        keep = self.comment()
+        self.news.refresh_from_db()
+        self.assertEqual(self.news.comments_count, 4)
+
+        deleted = []
+        post_delete.connect(lambda instance, **kwargs: deleted.append(instance.pk), sender=Comment, weak=False,
+                            dispatch_uid='test-bulk-delete')
+        try:
+            response = self.bulk('delete', [parent.id])
+        finally:
+            post_delete.disconnect(sender=Comment, dispatch_uid='test-bulk-delete')
+
+        self.assertEqual(response.json()['ids'], [parent.id])
+        self.assertEqual(list(Comment.objects.values_list('id', flat=True)), [keep.id])
+        self.assertEqual(len(deleted), 4)  # every cascaded reply goes through the signal
+        self.assertFalse(CommentLike.objects.exists())
+        notification.refresh_from_db()
+        self.assertIsNone(notification.comment_id)
+        self.news.refresh_from_db()
+        self.assertEqual(self.news.comments_count, 1)
+
+        self.assertEqual(self.bulk('archive', [keep.id]).status_code, 400)
+
+
+class ScreeningTests(TestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='reader', password='pw')
+        TechNews.objects.create(title='News', slug='news', excerpt='x', content='x')
+        ScreeningTerm.objects.create(term='buy followers', action='hold')
+        ScreeningTerm.objects.create(term='ass', action='flag')
+        self.client.force_login(self.user)
+
+    def post(self, text):
+        return self.client.post('/api/auth/comments/', {
+            'content_type': 'tech_news', 'content_slug': 'news', 'text': text
+        })
+
+    def test_matcher_finds_overlapping_terms_on_word_boundaries(self):
+        matcher = screening.KeywordMatcher(['he', 'she', 'hers', 'his', 'she sells'])
+        text = screening.normalize('SHE  sells; hers, this')
+        found = sorted((matcher.terms[i], text[a:b]) for a, b, i in matcher.find(text))
+        self.assertEqual(found, [('hers', 'hers'), ('she', 'she'), ('she sells', 'she sells')])
+
+    def test_comments_are_held_or_flagged(self):
+        self.assertEqual(self.post('This class is great').json()['is_flagged'], False)
+
+        flagged = self.post('What an ASS').json()
+        self.assertEqual((flagged['is_flagged'], flagged['is_approved']), (True, True))
+
+        held = self.post('Buy   followers here, ass').json()
+        self.assertEqual((held['is_flagged'], held['is_approved']), (True, False))
+        self.assertEqual(held['flagged_reason'], 'Screening matched: buy followers, ass')
+
+    def test_automaton_rebuilds_only_when_terms_change(self):
+        screening.screen('warm up')
+        with mock.patch.object(screening, 'KeywordMatcher', wraps=screening.KeywordMatcher) as build:
+            for _ in range(3):
+                # Force the signature check that normally runs every SCREENING_RECHECK_SECONDS
+                screening.screener.invalidate()
+                screening.screen('nothing to see')
+            self.assertEqual(build.call_count, 0)
+
+            ScreeningTerm.objects.create(term='spam')
+            self.assertEqual(screening.screen('pure spam')['terms'], ['spam'])
+            screening.screen('more spam')
+            self.assertEqual(build.call_count, 1)
+
+
+@override_settings(NOTIFICATION_MODE='sync')
+class NotificationTests(TestCase):
+
+    def setUp(self):
+        self.author = CustomUser.objects.create_user(username='author', password='pw')
+        self.fan = CustomUser.objects.create_user(username='fan', password='pw')
+        TechNews.objects.create(title='News', slug='news', excerpt='x', content='x')
+        self.comment = Comment.objects.create(
+            user=self.author, content_type='tech_news', content_slug='news', text='first!'
+        )
+
+    def test_replies_and_reactions_reach_the_inbox(self):
+        self.client.force_login(self.fan)
+        self.client.post('/api/auth/comments/', {
+            'content_type': 'tech_news', 'content_slug': 'news', 'text': 'welcome', 'parent': self.comment.id
+        })
+        self.client.post('/api/auth/comments/like/', {'comment_id': self.comment.id, 'reaction': 'like'})
+        # Replying to yourself is not news
+        Comment.objects.create(
+            user=self.author, content_type='tech_news', content_slug='news', text='thanks', parent=self.comment
+        )
+
+        self.client.force_login(self.author)
+        with self.assertNumQueries(3):  # session, user, counter
+            response = self.client.get('/api/auth/notifications/unread-count/')
+        self.assertEqual(response.json(), {'unread_count': 2})
+
+        inbox = self.client.get('/api/auth/notifications/?limit=1').json()
+        self.assertEqual([(n['kind'], n['actor_name']) for n in inbox['results']], [('like', 'fan')])
+        inbox = self.client.get(f"/api/auth/notifications/?limit=1&cursor={inbox['next_cursor']}").json()
+        self.assertEqual([(n['kind'], n['preview']) for n in inbox['results']], [('reply', 'welcome')])
+        self.assertFalse(inbox['has_more'])
+
+        reply_id = inbox['results'][0]['id']
+        response = self.client.post('/api/auth/notifications/read/', {'ids': [reply_id]}, content_type='application/json')
+        self.assertEqual(response.json(), {'marked_read': 1, 'unread_count': 1})
+        response = self.client.post('/api/auth/notifications/read/', {'all': True}, content_type='application/json')
+        self.assertEqual(response.json(), {'marked_read': 1, 'unread_count': 0})
+
+    def test_batch_write_collapses_repeats(self):
+        other = Comment.objects.create(user=self.fan, content_type='tech_news', content_slug='news', text='x')
+        events = [
+            {'recipient_id': self.author.id, 'actor_id': self.fan.id, 'kind': 'like', 'comment_id': self.comment.id,
+             'content_type': 'tech_news', 'content_slug': 'news', 'preview': 'first!'},
+        ] * 3 + [
+            {'recipient_id': self.fan.id, 'actor_id': self.author.id, 'kind': 'reply', 'comment_id': other.id,
+             'content_type': 'tech_news', 'content_slug': 'news', 'preview': 'x'},
+        ]
+        self.assertEqual(notifications.write_batch(events), 2)
+        self.assertEqual(
+            dict(NotificationCounter.objects.values_list('user_id', 'unread')), {self.author.id: 1, self.fan.id: 1}
+        )
+
+    def test_batch_survives_deleted_comments_and_repeats_across_flushes(self):
+        doomed = Comment.objects.create(user=self.author, content_type='tech_news', content_slug='news', text='x')
+        like = {'recipient_id': self.author.id, 'actor_id': self.fan.id, 'kind': 'like', 'comment_id': self.comment.id,
+                'content_type': 'tech_news', 'content_slug': 'news', 'preview': 'first!'}
+        reply = {**like, 'kind': 'reply', 'comment_id': doomed.id}
+        doomed.delete()
+
+        self.assertEqual(notifications.write_batch([like, reply]), 1)
+        # The like toggled off and on again, flushed in a later batch
+        self.assertEqual(notifications.write_batch([like]), 0)
+        self.assertEqual(Notification.objects.count(), 1)
+        self.assertEqual(notifications.unread_count(self.author), 1)
+
+        # A repeat the pre-check misses (another writer got there first) only costs that one row
+        with mock.patch.object(notifications, '_deliverable', side_effect=lambda events: events):
+            self.assertEqual(notifications.write_batch([like, {**like, 'kind': 'dislike'}]), 1)
+        self.assertEqual(notifications.unread_count(self.author), 2)
+
+    @override_settings(NOTIFICATION_MODE='thread')
+    def test_thread_mode_defers_to_the_writer(self):
+        with mock.patch.object(notifications.buffer, 'add') as add:
+            with self.captureOnCommitCallbacks(execute=True):
+                reactions.apply_reaction(self.fan, self.comment, 'like')
+                add.assert_not_called()
+        self.assertEqual(add.call_args.args[0]['kind'], 'like')
+        self.assertFalse(Notification.objects.exists())
+
+
+class UserActivityTests(TestCase):
+
+    def test_pages_cost_the_same_all_the_way_down(self):
+        user = CustomUser.objects.create_user(username='prolific', password='pw')
+        CustomUser.objects.create_user(username='quiet', password='pw')
+        news = TechNews.objects.create(title='News', slug='news', excerpt='x', content='x')
+        StartupStory.objects.create(heading='Story', slug='story', summary='x', content='x')
+        created = [
+            Comment.objects.create(
+                user=user, text=str(i), content_type=('tech_news', 'startup_story')[i % 2],
+                content_slug=('news', 'story')[i % 2],
+            )
+            for i in range(25)
+        ]
+        self.client.force_login(user)
+
+        seen, cursor = [], ''
+        while True:
+            # session, user, one page of comments, one title query per content type
+            with self.assertNumQueries(5):
+                page = self.client.get(f'/api/auth/comments/user/activity/?limit=10&cursor={cursor}').json()
+            seen += page['results']
+            if not page['has_more']:
+                break
+            cursor = page['next_cursor']
+
+        self.assertEqual([c['id'] for c in seen], [c.id for c in reversed(created)])
+        self.assertEqual({c['content_title'] for c in seen}, {'News', 'Story'})
+        self.assertEqual(seen[-1]['content_slug'], news.slug)
+
+
+@override_settings(COUNT_STRATEGY='cached', COUNT_EXACT_THRESHOLD=3, COUNT_CACHE_SECONDS=60)
+class CountStrategyTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        for i in range(4):
+            TechNews.objects.create(title=f'N{i}', slug=f'n{i}', excerpt='x', content='x', is_published=True,
+                                    is_featured=i == 0)
+
+    def test_large_unfiltered_totals_are_cached_and_marked_approximate(self):
+        first = self.client.get('/api/auth/tech-news/?page_size=3').json()['pagination']
+        TechNews.objects.create(title='N4', slug='n4', excerpt='x', content='x', is_published=True)
+        second = self.client.get('/api/auth/tech-news/?page_size=3').json()['pagination']
+
+        self.assertEqual((first['total_count'], first['count_is_approximate']), (4, False))
+        self.assertEqual((second['total_count'], second['count_is_approximate']), (4, True))
+        # has_next comes from the page itself, not the stale total
+        last = self.client.get('/api/auth/tech-news/?page_size=3&page=2').json()['pagination']
+        self.assertFalse(last['has_next'])
+
+    def test_filtered_and_small_sets_are_exact(self):
+        featured = self.client.get('/api/auth/tech-news/?featured=true').json()['pagination']
+        self.assertEqual((featured['total_count'], featured['count_is_approximate']), (1, False))
+
+        # Below the threshold, so never cached even when called as unfiltered
+        self.assertEqual(
+            counting.count_rows(TechNews.objects.filter(is_published=True, is_featured=True)), (1, False)
+        )
+
+    def test_any_narrowing_parameter_counts_exactly(self):
+        now = timezone.now()
+
+        def hackathon(slug):
+            SharXathon.objects.create(
+                name=slug, slug=slug, description='d', content='c', location='Online', topic='AI', is_virtual=False,
+                is_published=True,
+                registration_deadline=now + timedelta(days=1), start_datetime=now + timedelta(days=2),
+                end_datetime=now + timedelta(days=3),
+            )
+
+        for i in range(4):
+            hackathon(f'h{i}')
+        self.client.get('/api/auth/hackathons/?is_virtual=')
+        self.client.get('/api/auth/hackathons/?utm_source=mail')
+        hackathon('h4')
+
+        narrowed = self.client.get('/api/auth/hackathons/?is_virtual=').json()['pagination']
+        self.assertEqual(narrowed['total_count'], 5)
+        # A parameter that doesn't filter leaves the list unfiltered, so its total is the cached one
+        unfiltered = self.client.get('/api/auth/hackathons/?utm_source=mail').json()['pagination']
+        self.assertEqual(unfiltered['total_count'], 4)
+
+    def test_admin_paginator_counts_searches_exactly(self):
+        paginator = counting.EstimatedCountPaginator(TechNews.objects.all(), 2)
+        self.assertEqual((paginator.count, paginator.approximate), (4, False))
+        TechNews.objects.filter(slug='n3').delete()
+
+        self.assertEqual(counting.EstimatedCountPaginator(TechNews.objects.all(), 2).count, 4)
+        searched = counting.EstimatedCountPaginator(TechNews.objects.filter(title__startswith='N'), 2)
+        self.assertEqual((searched.count, searched.approximate), (3, False))
+
+
+@override_settings(REPLICA_MAX_LAG_SECONDS=5, REPLICA_LAG_CHECK_SECONDS=60, REPLICA_STICKY_SECONDS=15)
+class ReplicaRoutingTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.router = db_routing.ReplicaRouter()
+        patches = [
+            mock.patch.object(db_routing, 'replica_configured', return_value=True),
+            mock.patch.object(db_routing.health, 'healthy', return_value=True),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def request(self, method, view, cookies=None):
+        """Run `view` inside the middleware; returns the alias its reads would use and the response"""
+        seen = []
+
+        def get_response(request):
+            view()
+            seen.append(self.router.db_for_read(TechNews))
+            return HttpResponse()
+
+        request = RequestFactory().generic(method, '/api/auth/tech-news/')
+        request.COOKIES.update(cookies or {})
+        response = db_routing.ReplicaRoutingMiddleware(get_response)(request)
+        return seen[0], response
+
+    def test_safe_requests_read_from_the_replica_until_they_write(self):
+        self.assertEqual(self.router.db_for_read(TechNews), 'default')  # outside any request
+        self.assertEqual(self.request('GET', lambda: None)[0], 'replica')
+        self.assertEqual(self.request('POST', lambda: None)[0], 'default')
+        self.assertEqual(self.request('GET', lambda: self.router.db_for_write(TechNews))[0], 'default')
+
+    def test_writers_carry_their_pin_for_the_sticky_window(self):
+        _, response = self.request('POST', lambda: self.router.db_for_write(TechNews))
+        pin = {db_routing.PIN_COOKIE: response.cookies[db_routing.PIN_COOKIE].value}
+
+        # Any worker honours the cookie; no shared cache involved
+        cache.clear()
+        self.assertEqual(self.request('GET', lambda: None, cookies=pin)[0], 'default')
+        self.assertEqual(self.request('GET', lambda: None)[0], 'replica')
+        # A forged or expired pin is ignored
+        self.assertEqual(self.request('GET', lambda: None, cookies={db_routing.PIN_COOKIE: '1'})[0], 'replica')
+        with override_settings(REPLICA_STICKY_SECONDS=0), mock.patch('time.time', return_value=time.time() + 5):
+            self.assertEqual(self.request('GET', lambda: None, cookies=pin)[0], 'replica')
+
+    def test_view_counters_do_not_pin(self):
+        def count_a_view():
+            with db_routing.counter_writes():
+                self.router.db_for_write(TechNews)
+
+        alias, response = self.request('GET', count_a_view)
+        self.assertEqual(alias, 'replica')
+        self.assertNotIn(db_routing.PIN_COOKIE, response.cookies)
+
+    def test_lagging_replica_is_skipped_until_the_next_check(self):
+        health = db_routing.ReplicaHealth()
+        with mock.patch.object(db_routing, 'replica_lag', return_value=30.0) as lag:
+            self.assertFalse(health.healthy())
+            self.assertFalse(health.healthy())
+        self.assertEqual(lag.call_count, 1)
+
+        health.invalidate()
+        with mock.patch.object(db_routing, 'replica_lag', return_value=0.5):
+            self.assertTrue(health.healthy())
+        with mock.patch.object(db_routing, 'replica_lag', side_effect=OperationalError('down')):
+            health.invalidate()
+            self.assertFalse(health.healthy())
+
+
+class RequestDeadlineTests(TestCase):
+
+    SLOW_SQL = (
+        "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < 100000000) "
+        "SELECT count(*) FROM n"
+    )
+
+    def test_sqlite_statement_is_interrupted_at_the_deadline(self):
+        started = time.monotonic()
+        with deadlines.deadline(0.05) as budget:
+            with self.assertRaises(OperationalError), connection.cursor() as cursor:
+                cursor.execute(self.SLOW_SQL)
+        self.assertTrue(budget.expired)
+        self.assertLess(time.monotonic() - started, 2)
+
+        # The handler is gone afterwards
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    @override_settings(REQUEST_DEADLINE_SECONDS=1e-9)
+    def test_view_over_budget_answers_503_even_when_it_swallows_the_error(self):
+        TechNews.objects.create(title='N', slug='n', excerpt='x', content='x', is_published=True)
+        response = self.client.get('/api/auth/tech-news/?search=anything')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_postgresql_timeout_is_lowered_only_when_a_statement_could_overrun(self):
+        raw = mock.Mock()
+        context = {
+            'connection': mock.Mock(vendor='postgresql', alias='default'),
+            'cursor': mock.Mock(cursor=raw),
+        }
+        budget = deadlines.Deadline(10)
+        budget.expires_at = 10
+        execute = mock.Mock()
+
+        # 0.5s in for the first statement, 0.6s in for the second, 6s in for the third
+        with mock.patch('time.monotonic', side_effect=[0.5, 0.5, 0.6, 0.6, 6.0, 6.0]):
+            budget(execute, 'SELECT 1', None, False, context)
+            budget(execute, 'SELECT 2', None, False, context)
+            budget(execute, 'SELECT 3', None, False, context)
+
+        timeouts = [call.args[1][0] for call in raw.execute.call_args_list]
+        self.assertEqual(timeouts, [9500, 4000])
+        self.assertEqual(execute.call_count, 3)
+
+    @override_settings(REQUEST_DEADLINE_SECONDS=1e-9)
+    def test_writes_through_a_budgeted_view_are_not_cancelled(self):
+        response = self.client.post('/api/auth/events/', data={}, content_type='application/json')
+
+        self.assertNotEqual(response.status_code, 503)
+
+    def test_page_sizes_are_capped(self):
+        response = self.client.get('/api/auth/events/?limit=100000')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['limit'], 100)
+
+
+class StartupImportTests(SimpleTestCase):
+
+    def test_parse_importtime(self):
+        report = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       113 |        113 |     twilio.base\n"
+            "import time:       415 |       1898 |   twilio\n"
+            "import time:       120 |        120 | json\n"
+        )
+        entries = measure_import_time.parse_importtime(report)
+
+        self.assertEqual(entries[0], ('twilio.base', 113, 113, 2))
+        self.assertEqual(measure_import_time.total_ms(entries), 0.12)
+        self.assertEqual(measure_import_time.eager_lazy_modules(entries), ['twilio'])
+
+    def test_startup_stays_within_budget_and_skips_provider_sdks(self):
+        entries = measure_import_time.measure_startup()
+
+        self.assertEqual(measure_import_time.eager_lazy_modules(entries), [])
+        self.assertLess(measure_import_time.total_ms(entries), measure_import_time.STARTUP_BUDGET_MS)
+
+    def test_accessor_builds_the_service_on_call(self):
+        from .services import TwilioService
+
+        with mock.patch.object(TwilioService, '__init__', return_value=None):
+            self.assertIsInstance(lazy_services.twilio_service(), TwilioService)
+
+
+class PayloadCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        TechNews.objects.create(
+            title='Chips', slug='chips', excerpt='x', content='x', category='ai_ml', is_published=True, is_featured=True,
+        )
+        TechNews.objects.create(title='Draft', slug='draft', excerpt='x', content='x', category='ai_ml')
+
+    def test_warmed_payloads_are_served_without_queries(self):
+        timings = warmup.warm()
+        self.assertIn('payload tech_news:featured', timings)
+
+        with self.assertNumQueries(0):
+            featured = self.client.get('/api/auth/tech-news/featured/').json()
+            categories = self.client.get('/api/auth/tech-news/categories/').json()
+
+        self.assertEqual([article['slug'] for article in featured], ['chips'])
+        self.assertEqual([(c['value'], c['count']) for c in categories['categories']], [('ai_ml', 1)])
+
+    def test_missing_payload_is_built_once_and_none_is_cached(self):
+        with self.assertNumQueries(1):
+            self.assertIsNone(payload_cache.get('startup_story:featured'))
+            self.assertIsNone(payload_cache.get('startup_story:featured'))
+        self.assertEqual(self.client.get('/api/auth/stories/featured/').status_code, 404)
+
+    def test_recent_flags_expire_with_the_entry(self):
+        self.assertTrue(payload_cache.get('tech_news:featured')[0]['is_recent'])
+        day_later = TechNews.objects.get(slug='chips').published_at + timedelta(hours=24)
+
+        with mock.patch('time.time', return_value=day_later.timestamp()), \
+                mock.patch('django.utils.timezone.now', return_value=day_later), self.assertNumQueries(1):
+            self.assertFalse(payload_cache.get('tech_news:featured')[0]['is_recent'])
+
+
+class CacheGenerationTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        override = override_settings(CACHE_GENERATION_FILE=os.path.join(directory, 'generations.json'))
+        override.enable()
+        self.addCleanup(override.disable)
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.article = TechNews.objects.create(
+            title='Chips', slug='chips', excerpt='x', content='x', is_published=True, is_featured=True,
+        )
+
+    def test_bump_from_another_worker_drops_the_local_payload(self):
+        self.assertEqual(len(payload_cache.get('tech_news:featured')), 1)
+        # Another worker unfeatures it and bumps the shared counter
+        TechNews.objects.filter(pk=self.article.pk).update(is_featured=False)
+        cache_bus.GenerationBus()._bump_now(['tech_news'])
+
+        self.assertEqual(payload_cache.get('tech_news:featured'), [])
+
+    def test_saves_and_admin_actions_bump_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.title = 'Chips 2'
+            self.article.save()
+        self.assertEqual(cache_bus.bus.generation('tech_news'), 1)
+
+        admin_view = site._registry[TechNews]
+        request = RequestFactory().post('/')
+        with mock.patch.object(admin_view, 'message_user'), self.captureOnCommitCallbacks(execute=True):
+            admin_view.unfeature_articles(request, TechNews.objects.all())
+        self.assertEqual(cache_bus.bus.generation('tech_news'), 2)
+
+    def test_payload_built_across_a_bump_is_not_served_as_current(self):
+        def build_while_another_worker_edits():
+            data = payload_cache.featured_tech_news()
+            TechNews.objects.filter(pk=self.article.pk).update(is_featured=False)
+            cache_bus.GenerationBus()._bump_now(['tech_news'])
+            return data
+
+        with mock.patch.dict(payload_cache._builders, {'tech_news:featured': build_while_another_worker_edits}):
+            self.assertEqual(len(payload_cache.get('tech_news:featured')), 1)
+        # Stored under the generation read before building, so it is already retired
+        self.assertEqual(payload_cache.get('tech_news:featured'), [])
+
+    @override_settings(COUNT_STRATEGY='cached', COUNT_EXACT_THRESHOLD=1)
+    def test_counts_and_countdown_schedule_follow_other_workers(self):
+        published = TechNews.objects.filter(is_published=True)
+        self.assertEqual(counting.count_rows(published), (1, False))
+        self.assertEqual(counting.count_rows(published), (1, True))
+        TechNews.objects.filter(pk=self.article.pk).update(is_published=False)
+        cache_bus.GenerationBus()._bump_now([counting.count_namespace(TechNews)])
+        self.assertEqual(counting.count_rows(published), (0, False))
+
+        countdown.schedule.refresh()
+        self.assertFalse(countdown.schedule.is_stale())
+        cache_bus.GenerationBus()._bump_now([countdown.NAMESPACE])
+        self.assertTrue(countdown.schedule.is_stale())
+
+    def test_counter_updates_leave_the_generation_alone(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.article.views_count += 1
+            self.article.save(update_fields=['views_count'])
+        self.assertEqual(callbacks, [])
+
+
+class TokenCacheTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        override = override_settings(CACHE_GENERATION_FILE=os.path.join(directory, 'generations.json'))
+        override.enable()
+        self.addCleanup(override.disable)
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = CustomUser.objects.create_user(username='reader', password='pw')
+        self.token = Token.objects.create(user=self.user)
+
+    def authenticate(self):
+        return CachedTokenAuthentication().authenticate_credentials(self.token.key)[0]
+
+    def call(self, view):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        request.session = mock.MagicMock()
+        return view(request)
+
+    def test_logout_revokes_the_cached_token(self):
+        self.assertEqual(self.call(views.user_profile).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            request = RequestFactory().post('/', HTTP_AUTHORIZATION=f'Token {self.token.key}')
+            request.session = mock.MagicMock()
+            self.assertEqual(views.logout_user(request).status_code, 200)
+
+        # 403 rather than 401: session authentication comes first in DEFAULT_AUTHENTICATION_CLASSES
+        self.assertEqual(self.call(views.user_profile).status_code, 403)
+
+    def test_revocation_in_another_worker_reaches_this_one(self):
+        self.assertEqual(self.authenticate(), self.user)
+        # Another worker deletes the token; its signal handler bumps the shared generation
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM authtoken_token WHERE key = %s', [self.token.key])
+        self.assertEqual(self.authenticate(), self.user)  # still cached here
+        cache_bus.GenerationBus()._revoke_now([f'{TOKEN_NAMESPACE}:{self.user.pk}'], keep_for=60)
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_revoking_one_user_keeps_the_others_cached(self):
+        other = CustomUser.objects.create_user(username='other', password='pw')
+        other_token = Token.objects.create(user=other)
+        authenticate_other = lambda: CachedTokenAuthentication().authenticate_credentials(other_token.key)[0]
+        self.authenticate()
+        authenticate_other()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Renamed'
+            self.user.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(authenticate_other(), other)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authenticate().first_name, 'Renamed')
+
+    def test_queryset_update_revokes_but_last_login_does_not(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            CustomUser.objects.filter(pk=self.user.pk).update(last_login=timezone.now())
+        self.assertEqual(callbacks, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+
+class PayloadStoreTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.store = payload_store.PayloadStore(self.directory)
+
+    def test_readers_keep_their_version_across_a_swap(self):
+        self.store.write('k', 1, b'{"v": 1}')
+        old = self.store.read('k', 1, 60)
+
+        self.assertTrue(payload_store.PayloadStore(self.directory).write('k', 2, b'{"v": 2}'))
+        self.assertEqual(bytes(old), b'{"v": 1}')
+        self.assertIsNone(self.store.read('k', 1, 60))
+        self.assertEqual(bytes(self.store.read('k', 2, 60)), b'{"v": 2}')
+        self.assertIsNone(self.store.read('k', 2, -1))
+
+    @unittest.skipIf(payload_store.fcntl is None, 'needs flock')
+    def test_one_writer_at_a_time(self):
+        with open(self.store._path('k') + '.lock', 'a') as lock:
+            payload_store.fcntl.flock(lock, payload_store.fcntl.LOCK_EX)
+            self.assertFalse(self.store.write('k', 1, b'[]'))
+        self.assertTrue(self.store.write('k', 1, b'[]'))
+
+    def test_workers_share_the_warmed_payloads(self):
+        TechNews.objects.create(
+            title='Chips', slug='chips', excerpt='x', content='x', is_published=True, is_featured=True,
+        )
+        with override_settings(PAYLOAD_STORE_DIR=self.directory):
+            payload_cache.warm()
+            payload_cache._shared = None  # a worker with no mappings yet
+            # Hits are sent as the stored bytes, never decoded and re-rendered
+            with self.assertNumQueries(0), mock.patch.object(payload_cache, 'json') as codec:
+                response = self.client.get('/api/auth/tech-news/featured/')
+            codec.loads.assert_not_called()
+            codec.dumps.assert_not_called()
+            stored = payload_cache.shared_store().read(
+                payload_cache.cache_key('tech_news:featured'), cache_bus.bus.generation('tech_news'), 60
+            )
+        self.assertEqual(response.content, bytes(stored))
+        self.assertEqual([article['slug'] for article in response.json()], ['chips'])
+
+
+class CacheSnapshotTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'snapshot.bin')
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.article = TechNews.objects.create(
+            title='Chips', slug='chips', excerpt='x', content='x', is_published=True, is_featured=True,
+        )
+        Event.objects.create(
+            name='meetup', slug='meetup', description='d', details='d', location='Online',
+            featured_image='https://example.com/e.png', benefits=[], event_date=timezone.localdate(),
+            is_published=True, is_featured=True,
+        )
+        payload_cache.get('tech_news:featured')
+        payload_cache.get('event:featured')
+        self.assertEqual(cache_snapshot.save(self.path), 2)
+        cache.clear()
+
+    def test_restart_restores_unchanged_namespaces_only(self):
+        TechNews.objects.filter(pk=self.article.pk).update(title='Chips 2', updated_at=timezone.now())
+
+        self.assertEqual(cache_snapshot.load(self.path), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(payload_cache.get('event:featured')['count'], 1)
+        self.assertEqual(payload_cache.get('tech_news:featured')[0]['title'], 'Chips 2')
+
+    def test_clock_dependent_payloads_are_not_restored_stale(self):
+        # The article was recent and the event's days_until_event was counted today
+        with mock.patch('time.time', return_value=time.time() + 25 * 3600):
+            self.assertEqual(cache_snapshot.load(self.path), 0)
+
+    def test_snapshot_from_another_schema_is_ignored(self):
+        with mock.patch.object(cache_snapshot, 'migration_state', return_value='other'):
+            self.assertEqual(cache_snapshot.load(self.path), 0)
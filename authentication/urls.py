@@ -25,6 +25,7 @@ urlpatterns = [
     path('hackathons/featured/', views.get_featured_sharxathons, name='get_featured_sharxathons'),
     path('hackathons/upcoming/', views.get_upcoming_sharxathons, name='get_upcoming_sharxathons'),
     path('hackathons/filters/', views.get_sharxathon_filters, name='get_sharxathon_filters'),
+    path('hackathons/countdown/stream/', views.sharxathon_countdown_stream, name='sharxathon_countdown_stream'),
     path('hackathons/<slug:slug>/', views.get_sharxathon_detail, name='get_sharxathon_detail'),
     path('hackathons/<slug:slug>/countdown/', views.get_sharxathon_countdown, name='get_sharxathon_countdown'),
     # Tech News endpoints
@@ -52,11 +53,21 @@ urlpatterns = [
     
     # Comment System endpoints
     path('comments/', views.comments_list_create, name='comments_list_create'),
+    path('comments/stream/', views.comments_stream, name='comments_stream'),
+    path('comments/counts/', views.comment_counts, name='comment_counts'),
     path('comments/<int:comment_id>/', views.comment_detail, name='comment_detail'),
     path('comments/like/', views.comment_like_toggle, name='comment_like_toggle'),
     path('comments/<int:comment_id>/flag/', views.comment_flag, name='comment_flag'),
     path('comments/user/', views.user_comments, name='user_comments'),
+    path('comments/user/activity/', views.user_activity, name='user_activity'),
     path('comments/admin/flagged/', views.admin_flagged_comments, name='admin_flagged_comments'),
+    path('comments/admin/queue/', views.admin_moderation_queue, name='admin_moderation_queue'),
+    path('comments/admin/bulk/<str:action>/', views.admin_moderation_bulk, name='admin_moderation_bulk'),
+    
+    # Notifications
+    path('notifications/', views.notifications_list, name='notifications_list'),
+    path('notifications/unread-count/', views.notifications_unread_count, name='notifications_unread_count'),
+    path('notifications/read/', views.notifications_mark_read, name='notifications_mark_read'),
     
     # Event endpoints
     path('events/', views.events_list_create, name='events_list_create'),
@@ -3,14 +3,17 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
-from django.contrib.auth import login, logout
+from rest_framework.exceptions import AuthenticationFailed
+from asgiref.sync import sync_to_async
+from django.contrib.auth import alogin, login, logout
+from django.core.handlers.asgi import ASGIRequest
 from django.utils import timezone
 from django.db.models import Q
 from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
 from django.views import View
 from django.utils.decorators import method_decorator
-from .models import CustomUser, OTPVerification, StartupStory, NeoStory, NeoProject, SharXathon, TechNews, TalkEpisode, RoboticsNews, Comment, CommentLike, Event
+from .models import CustomUser, OTPVerification, StartupStory, NeoStory, NeoProject, SharXathon, TechNews, TalkEpisode, RoboticsNews, Comment, Event
 from .serializers import (
     UserRegistrationSerializer, 
     UserLoginSerializer, 
@@ -36,7 +39,30 @@ from .serializers import (
     EventListSerializer,
     EventCreateUpdateSerializer
 )
-from .services import TwilioService
+from .otp_queue import EnqueueError, enqueue_verification
+from .countdown import MAX_STREAM_SLUGS, countdown_data, countdown_events, schedule as countdown_schedule
+from .sse import event_stream_response, is_streaming_request
+from .authentication import CachedTokenAuthentication
+from . import comment_feed
+from .reactions import apply_reaction
+from .comment_counts import counts_for, parse_items
+from . import moderation
+from . import notifications
+from .activity import activity_page
+from .counting import count_rows
+from .db_routing import counter_writes
+from .deadlines import request_deadline
+from .scheduler import event_type_q, sharxathon_status_q
+from . import payload_cache
+from .lazy_services import close_oauth_session, google_service, linkedin_service, twilio_service
+
+# Largest page any list endpoint serves, whatever ?limit= or ?page_size= asks for
+MAX_PAGE_SIZE = 100
+
+
+def _page_size(request, name, default):
+    return max(1, min(int(request.GET.get(name, default)), MAX_PAGE_SIZE))
+
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -88,6 +114,27 @@ def logout_user(request):
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+def _verification_queued(phone_number, purpose, what):
+    """
+    202 once the code is queued: delivery happens outside the request and can
+    still fail (see otp_queue.py). A recent request for the same number and
+    purpose is reused, and the response says so.
+    """
+    try:
+        message, created = enqueue_verification(phone_number, purpose=purpose)
+    except EnqueueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    if created:
+        text = f'{what} is being sent'
+    else:
+        text = f'{what} was already requested for this number and is on its way'
+    return Response({
+        'message': text,
+        'phone_number': phone_number,
+        'already_requested': not created,
+    }, status=status.HTTP_202_ACCEPTED)
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def send_otp(request):
@@ -98,19 +145,7 @@ def send_otp(request):
     if serializer.is_valid():
         phone_number = serializer.validated_data['phone_number']
         
-        # Send OTP using Twilio
-        twilio_service = TwilioService()
-        result = twilio_service.send_verification_code(phone_number)
-        
-        if result['success']:
-            return Response({
-                'message': 'OTP sent successfully',
-                'phone_number': phone_number
-            }, status=status.HTTP_200_OK)
-        else:
-            return Response({
-                'error': result['message']
-            }, status=status.HTTP_400_BAD_REQUEST)
+        return _verification_queued(phone_number, 'verify_phone', 'Verification code')
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -126,8 +161,7 @@ def verify_otp(request):
         otp_code = serializer.validated_data['otp']
         
         # Verify OTP using Twilio
-        twilio_service = TwilioService()
-        result = twilio_service.verify_code(phone_number, otp_code)
+        result = twilio_service().verify_code(phone_number, otp_code)
         
         if result['success']:
             # Update user's phone verification status
@@ -188,19 +222,7 @@ def forgot_password(request):
                 'error': 'No user found with this phone number'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Send OTP using Twilio
-        twilio_service = TwilioService()
-        result = twilio_service.send_verification_code(phone_number)
-        
-        if result['success']:
-            return Response({
-                'message': 'Password reset OTP sent successfully',
-                'phone_number': phone_number
-            }, status=status.HTTP_200_OK)
-        else:
-            return Response({
-                'error': result['message']
-            }, status=status.HTTP_400_BAD_REQUEST)
+        return _verification_queued(phone_number, 'reset_password', 'Password reset code')
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -224,8 +246,7 @@ def reset_password(request):
             }, status=status.HTTP_404_NOT_FOUND)
         
         # Verify OTP using Twilio
-        twilio_service = TwilioService()
-        result = twilio_service.verify_code(phone_number, otp_code)
+        result = twilio_service().verify_code(phone_number, otp_code)
         
         if result['success']:
             # Update user's password
@@ -259,19 +280,7 @@ def forgot_username(request):
                 'error': 'No user found with this phone number'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Send OTP using Twilio
-        twilio_service = TwilioService()
-        result = twilio_service.send_verification_code(phone_number)
-        
-        if result['success']:
-            return Response({
-                'message': 'Username recovery OTP sent successfully',
-                'phone_number': phone_number
-            }, status=status.HTTP_200_OK)
-        else:
-            return Response({
-                'error': result['message']
-            }, status=status.HTTP_400_BAD_REQUEST)
+        return _verification_queued(phone_number, 'recover_username', 'Username recovery code')
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -294,8 +303,7 @@ def recover_username(request):
             }, status=status.HTTP_404_NOT_FOUND)
         
         # Verify OTP using Twilio
-        twilio_service = TwilioService()
-        result = twilio_service.verify_code(phone_number, otp_code)
+        result = twilio_service().verify_code(phone_number, otp_code)
         
         if result['success']:
             return Response({
@@ -312,7 +320,6 @@ def recover_username(request):
 
 
 # LinkedIn OAuth Views
-from .linkedin_service import LinkedInService
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -321,14 +328,14 @@ def linkedin_login_url(request):
     Get LinkedIn OAuth authorization URL
     """
     try:
-        linkedin_service = LinkedInService()
+        linkedin = linkedin_service()
         state = request.GET.get('state', 'default_state')
         # Add signup indicator to state if this is for signup
         flow_type = request.GET.get('flow', 'login')
         if flow_type == 'signup':
             state = f"signup_{state}"
 
-        auth_url = linkedin_service.get_authorization_url(state)
+        auth_url = linkedin.get_authorization_url(state)
 
         return Response({
             'authorization_url': auth_url,
@@ -341,9 +348,12 @@ def linkedin_login_url(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @csrf_exempt
-def linkedin_callback(request):
+async def linkedin_callback(request):
     """
     Handle LinkedIn OAuth callback and authenticate user
+    
+    Async so the outbound token exchange and userinfo calls don't hold a
+    worker while LinkedIn responds (served by backend/asgi.py under uvicorn).
     """
     if request.method != 'POST':
         return JsonResponse({'error': 'Method not allowed'}, status=405)
@@ -359,10 +369,10 @@ def linkedin_callback(request):
                 'error': 'Authorization code not provided'
             }, status=400)
         
-        linkedin_service = LinkedInService()
+        linkedin = linkedin_service()
         
         # Exchange code for tokens
-        token_result = linkedin_service.exchange_code_for_tokens(code)
+        token_result = await linkedin.aexchange_code_for_tokens(code)
         if not token_result['success']:
             return JsonResponse({
                 'error': token_result['error']
@@ -371,8 +381,11 @@ def linkedin_callback(request):
         access_token = token_result['access_token']
         id_token = token_result.get('id_token')
         
-        # Get user info from LinkedIn
-        user_info_result = linkedin_service.get_user_info(access_token)
+        # Prefer the ID token claims, verified locally against the cached JWKS;
+        # fall back to the LinkedIn userinfo endpoint if that isn't possible
+        user_info_result = await linkedin.averify_id_token(id_token) if id_token else {'success': False}
+        if not user_info_result['success']:
+            user_info_result = await linkedin.aget_user_info(access_token)
         if not user_info_result['success']:
             return JsonResponse({
                 'error': user_info_result['error']
@@ -381,7 +394,7 @@ def linkedin_callback(request):
         linkedin_data = user_info_result['data']
         
         # Create or get user
-        user_result = linkedin_service.create_or_get_user(linkedin_data)
+        user_result = await linkedin.acreate_or_get_user(linkedin_data)
         if not user_result['success']:
             return JsonResponse({
                 'error': user_result['error']
@@ -391,7 +404,7 @@ def linkedin_callback(request):
         token = user_result['token']
         
         # Log the user in
-        login(request, user)
+        await alogin(request, user)
         
         return JsonResponse({
             'message': 'LinkedIn login successful',
@@ -403,10 +416,13 @@ def linkedin_callback(request):
         return JsonResponse({
             'error': f'LinkedIn authentication failed: {str(e)}'
         }, status=500)
+    finally:
+        # Under WSGI each async view gets a throwaway event loop; don't leak its session
+        if not isinstance(request, ASGIRequest):
+            await close_oauth_session()
 
 
 # Google OAuth Views
-from .google_service import GoogleService
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -415,7 +431,7 @@ def google_login_url(request):
     Get Google OAuth authorization URL
     """
     try:
-        google_service = GoogleService()
+        google = google_service()
         # Generate a secure random state for CSRF protection
         import secrets
         state = secrets.token_urlsafe(32)
@@ -424,7 +440,7 @@ def google_login_url(request):
         if flow_type == 'signup':
             state = f"signup_{state}"
 
-        auth_url = google_service.get_authorization_url(state)
+        auth_url = google.get_authorization_url(state)
 
         return Response({
             'authorization_url': auth_url,
@@ -437,9 +453,12 @@ def google_login_url(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @csrf_exempt
-def google_callback(request):
+async def google_callback(request):
     """
     Handle Google OAuth callback and authenticate user
+    
+    Async so the outbound token exchange and userinfo calls don't hold a
+    worker while Google responds (served by backend/asgi.py under uvicorn).
     """
     if request.method != 'POST':
         return JsonResponse({'error': 'Method not allowed'}, status=405)
@@ -455,10 +474,10 @@ def google_callback(request):
                 'error': 'Authorization code not provided'
             }, status=400)
         
-        google_service = GoogleService()
+        google = google_service()
         
         # Exchange code for tokens
-        token_result = google_service.exchange_code_for_tokens(code)
+        token_result = await google.aexchange_code_for_tokens(code)
         if not token_result['success']:
             return JsonResponse({
                 'error': token_result['error']
@@ -467,8 +486,11 @@ def google_callback(request):
         access_token = token_result['access_token']
         id_token = token_result.get('id_token')
         
-        # Get user info from Google
-        user_info_result = google_service.get_user_info(access_token)
+        # Prefer the ID token claims, verified locally against the cached JWKS;
+        # fall back to the Google userinfo endpoint if that isn't possible
+        user_info_result = await google.averify_id_token(id_token) if id_token else {'success': False}
+        if not user_info_result['success']:
+            user_info_result = await google.aget_user_info(access_token)
         if not user_info_result['success']:
             return JsonResponse({
                 'error': user_info_result['error']
@@ -477,7 +499,7 @@ def google_callback(request):
         google_data = user_info_result['data']
         
         # Create or get user
-        user_result = google_service.create_or_get_user(google_data)
+        user_result = await google.acreate_or_get_user(google_data)
         if not user_result['success']:
             return JsonResponse({
                 'error': user_result['error']
@@ -487,7 +509,7 @@ def google_callback(request):
         token = user_result['token']
         
         # Log the user in
-        login(request, user)
+        await alogin(request, user)
         
         return JsonResponse({
             'message': 'Google login successful',
@@ -499,12 +521,17 @@ def google_callback(request):
         return JsonResponse({
             'error': f'Google authentication failed: {str(e)}'
         }, status=500)
+    finally:
+        # Under WSGI each async view gets a throwaway event loop; don't leak its session
+        if not isinstance(request, ASGIRequest):
+            await close_oauth_session()
 
 
 # ==================== Startup Stories API ====================
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@request_deadline()
 def list_startup_stories(request):
     """
     List all published startup stories with optional filtering
@@ -556,8 +583,9 @@ def get_startup_story(request, slug):
         story = StartupStory.objects.get(slug=slug, is_published=True)
         
         # Increment view count
-        story.views_count += 1
-        story.save(update_fields=['views_count'])
+        with counter_writes():
+            story.views_count += 1
+            story.save(update_fields=['views_count'])
         
         serializer = StartupStorySerializer(story)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -574,14 +602,13 @@ def get_featured_story(request):
     Get the most recent featured story
     """
     try:
-        story = StartupStory.objects.filter(is_published=True, is_featured=True).first()
-        if not story:
+        response = payload_cache.response('startup_story:featured')
+        if response.content == b'null':
             return Response({
                 'error': 'No featured story available'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        serializer = StartupStorySerializer(story)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return response
     except Exception as e:
         return Response({
             'error': str(e)
@@ -606,6 +633,7 @@ def get_story_filters(request):
 # Neo Stories Views
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@request_deadline()
 def list_neo_stories(request):
     """
     List all published Neo stories with optional filters
@@ -656,8 +684,9 @@ def get_neo_story(request, slug):
         story = NeoStory.objects.get(slug=slug, is_published=True)
         
         # Increment view count
-        story.views_count += 1
-        story.save(update_fields=['views_count'])
+        with counter_writes():
+            story.views_count += 1
+            story.save(update_fields=['views_count'])
         
         serializer = NeoStorySerializer(story)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -681,16 +710,15 @@ def get_featured_neo_story(request):
     Get the featured Neo story
     """
     try:
-        story = NeoStory.objects.filter(is_published=True, is_featured=True).first()
+        response = payload_cache.response('neo_story:featured')
         
-        if not story:
+        if response.content == b'null':
             return Response(
                 {'message': 'No featured Neo story available'},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        serializer = NeoStorySerializer(story)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return response
         
     except Exception as e:
         return Response(
@@ -715,6 +743,7 @@ def get_neo_story_filters(request):
 # Neo Projects Views
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@request_deadline()
 def list_neo_projects(request):
     """
     List all published Neo projects with filters and search
@@ -781,8 +810,9 @@ def get_neo_project(request, slug):
         project = NeoProject.objects.get(slug=slug, is_published=True)
         
         # Increment view count
-        project.views_count += 1
-        project.save(update_fields=['views_count'])
+        with counter_writes():
+            project.views_count += 1
+            project.save(update_fields=['views_count'])
         
         serializer = NeoProjectSerializer(project)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -809,8 +839,9 @@ def get_neo_project_detail(request, slug):
         project = NeoProject.objects.get(slug=slug, is_published=True)
         
         # Increment view count
-        project.views_count += 1
-        project.save(update_fields=['views_count'])
+        with counter_writes():
+            project.views_count += 1
+            project.save(update_fields=['views_count'])
         
         serializer = NeoProjectDetailSerializer(project)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -834,9 +865,7 @@ def get_featured_neo_projects(request):
     Get featured Neo projects
     """
     try:
-        projects = NeoProject.objects.filter(is_published=True, is_featured=True).order_by('-created_at')
-        serializer = NeoProjectSerializer(projects, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return payload_cache.response('neo_project:featured')
         
     except Exception as e:
         return Response(
@@ -865,17 +894,19 @@ def get_neo_project_filters(request):
 # SharXathon (Hackathon) Views
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@request_deadline()
 def get_sharxathons(request):
     """
     Get list of hackathons with filtering and pagination
     """
     try:
-        hackathons = SharXathon.objects.filter(is_published=True)
+        published = SharXathon.objects.filter(is_published=True)
+        hackathons = published
         
         # Filter by status
         status_filter = request.GET.get('status')
         if status_filter:
-            hackathons = hackathons.filter(status=status_filter)
+            hackathons = hackathons.filter(sharxathon_status_q(status_filter))
         
         # Filter by difficulty
         difficulty = request.GET.get('difficulty')
@@ -906,15 +937,17 @@ def get_sharxathons(request):
         
         # Pagination
         page = int(request.GET.get('page', 1))
-        limit = int(request.GET.get('limit', 12))
+        limit = _page_size(request, 'limit', 12)
         start_index = (page - 1) * limit
         end_index = start_index + limit
         
-        total_count = hackathons.count()
-        hackathons_page = hackathons[start_index:end_index]
+        total_count, approximate = count_rows(hackathons, base=published)
+        # One extra row tells whether there is a next page, even when the total is estimated
+        hackathons_page = list(hackathons[start_index:end_index + 1])
+        has_next = len(hackathons_page) > limit
         
         # Serialize data with countdown information
-        serializer = SharXathonSerializer(hackathons_page, many=True)
+        serializer = SharXathonSerializer(hackathons_page[:limit], many=True)
         
         return Response({
             'hackathons': serializer.data,
@@ -922,7 +955,8 @@ def get_sharxathons(request):
                 'current_page': page,
                 'total_pages': (total_count + limit - 1) // limit,
                 'total_count': total_count,
-                'has_next': end_index < total_count,
+                'count_is_approximate': approximate,
+                'has_next': has_next,
                 'has_previous': page > 1
             }
         }, status=status.HTTP_200_OK)
@@ -944,8 +978,9 @@ def get_sharxathon_detail(request, slug):
         hackathon = SharXathon.objects.get(slug=slug, is_published=True)
         
         # Increment views count
-        hackathon.views_count += 1
-        hackathon.save(update_fields=['views_count'])
+        with counter_writes():
+            hackathon.views_count += 1
+            hackathon.save(update_fields=['views_count'])
         
         serializer = SharXathonSerializer(hackathon)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -991,13 +1026,10 @@ def get_upcoming_sharxathons(request):
     Get upcoming hackathons with registration still open
     """
     try:
-        from django.utils import timezone as tz
-        now = tz.now()
-        
+        # Matched by the clock too, in case the scheduler hasn't run since the deadline
         hackathons = SharXathon.objects.filter(
+            sharxathon_status_q('registration_open'),
             is_published=True,
-            registration_deadline__gt=now,
-            start_datetime__gt=now
         ).order_by('start_datetime')[:6]
         
         serializer = SharXathonSerializer(hackathons, many=True)
@@ -1030,50 +1062,17 @@ def get_sharxathon_countdown(request, slug):
     Get real-time countdown information for a specific hackathon
     """
     try:
-        hackathon = SharXathon.objects.get(slug=slug, is_published=True)
+        # Served from the in-memory schedule, not a per-request query
+        entry = countdown_schedule.get(slug)
+        if entry is None:
+            return Response(
+                {'message': 'Hackathon not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
         
         from django.utils import timezone as tz
-        now = tz.now()
-        
-        countdown_data = {
-            'name': hackathon.name,
-            'status': hackathon.status,
-            'current_time': now.isoformat(),
-            'registration_deadline': hackathon.registration_deadline.isoformat(),
-            'start_datetime': hackathon.start_datetime.isoformat(),
-            'end_datetime': hackathon.end_datetime.isoformat(),
-            'is_registration_open': hackathon.is_registration_open,
-            'is_active': hackathon.is_active,
-        }
+        return Response(countdown_data(entry, tz.now()), status=status.HTTP_200_OK)
         
-        # Calculate time remaining
-        if hackathon.time_until_start:
-            delta = hackathon.time_until_start
-            countdown_data['time_until_start'] = {
-                'days': delta.days,
-                'hours': delta.seconds // 3600,
-                'minutes': (delta.seconds % 3600) // 60,
-                'seconds': delta.seconds % 60,
-                'total_seconds': delta.total_seconds()
-            }
-        
-        if hackathon.time_until_end:
-            delta = hackathon.time_until_end
-            countdown_data['time_until_end'] = {
-                'days': delta.days,
-                'hours': delta.seconds // 3600,
-                'minutes': (delta.seconds % 3600) // 60,
-                'seconds': delta.seconds % 60,
-                'total_seconds': delta.total_seconds()
-            }
-        
-        return Response(countdown_data, status=status.HTTP_200_OK)
-        
-    except SharXathon.DoesNotExist:
-        return Response(
-            {'message': 'Hackathon not found'},
-            status=status.HTTP_404_NOT_FOUND
-        )
     except Exception as e:
         return Response(
             {'error': str(e)},
@@ -1081,17 +1080,35 @@ def get_sharxathon_countdown(request, slug):
         )
 
 
+async def sharxathon_countdown_stream(request):
+    """
+    Server-Sent Events stream of countdown ticks and status changes for
+    ?slugs=a,b,c (one connection for several hackathons)
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    
+    slugs = [slug for slug in request.GET.get('slugs', '').split(',') if slug][:MAX_STREAM_SLUGS]
+    if not slugs:
+        return JsonResponse({'error': 'slugs parameter is required'}, status=400)
+    
+    events = countdown_events(slugs, once=not is_streaming_request(request))
+    return await event_stream_response(request, events)
+
+
 # Tech News Views
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@request_deadline()
 def get_tech_news(request):
     """
     Get list of tech news articles with filtering and pagination
     """
     try:
         # Get published articles only
-        articles = TechNews.objects.filter(is_published=True)
+        published = TechNews.objects.filter(is_published=True)
+        articles = published
         
         # Filter by category
         category = request.GET.get('category')
@@ -1136,14 +1153,16 @@ def get_tech_news(request):
         
         # Pagination
         page = int(request.GET.get('page', 1))
-        page_size = int(request.GET.get('page_size', 12))
+        page_size = _page_size(request, 'page_size', 12)
         start = (page - 1) * page_size
         end = start + page_size
         
-        total_count = articles.count()
-        articles = articles[start:end]
+        total_count, approximate = count_rows(articles, base=published)
+        # One extra row tells whether there is a next page, even when the total is estimated
+        articles = list(articles[start:end + 1])
+        has_next = len(articles) > page_size
         
-        serializer = TechNewsSerializer(articles, many=True)
+        serializer = TechNewsSerializer(articles[:page_size], many=True)
         
         return Response({
             'articles': serializer.data,
@@ -1151,8 +1170,9 @@ def get_tech_news(request):
                 'current_page': page,
                 'page_size': page_size,
                 'total_count': total_count,
+                'count_is_approximate': approximate,
                 'total_pages': (total_count + page_size - 1) // page_size,
-                'has_next': end < total_count,
+                'has_next': has_next,
                 'has_previous': page > 1
             }
         }, status=status.HTTP_200_OK)
@@ -1171,9 +1191,7 @@ def get_featured_tech_news(request):
     Get featured tech news articles
     """
     try:
-        articles = TechNews.objects.filter(is_published=True, is_featured=True)[:6]
-        serializer = TechNewsSerializer(articles, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return payload_cache.response('tech_news:featured')
     except Exception as e:
         return Response(
             {'error': str(e)},
@@ -1188,9 +1206,7 @@ def get_breaking_tech_news(request):
     Get breaking tech news articles
     """
     try:
-        articles = TechNews.objects.filter(is_published=True, is_breaking=True)[:5]
-        serializer = TechNewsSerializer(articles, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return payload_cache.response('tech_news:breaking')
     except Exception as e:
         return Response(
             {'error': str(e)},
@@ -1205,9 +1221,7 @@ def get_trending_tech_news(request):
     Get trending tech news articles
     """
     try:
-        articles = TechNews.objects.filter(is_published=True, is_trending=True)[:8]
-        serializer = TechNewsSerializer(articles, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return payload_cache.response('tech_news:trending')
     except Exception as e:
         return Response(
             {'error': str(e)},
@@ -1222,22 +1236,7 @@ def get_tech_news_categories(request):
     Get available categories and their counts
     """
     try:
-        from django.db.models import Count
-        
-        categories = []
-        for value, label in TechNews.CATEGORY_CHOICES:
-            count = TechNews.objects.filter(is_published=True, category=value).count()
-            if count > 0:
-                categories.append({
-                    'value': value,
-                    'label': label,
-                    'count': count
-                })
-        
-        return Response({
-            'categories': categories,
-            'priorities': [{'value': v, 'label': l} for v, l in TechNews.PRIORITY_CHOICES]
-        }, status=status.HTTP_200_OK)
+        return payload_cache.response('tech_news:categories')
     except Exception as e:
         return Response(
             {'error': str(e)},
@@ -1255,8 +1254,9 @@ def get_tech_news_detail(request, slug):
         article = TechNews.objects.get(slug=slug, is_published=True)
         
         # Increment view count
-        article.views_count += 1
-        article.save(update_fields=['views_count'])
+        with counter_writes():
+            article.views_count += 1
+            article.save(update_fields=['views_count'])
         
         serializer = TechNewsSerializer(article)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -1335,6 +1335,7 @@ def share_tech_news(request, slug):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@request_deadline()
 def talk_episodes_list(request):
     """
     List all published talk episodes with filtering and search
@@ -1424,12 +1425,14 @@ def talk_episode_by_number(request, episode_number):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@request_deadline()
 def get_robotics_news(request):
     """
     Get robotics news articles with filtering and search
     """
     try:
-        articles = RoboticsNews.objects.filter(is_published=True)
+        published = RoboticsNews.objects.filter(is_published=True)
+        articles = published
         
         # Search functionality
         search_query = request.GET.get('search', '')
@@ -1449,9 +1452,9 @@ def get_robotics_news(request):
         articles = articles.order_by('-created_at')
         
         # Pagination
-        limit = int(request.GET.get('limit', 10))
+        limit = _page_size(request, 'limit', 10)
         offset = int(request.GET.get('offset', 0))
-        total_count = articles.count()
+        total_count, approximate = count_rows(articles, base=published)
         articles = articles[offset:offset + limit]
         
         serializer = RoboticsNewsSerializer(articles, many=True)
@@ -1459,6 +1462,7 @@ def get_robotics_news(request):
         return Response({
             'results': serializer.data,
             'count': total_count,
+            'count_is_approximate': approximate,
             'limit': limit,
             'offset': offset
         }, status=status.HTTP_200_OK)
@@ -1477,20 +1481,8 @@ def get_featured_robotics_news(request):
     Get featured robotics news articles
     """
     try:
-        articles = RoboticsNews.objects.filter(
-            is_published=True,
-            is_featured=True
-        ).order_by('-created_at')
-        
-        limit = int(request.GET.get('limit', 1))
-        articles = articles[:limit]
-        
-        serializer = RoboticsNewsSerializer(articles, many=True)
-        
-        return Response({
-            'results': serializer.data,
-            'count': len(serializer.data)
-        }, status=status.HTTP_200_OK)
+        limit = _page_size(request, 'limit', 1)
+        return payload_cache.response('robotics_news:featured', limit=limit)
         
     except Exception as e:
         return Response(
@@ -1506,19 +1498,8 @@ def get_trending_robotics_news(request):
     Get trending robotics news based on views and likes
     """
     try:
-        articles = RoboticsNews.objects.filter(
-            is_published=True
-        ).order_by('-views_count', '-likes_count', '-created_at')
-        
-        limit = int(request.GET.get('limit', 4))
-        articles = articles[:limit]
-        
-        serializer = RoboticsNewsSerializer(articles, many=True)
-        
-        return Response({
-            'results': serializer.data,
-            'count': len(serializer.data)
-        }, status=status.HTTP_200_OK)
+        limit = _page_size(request, 'limit', 4)
+        return payload_cache.response('robotics_news:trending', limit=limit)
         
     except Exception as e:
         return Response(
@@ -1540,8 +1521,9 @@ def get_robotics_news_detail(request, slug):
         )
         
         # Increment views count
-        article.views_count += 1
-        article.save(update_fields=['views_count'])
+        with counter_writes():
+            article.views_count += 1
+            article.save(update_fields=['views_count'])
         
         serializer = RoboticsNewsSerializer(article)
         
@@ -1645,28 +1627,55 @@ def comments_list_create(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # Delta mode: only what changed after the cursor from a previous response
+        since = request.GET.get('since')
+        if since:
+            try:
+                limit = int(request.GET.get('limit', 100))
+            except ValueError:
+                return Response(
+                    {'error': 'limit must be a whole number'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            try:
+                changes = comment_feed.fetch_changes(
+                    content_type, content_slug, since,
+                    limit=limit,
+                    user=request.user,
+                    context={'request': request}
+                )
+            except ValueError:
+                return Response(
+                    {'error': 'Invalid since cursor'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return Response(changes, status=status.HTTP_200_OK)
+        
         try:
             # Get top-level comments (not replies)
-            comments = Comment.objects.filter(
-                content_type=content_type,
-                content_slug=content_slug,
+            comments = comment_feed.thread_comments(content_type, content_slug).filter(
                 parent__isnull=True,
                 is_approved=True
             ).order_by('-created_at')
             
             # Pagination
-            limit = int(request.GET.get('limit', 10))
+            limit = _page_size(request, 'limit', 10)
             offset = int(request.GET.get('offset', 0))
             total_count = comments.count()
-            comments = comments[offset:offset + limit]
+            comments = comment_feed.listing_page(comments, offset, limit)
             
-            serializer = CommentSerializer(comments, many=True, context={'request': request})
+            serializer = CommentSerializer(comments, many=True, context={
+                'request': request,
+                'user_reactions': comment_feed.user_reactions(request.user, comments),
+            })
             
             return Response({
                 'results': serializer.data,
                 'count': total_count,
                 'limit': limit,
-                'offset': offset
+                'offset': offset,
+                # Pass back as ?since= to receive only later changes
+                'cursor': comment_feed.latest_cursor(content_type, content_slug)
             }, status=status.HTTP_200_OK)
             
         except Exception as e:
@@ -1703,6 +1712,41 @@ def comments_list_create(request):
             )
 
 
+async def comments_stream(request):
+    """
+    Server-Sent Events stream of new and changed comments for one thread
+    (?content_type=&content_slug=, optional ?since= cursor or Last-Event-ID)
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    
+    content_type = request.GET.get('content_type')
+    content_slug = request.GET.get('content_slug')
+    if not content_type or not content_slug:
+        return JsonResponse({'error': 'content_type and content_slug are required'}, status=400)
+    
+    cursor = request.headers.get('Last-Event-ID') or request.GET.get('since')
+    if cursor:
+        try:
+            comment_feed.decode_position(cursor)
+        except ValueError:
+            return JsonResponse({'error': 'Invalid since cursor'}, status=400)
+    
+    # Plain async view, so authenticate the way the DRF endpoints do: token first, then session
+    try:
+        authenticated = await sync_to_async(CachedTokenAuthentication().authenticate)(request)
+    except AuthenticationFailed as e:
+        return JsonResponse({'error': str(e.detail)}, status=401)
+    user = authenticated[0] if authenticated else await request.auser()
+    
+    events = comment_feed.comment_events(
+        content_type, content_slug, cursor or None,
+        user=user,
+        once=not is_streaming_request(request)
+    )
+    return await event_stream_response(request, events)
+
+
 @api_view(['PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def comment_detail(request, comment_id):
@@ -1764,6 +1808,36 @@ def comment_detail(request, comment_id):
             )
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def comment_counts(request):
+    """
+    Comment counts for a batch of content, e.g. every card in a feed
+    (?items=tech_news:some-slug,startup_story:other-slug)
+    """
+    try:
+        items = parse_items(request.GET.get('items', ''))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if not items:
+        return Response(
+            {'error': 'items must be a comma-separated list of content_type:slug'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        counts = counts_for(items)
+        return Response({
+            'counts': counts,
+            'missing': [f'{t}:{s}' for t, s in items if f'{t}:{s}' not in counts]
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def comment_like_toggle(request):
@@ -1788,40 +1862,16 @@ def comment_like_toggle(request):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Check if user already reacted
-        try:
-            existing_reaction = CommentLike.objects.get(user=request.user, comment=comment)
-            
-            if existing_reaction.reaction == reaction:
-                # Remove reaction if same as existing
-                existing_reaction.delete()
-                action = 'removed'
-            else:
-                # Update reaction if different
-                existing_reaction.reaction = reaction
-                existing_reaction.save()
-                action = 'updated'
-                
-        except CommentLike.DoesNotExist:
-            # Create new reaction
-            CommentLike.objects.create(
-                user=request.user,
-                comment=comment,
-                reaction=reaction
-            )
-            action = 'added'
-        
-        # Update comment counts
-        comment.likes_count = comment.reactions.filter(reaction='like').count()
-        comment.dislikes_count = comment.reactions.filter(reaction='dislike').count()
-        comment.save()
+        # Apply the change as +/- deltas on the counters (see reactions.py)
+        result = apply_reaction(request.user, comment, reaction)
+        action = result['action']
         
         return Response({
             'message': f'Reaction {action} successfully',
             'action': action,
-            'likes_count': comment.likes_count,
-            'dislikes_count': comment.dislikes_count,
-            'user_reaction': reaction if action != 'removed' else None
+            'likes_count': result['likes_count'],
+            'dislikes_count': result['dislikes_count'],
+            'user_reaction': result['user_reaction']
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -1881,12 +1931,15 @@ def user_comments(request):
         comments = Comment.objects.filter(user=request.user).order_by('-created_at')
         
         # Pagination
-        limit = int(request.GET.get('limit', 20))
+        limit = _page_size(request, 'limit', 20)
         offset = int(request.GET.get('offset', 0))
         total_count = comments.count()
-        comments = comments[offset:offset + limit]
+        comments = comment_feed.listing_page(comments, offset, limit)
         
-        serializer = CommentSerializer(comments, many=True, context={'request': request})
+        serializer = CommentSerializer(comments, many=True, context={
+            'request': request,
+            'user_reactions': comment_feed.user_reactions(request.user, comments),
+        })
         
         return Response({
             'results': serializer.data,
@@ -1902,6 +1955,31 @@ def user_comments(request):
         )
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def user_activity(request):
+    """
+    Current user's comments, newest first, paged by cursor (?limit=, ?cursor=)
+    """
+    try:
+        page = activity_page(
+            request.user,
+            cursor=request.GET.get('cursor'),
+            limit=int(request.GET.get('limit', 20))
+        )
+        return Response(page, status=status.HTTP_200_OK)
+    except ValueError:
+        return Response(
+            {'error': 'Invalid cursor or limit'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except Exception as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 # Admin-only views for comment moderation
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -1919,12 +1997,15 @@ def admin_flagged_comments(request):
         comments = Comment.objects.filter(is_flagged=True).order_by('-created_at')
         
         # Pagination
-        limit = int(request.GET.get('limit', 20))
+        limit = _page_size(request, 'limit', 20)
         offset = int(request.GET.get('offset', 0))
         total_count = comments.count()
-        comments = comments[offset:offset + limit]
+        comments = comment_feed.listing_page(comments, offset, limit)
         
-        serializer = CommentSerializer(comments, many=True, context={'request': request})
+        serializer = CommentSerializer(comments, many=True, context={
+            'request': request,
+            'user_reactions': comment_feed.user_reactions(request.user, comments),
+        })
         
         return Response({
             'results': serializer.data,
@@ -1940,10 +2021,160 @@ def admin_flagged_comments(request):
         )
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def admin_moderation_queue(request):
+    """
+    Moderation queue, oldest first (?state=flagged|rejected, ?limit=, ?cursor=)
+    """
+    if not (request.user.is_staff or request.user.is_superuser):
+        return Response(
+            {'error': 'Admin access required'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    state = request.GET.get('state', 'flagged')
+    if state not in moderation.QUEUE_STATES:
+        return Response(
+            {'error': f"state must be one of: {', '.join(moderation.QUEUE_STATES)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        page = moderation.queue_page(
+            state=state,
+            cursor=request.GET.get('cursor'),
+            limit=int(request.GET.get('limit', 50))
+        )
+        return Response(page, status=status.HTTP_200_OK)
+    except ValueError:
+        return Response(
+            {'error': 'Invalid cursor or limit'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except Exception as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def admin_moderation_bulk(request, action):
+    """
+    Approve, reject or delete many comments at once ({"ids": [...]})
+    """
+    if not (request.user.is_staff or request.user.is_superuser):
+        return Response(
+            {'error': 'Admin access required'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    if action not in moderation.BULK_ACTIONS:
+        return Response(
+            {'error': f"action must be one of: {', '.join(moderation.BULK_ACTIONS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    ids = request.data.get('ids')
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+        return Response(
+            {'error': 'ids must be a non-empty list of comment ids'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(ids) > moderation.MAX_BULK_IDS:
+        return Response(
+            {'error': f'At most {moderation.MAX_BULK_IDS} comments per request'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        done = moderation.bulk_moderate(action, ids)
+        return Response({
+            'action': action,
+            'count': len(done),
+            'ids': done,
+            'not_found': sorted(set(ids) - set(done))
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+# ==================== NOTIFICATION ENDPOINTS ====================
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def notifications_list(request):
+    """
+    Current user's notification inbox, newest first (?limit=, ?cursor=, ?unread=1)
+    """
+    try:
+        page = notifications.inbox_page(
+            request.user,
+            cursor=request.GET.get('cursor'),
+            limit=int(request.GET.get('limit', 20)),
+            unread_only=request.GET.get('unread') in ('1', 'true')
+        )
+        page['unread_count'] = notifications.unread_count(request.user)
+        return Response(page, status=status.HTTP_200_OK)
+    except ValueError:
+        return Response(
+            {'error': 'Invalid cursor or limit'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except Exception as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def notifications_unread_count(request):
+    """
+    Unread badge count: a single primary-key read
+    """
+    return Response({'unread_count': notifications.unread_count(request.user)}, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def notifications_mark_read(request):
+    """
+    Mark notifications read: {"ids": [...]} or {"all": true}
+    """
+    ids = request.data.get('ids')
+    if request.data.get('all') is True:
+        ids = None
+    elif not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+        return Response(
+            {'error': 'Provide ids (a list of notification ids) or all: true'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        changed = notifications.mark_read(request.user, ids)
+        return Response({
+            'marked_read': changed,
+            'unread_count': notifications.unread_count(request.user)
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 # ==================== EVENT ENDPOINTS ====================
 
 @api_view(['GET', 'POST'])
 @permission_classes([AllowAny])
+@request_deadline()
 def events_list_create(request):
     """
     GET: List all published events
@@ -1960,20 +2191,21 @@ def events_list_create(request):
             is_featured = request.GET.get('featured')
             
             # Base queryset - only published events
-            events = Event.objects.filter(is_published=True)
+            published = Event.objects.filter(is_published=True)
+            events = published
             
             # Apply filters
             if event_type:
-                events = events.filter(event_type=event_type)
+                events = events.filter(event_type_q(event_type))
             if category:
                 events = events.filter(category=category)
             if is_featured == 'true':
                 events = events.filter(is_featured=True)
             
             # Pagination
-            limit = int(request.GET.get('limit', 20))
+            limit = _page_size(request, 'limit', 20)
             offset = int(request.GET.get('offset', 0))
-            total_count = events.count()
+            total_count, approximate = count_rows(events, base=published)
             events = events[offset:offset + limit]
             
             serializer = EventListSerializer(events, many=True)
@@ -1981,6 +2213,7 @@ def events_list_create(request):
             return Response({
                 'results': serializer.data,
                 'count': total_count,
+                'count_is_approximate': approximate,
                 'limit': limit,
                 'offset': offset
             }, status=status.HTTP_200_OK)
@@ -2018,6 +2251,7 @@ def events_list_create(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@request_deadline()
 def events_by_type(request, event_type):
     """
     Get events by type (past, recent, upcoming)
@@ -2033,12 +2267,12 @@ def events_by_type(request, event_type):
             )
         
         events = Event.objects.filter(
+            event_type_q(event_type),
             is_published=True,
-            event_type=event_type
         ).order_by('display_order', '-event_date')
         
         # Pagination
-        limit = int(request.GET.get('limit', 10))
+        limit = _page_size(request, 'limit', 10)
         offset = int(request.GET.get('offset', 0))
         total_count = events.count()
         events = events[offset:offset + limit]
@@ -2088,8 +2322,9 @@ def event_detail(request, slug):
             )
         
         # Increment view count
-        event.views_count += 1
-        event.save(update_fields=['views_count'])
+        with counter_writes():
+            event.views_count += 1
+            event.save(update_fields=['views_count'])
         
         serializer = EventSerializer(event)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -2132,21 +2367,8 @@ def events_featured(request):
     """
     Get all featured events
     """
-    from .models import Event
-    from .serializers import EventListSerializer
-    
     try:
-        events = Event.objects.filter(
-            is_published=True,
-            is_featured=True
-        ).order_by('display_order', '-event_date')
-        
-        serializer = EventListSerializer(events, many=True)
-        
-        return Response({
-            'results': serializer.data,
-            'count': events.count()
-        }, status=status.HTTP_200_OK)
+        return payload_cache.response('event:featured')
         
     except Exception as e:
         return Response(
@@ -2161,19 +2383,8 @@ def events_categories(request):
     """
     Get all event categories with counts
     """
-    from .models import Event
-    from django.db.models import Count
-    
     try:
-        categories = Event.objects.filter(
-            is_published=True
-        ).values('category').annotate(
-            count=Count('id')
-        ).order_by('-count')
-        
-        return Response({
-            'categories': list(categories)
-        }, status=status.HTTP_200_OK)
+        return payload_cache.response('event:categories')
         
     except Exception as e:
         return Response(
@@ -2186,6 +2397,7 @@ def events_categories(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@request_deadline()
 def youtube_videos_list(request):
     """
     Get all published YouTube videos/shorts
@@ -2217,13 +2429,12 @@ def youtube_videos_list(request):
         # Order by display_order and created_at
         videos = videos.order_by('display_order', '-created_at')
         
-        # Apply limit if specified
-        if limit:
-            try:
-                limit = int(limit)
-                videos = videos[:limit]
-            except ValueError:
-                pass
+        # Apply limit if specified, never more than MAX_PAGE_SIZE
+        try:
+            limit = min(int(limit), MAX_PAGE_SIZE) if limit else MAX_PAGE_SIZE
+        except ValueError:
+            limit = MAX_PAGE_SIZE
+        videos = videos[:limit]
         
         # Serialize data
         videos_data = []
@@ -2325,35 +2536,8 @@ def youtube_videos_featured(request):
     """
     Get featured YouTube videos/shorts for homepage
     """
-    from .models import YouTubeVideo
-    
     try:
-        videos = YouTubeVideo.objects.filter(
-            is_published=True,
-            is_featured=True
-        ).order_by('display_order', '-created_at')
-        
-        videos_data = []
-        for video in videos:
-            videos_data.append({
-                'id': video.id,
-                'title': video.title,
-                'description': video.description,
-                'slug': video.slug,
-                'video_id': video.video_id,
-                'embed_url': video.embed_url,
-                'video_type': video.video_type,
-                'category': video.category,
-                'thumbnail': video.thumbnail,
-                'autoplay': video.autoplay,
-                'duration': video.duration,
-                'watch_url': video.watch_url,
-            })
-        
-        return Response({
-            'count': len(videos_data),
-            'featured_videos': videos_data
-        }, status=status.HTTP_200_OK)
+        return payload_cache.response('youtube_video:featured')
         
     except Exception as e:
         return Response(
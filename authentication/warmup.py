@@ -0,0 +1,79 @@
+"""
+Boot-time warmup, run once in the gunicorn master before it forks.
+
+Loads what the first requests of every worker would otherwise load one by
+one: the homepage payloads (restored from cache_snapshot where still valid,
+otherwise built by payload_cache), the hackathon schedule behind the
+countdown stream and the compiled screening term list. The master then
+closes its database connections, because a socket shared by forked
+workers is corrupted by the first two that use it, and gc.freeze() moves
+everything built so far out of the collector's reach so workers don't
+dirty (and so copy) those pages by scanning them.
+
+Anything that fails to warm is logged and left to load on first use.
+"""
+import gc
+import logging
+import time
+
+from django.db import connections
+
+from . import cache_snapshot, countdown, payload_cache, screening
+
+logger = logging.getLogger(__name__)
+
+
+def _timed(timings, name, load):
+    start = time.perf_counter()
+    try:
+        load()
+    except Exception:
+        logger.exception(f"Warmup of {name} failed")
+        return
+    timings[name] = (time.perf_counter() - start) * 1000
+
+
+def warm():
+    """Load the shared caches; returns {name: milliseconds} for what loaded"""
+    timings = {}
+    _timed(timings, 'snapshot', cache_snapshot.load)
+    timings.update({f'payload {name}': ms for name, ms in payload_cache.warm().items()})
+    _timed(timings, 'hackathon schedule', countdown.schedule.refresh)
+    _timed(timings, 'screening terms', lambda: screening.screen(''))
+    return timings
+
+
+def release_connections():
+    """Close every connection (and pool) opened here so no worker inherits a socket"""
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+        close_pool = getattr(connection, 'close_pool', None)
+        if close_pool is not None:
+            close_pool()
+
+
+def prepare_for_fork(run_warmup=True):
+    """Warm up, drop connections and freeze the heap; returns the warmup timings"""
+    timings = warm() if run_warmup else {}
+    release_connections()
+    gc.collect()
+    gc.freeze()
+    return timings
+
+
+def memory_usage(pid='self'):
+    """{'rss': kB, 'pss': kB, 'shared': kB} for a process from /proc; empty where /proc is missing"""
+    usage = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty'):
+                    usage[key] = int(rest.split()[0])
+    except OSError:
+        return usage
+    return {
+        'rss': usage.get('Rss', 0),
+        'pss': usage.get('Pss', 0),
+        'shared': usage.get('Shared_Clean', 0) + usage.get('Shared_Dirty', 0),
+    }
@@ -11,6 +11,7 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+# Served by uvicorn workers under gunicorn (see Procfile), same settings as wsgi.py
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings_prod")
 
 application = get_asgi_application()
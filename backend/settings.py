@@ -12,6 +12,9 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 
+# Database pool and replica, queues, streams and caches (shared with settings_prod)
+from .settings_common import *  # noqa: F401,F403
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -23,7 +26,6 @@ if env_file.exists():
 else:
     from decouple import config
 
-import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -72,6 +74,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
+    "authentication.db_routing.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -108,19 +111,20 @@ WSGI_APPLICATION = "backend.wsgi.application"
 # Database configuration using dj-database-url
 DATABASE_URL = config('DATABASE_URL', default='')
 
-if DATABASE_URL:
-    # Use the database URL if provided (for production)
-    DATABASES = {
-        'default': dj_database_url.parse(DATABASE_URL)
-    }
-else:
-    # Default to SQLite for local development
-    DATABASES = {
-        "default": {
-            "ENGINE": "django.db.backends.sqlite3",
-            "NAME": BASE_DIR / "db.sqlite3",
-        }
-    }
+# Persistent connections: seconds a connection is reused across requests
+# (0 = close after every request). Health checks ping a reused connection
+# before the request touches it, so a dropped connection is reopened quietly.
+# Only for WSGI (runserver): under ASGI keep this at 0 and use DB_POOL, as
+# settings_prod does, since persistent connections pile up per executor thread.
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+
+# Optional PostgreSQL connection pool (Django 5.1+, psycopg[pool] from the
+# requirements). Replaces persistent connections when on.
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+
+# Default to SQLite for local development; the pool sizes and the optional
+# read replica are in settings_common
+DATABASES = databases(DATABASE_URL, DB_CONN_MAX_AGE, DB_POOL)
 
 
 # Password validation
@@ -212,7 +216,7 @@ CSRF_TRUSTED_ORIGINS = [
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'authentication.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
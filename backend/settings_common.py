@@ -0,0 +1,144 @@
+"""
+Settings shared by settings.py (development) and settings_prod.py.
+
+Both start with `from .settings_common import *` and then set what differs
+between them. Here: the database pool and read replica, the background
+queues and streams, and the caches of the authentication app, all read
+from the environment (.env.example lists them). Production only picks
+other connection defaults, passed to databases().
+"""
+from pathlib import Path
+
+import dj_database_url
+from decouple import config
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+# Database
+
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+DB_POOL_MIN_SIZE = config('DB_POOL_MIN_SIZE', default=2, cast=int)
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=10, cast=int)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=int)
+
+# Optional read replica (authentication/db_routing.py): reads of GET/HEAD/OPTIONS
+# requests go to it unless the client wrote within REPLICA_STICKY_SECONDS (a signed
+# cookie carries that pin) or the replica is more than REPLICA_MAX_LAG_SECONDS
+# behind (checked every REPLICA_LAG_CHECK_SECONDS). Any URL dj-database-url accepts, e.g. a second SQLite file.
+DATABASE_REPLICA_URL = config('DATABASE_REPLICA_URL', default='')
+REPLICA_MAX_LAG_SECONDS = config('REPLICA_MAX_LAG_SECONDS', default=5, cast=float)
+REPLICA_LAG_CHECK_SECONDS = config('REPLICA_LAG_CHECK_SECONDS', default=5, cast=int)
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=15, cast=int)
+
+DATABASE_ROUTERS = ['authentication.db_routing.ReplicaRouter']
+
+
+def databases(url, conn_max_age, pool):
+    """DATABASES for url (SQLite under BASE_DIR if empty) plus the optional replica
+
+    With pool, PostgreSQL connections come from Django's psycopg 3 pool
+    (Django 5.1+, psycopg[pool] from the requirements) instead of being kept
+    for conn_max_age seconds.
+    """
+    if url:
+        default = dj_database_url.parse(
+            url,
+            conn_max_age=0 if pool else conn_max_age,
+            conn_health_checks=DB_CONN_HEALTH_CHECKS,
+        )
+        if pool and default['ENGINE'] == 'django.db.backends.postgresql':
+            from psycopg_pool import ConnectionPool
+            default.setdefault('OPTIONS', {})['pool'] = {
+                'min_size': DB_POOL_MIN_SIZE,
+                'max_size': DB_POOL_MAX_SIZE,
+                'timeout': DB_POOL_TIMEOUT,
+                'check': ConnectionPool.check_connection,
+            }
+    else:
+        default = {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+        }
+    result = {'default': default}
+
+    if DATABASE_REPLICA_URL:
+        replica = dj_database_url.parse(
+            DATABASE_REPLICA_URL,
+            conn_max_age=default.get('CONN_MAX_AGE', 0),
+            conn_health_checks=DB_CONN_HEALTH_CHECKS,
+        )
+        if default.get('OPTIONS', {}).get('pool'):
+            replica.setdefault('OPTIONS', {})['pool'] = dict(default['OPTIONS']['pool'])
+        # The test run has no real replica; read the test database through this alias too
+        replica['TEST'] = {'MIRROR': 'default'}
+        result['replica'] = replica
+    return result
+
+
+# Seconds an API token -> user lookup stays cached (see authentication/authentication.py)
+TOKEN_AUTH_CACHE_TIMEOUT = config('TOKEN_AUTH_CACHE_TIMEOUT', default=60, cast=int)
+
+# Outbound OTP queue (see authentication/otp_queue.py)
+# OTP_QUEUE_MODE: 'thread' (in-process pool), 'worker' (process_otp_queue command) or 'sync'
+OTP_QUEUE_MODE = config('OTP_QUEUE_MODE', default='thread')
+OTP_QUEUE_WORKERS = config('OTP_QUEUE_WORKERS', default=4, cast=int)
+OTP_QUEUE_MAX_ATTEMPTS = config('OTP_QUEUE_MAX_ATTEMPTS', default=4, cast=int)
+OTP_QUEUE_RETRY_BACKOFF = config('OTP_QUEUE_RETRY_BACKOFF', default=5, cast=int)
+OTP_DEDUPE_WINDOW = config('OTP_DEDUPE_WINDOW', default=60, cast=int)
+
+# Time-based SharXathon status / Event type transitions (authentication/scheduler.py,
+# run by the `manage.py advance_states` cron job in render.yaml):
+# days an event stays 'recent' after its date before it becomes 'past'
+EVENT_RECENT_DAYS = config('EVENT_RECENT_DAYS', default=30, cast=int)
+
+# Hackathon countdowns (authentication/countdown.py): seconds between in-memory
+# schedule reloads, and the lifetime of one SSE stream before the client reconnects
+COUNTDOWN_SCHEDULE_REFRESH = config('COUNTDOWN_SCHEDULE_REFRESH', default=60, cast=int)
+COUNTDOWN_STREAM_MAX_SECONDS = config('COUNTDOWN_STREAM_MAX_SECONDS', default=300, cast=int)
+
+# Live comment streams (authentication/comment_feed.py): seconds between checks
+# for changes made by other workers, and the lifetime of one SSE stream
+COMMENT_STREAM_POLL_SECONDS = config('COMMENT_STREAM_POLL_SECONDS', default=2, cast=int)
+COMMENT_STREAM_MAX_SECONDS = config('COMMENT_STREAM_MAX_SECONDS', default=300, cast=int)
+
+# Comment screening (authentication/screening.py): how often each worker checks
+# whether the ScreeningTerm list changed in another process
+SCREENING_RECHECK_SECONDS = config('SCREENING_RECHECK_SECONDS', default=30, cast=int)
+
+# Reply/reaction notifications (authentication/notifications.py):
+# NOTIFICATION_MODE 'thread' (batched by a background writer) or 'sync'
+NOTIFICATION_MODE = config('NOTIFICATION_MODE', default='thread')
+NOTIFICATION_FLUSH_SECONDS = config('NOTIFICATION_FLUSH_SECONDS', default=1, cast=float)
+NOTIFICATION_BATCH_SIZE = config('NOTIFICATION_BATCH_SIZE', default=200, cast=int)
+
+# List totals (authentication/counting.py): unfiltered lists with at least
+# COUNT_EXACT_THRESHOLD rows report an estimate instead of running COUNT(*).
+# COUNT_STRATEGY: 'auto', 'estimate' (PostgreSQL planner), 'cached' or 'exact'
+COUNT_STRATEGY = config('COUNT_STRATEGY', default='auto')
+COUNT_EXACT_THRESHOLD = config('COUNT_EXACT_THRESHOLD', default=10000, cast=int)
+COUNT_CACHE_SECONDS = config('COUNT_CACHE_SECONDS', default=60, cast=int)
+
+# Time budget for the database work of list/search views decorated with
+# @request_deadline (authentication/deadlines.py); 0 disables it
+REQUEST_DEADLINE_SECONDS = config('REQUEST_DEADLINE_SECONDS', default=3, cast=float)
+
+# Lifetime of the cached homepage payloads (authentication/payload_cache.py),
+# warmed in the gunicorn master at boot (gunicorn.conf.py)
+PAYLOAD_CACHE_SECONDS = config('PAYLOAD_CACHE_SECONDS', default=60, cast=int)
+
+# Shared file holding the per-namespace cache generations that keep the
+# workers' local caches coherent (authentication/cache_bus.py); empty = temp dir
+CACHE_GENERATION_FILE = config('CACHE_GENERATION_FILE', default='')
+
+# Directory (ideally tmpfs, e.g. /dev/shm/neosharx-payloads) where the homepage
+# payloads are shared by all workers through mmap (authentication/payload_store.py);
+# empty keeps them in each worker's Django cache
+PAYLOAD_STORE_DIR = config('PAYLOAD_STORE_DIR', default='')
+
+# File the web workers save their cached homepage payloads to every
+# CACHE_SNAPSHOT_INTERVAL seconds and the next boot restores them from
+# (authentication/cache_snapshot.py); empty disables it. Only worth it on a
+# disk that survives deploys and while the tables are small (see the module)
+CACHE_SNAPSHOT_FILE = config('CACHE_SNAPSHOT_FILE', default='')
+CACHE_SNAPSHOT_INTERVAL = config('CACHE_SNAPSHOT_INTERVAL', default=300, cast=int)
@@ -1,7 +1,9 @@
 import os
 from decouple import config
 from pathlib import Path
-import dj_database_url
+
+# Database pool and replica, queues, streams and caches (shared with settings.py)
+from .settings_common import *  # noqa: F401,F403
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -44,6 +46,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
+    "authentication.db_routing.ReplicaRoutingMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -75,17 +78,15 @@ TEMPLATES = [
 WSGI_APPLICATION = "backend.wsgi.application"
 
 # Database
-if config('DATABASE_URL', default=None):
-    DATABASES = {
-        'default': dj_database_url.parse(config('DATABASE_URL'))
-    }
-else:
-    DATABASES = {
-        "default": {
-            "ENGINE": "django.db.backends.sqlite3",
-            "NAME": BASE_DIR / "db.sqlite3",
-        }
-    }
+# Production is served over ASGI, where Django runs each sync query on
+# executor threads; persistent connections (CONN_MAX_AGE > 0) pile up one
+# per thread there, so Django advises 0. Connections are reused through the
+# psycopg 3 pool instead (Django 5.1+, psycopg[pool] in requirements), which
+# hands them back at the end of every request.
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=0, cast=int)
+DB_POOL = config('DB_POOL', default=True, cast=bool)
+
+DATABASES = databases(config('DATABASE_URL', default=''), DB_CONN_MAX_AGE, DB_POOL)
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -125,7 +126,7 @@ AUTH_USER_MODEL = 'authentication.CustomUser'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'authentication.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
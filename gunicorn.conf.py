@@ -0,0 +1,67 @@
+"""
+gunicorn settings for the production web process (Procfile / render.yaml):
+
+    gunicorn -c gunicorn.conf.py backend.asgi:application
+
+The app is imported once in the master (preload_app), the shared caches are
+warmed there (authentication/warmup.py) and the heap is frozen before the
+workers fork, so every worker starts with Django, the URLconf and the warm
+caches already in memory, shared copy-on-write with the master. With
+CACHE_SNAPSHOT_FILE set, the warmup restores the payloads the workers last
+saved to the cache snapshot (authentication/cache_snapshot.py), and a
+worker that exits cleanly saves one.
+
+Environment:
+    PORT              port to bind (default 8000)
+    WEB_CONCURRENCY   worker processes (default 3)
+    GUNICORN_PRELOAD  0 to import the app in each worker instead
+    GUNICORN_WARMUP   0 to skip the cache warmup (preload still applies)
+"""
+import os
+
+
+def _flag(name, default=True):
+    return os.environ.get(name, '1' if default else '0').lower() in ('1', 'true', 'yes', 'on')
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '3'))
+worker_class = 'uvicorn_worker.UvicornWorker'
+preload_app = _flag('GUNICORN_PRELOAD')
+warmup = _flag('GUNICORN_WARMUP')
+
+
+def when_ready(server):
+    """Runs in the master after the app is loaded, before the first fork"""
+    if not preload_app:
+        return
+    from authentication import warmup as boot
+
+    timings = boot.prepare_for_fork(run_warmup=warmup)
+    if timings:
+        summary = ', '.join(f'{name} {ms:.0f}ms' for name, ms in sorted(timings.items()))
+        server.log.info(f"Warmed {len(timings)} caches in {sum(timings.values()):.0f}ms: {summary}")
+    server.log.info(f"Master ready, rss {boot.memory_usage().get('rss', 0)} kB")
+
+
+def worker_exit(server, worker):
+    from authentication import cache_snapshot
+
+    try:
+        saved = cache_snapshot.save()
+    except Exception:
+        worker.log.exception("Could not save the cache snapshot")
+        return
+    if saved:
+        worker.log.info(f"Worker {worker.pid} saved {saved} payloads to the cache snapshot")
+
+
+def post_worker_init(worker):
+    from authentication.warmup import memory_usage
+
+    usage = memory_usage()
+    if usage:
+        worker.log.info(
+            f"Worker {worker.pid} booted: rss {usage['rss']} kB, pss {usage['pss']} kB, "
+            f"shared {usage['shared']} kB"
+        )
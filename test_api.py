@@ -86,8 +86,8 @@ def main():
     otp_data = {"phone_number": TEST_PHONE}
     otp_response = test_endpoint("POST", "/send-otp/", otp_data, headers)
     
-    if otp_response and otp_response.status_code == 200:
-        print("✅ OTP sent successfully!")
+    if otp_response and otp_response.status_code == 202:
+        print("✅ OTP queued!")
         print(f"📱 Please check your phone ({TEST_PHONE}) for the OTP")
         
         # Wait for user to receive OTP
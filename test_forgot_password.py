@@ -24,8 +24,8 @@ def test_forgot_password():
     print(f"Status Code: {response.status_code}")
     print(f"Response: {json.dumps(response.json(), indent=2)}")
     
-    if response.status_code == 200:
-        print("✅ Forgot password OTP sent successfully!")
+    if response.status_code == 202:
+        print("✅ Forgot password OTP queued!")
         print("📱 Please check your phone for the OTP")
         
         # Wait for user to receive OTP